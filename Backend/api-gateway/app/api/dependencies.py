@@ -1,23 +1,43 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 
 from app.clients.auth_client import AuthClient
 from app.clients.events_client import EventsClient
 from app.clients.todos_client import TodosClient
 from app.core.config import get_settings
+from app.realtime.broker import ChangeBroker
 
 
-def get_auth_client(settings=Depends(get_settings)) -> AuthClient:
-    return AuthClient(settings.auth_service_url, settings.request_timeout, settings.connect_timeout)
+def _transport(request: Request, service: str):
+    # Set in monolith mode only; None means plain HTTP.
+    return request.app.state.service_transports.get(service)
 
 
-def get_events_client(settings=Depends(get_settings)) -> EventsClient:
+def get_auth_client(request: Request, settings=Depends(get_settings)) -> AuthClient:
+    return AuthClient(
+        settings.auth_service_url,
+        settings.request_timeout,
+        settings.connect_timeout,
+        _transport(request, "auth"),
+    )
+
+
+def get_events_client(request: Request, settings=Depends(get_settings)) -> EventsClient:
     return EventsClient(
-        settings.events_service_url, settings.request_timeout, settings.connect_timeout
+        settings.events_service_url,
+        settings.request_timeout,
+        settings.connect_timeout,
+        _transport(request, "events"),
     )
 
 
-def get_todos_client(settings=Depends(get_settings)) -> TodosClient:
+def get_todos_client(request: Request, settings=Depends(get_settings)) -> TodosClient:
     return TodosClient(
-        settings.todos_service_url, settings.request_timeout, settings.connect_timeout
+        settings.todos_service_url,
+        settings.request_timeout,
+        settings.connect_timeout,
+        _transport(request, "todos"),
     )
 
+
+def get_change_broker(request: Request) -> ChangeBroker:
+    return request.app.state.change_broker
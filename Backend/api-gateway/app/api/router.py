@@ -1,7 +1,15 @@
 from fastapi import APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import auth, events, health, todos
+from shared.memory import MemoryTrackingMiddleware
+from shared.memory import router as memory_router
+from shared.profiling import ProfilingMiddleware
+from shared.profiling import router as profiling_router
+from shared.tracing import TracingMiddleware
+
+from app.api.routes import auth, events, health, stream, todos
+from app.core.config import get_settings
+from app.core.timing import ServerTimingMiddleware
 
 
 def create_api_router() -> APIRouter:
@@ -10,6 +18,9 @@ def create_api_router() -> APIRouter:
     router.include_router(auth.router)
     router.include_router(events.router)
     router.include_router(todos.router)
+    router.include_router(stream.router)
+    router.include_router(profiling_router)
+    router.include_router(memory_router)
     return router
 
 
@@ -20,5 +31,10 @@ def apply_middlewares(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing"],
     )
+    app.add_middleware(MemoryTrackingMiddleware)
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(TracingMiddleware, trust_incoming=get_settings().trace_trust_incoming)
 
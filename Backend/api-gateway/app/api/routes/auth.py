@@ -1,6 +1,6 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Body, Depends, Header
 from httpx import HTTPStatusError
 
 from app.api.dependencies import get_auth_client
@@ -57,10 +57,23 @@ async def get_current_user(
 
 @router.post("/logout")
 async def logout_user(
+    authorization: str = Header(...),
+    payload: Optional[Dict[str, Any]] = Body(default=None),
+    client: AuthClient = Depends(get_auth_client),
+):
+    try:
+        return await client.logout(authorization, payload)
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+
+@router.post("/logout/all")
+async def logout_everywhere(
+    authorization: str = Header(...),
     client: AuthClient = Depends(get_auth_client),
 ):
     try:
-        return await client.logout()
+        return await client.logout_everywhere(authorization)
     except HTTPStatusError as exc:
         raise translate_http_error(exc)
 
@@ -1,11 +1,13 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, Header, status
+from fastapi import APIRouter, Depends, Header, Query, Request, status
 from httpx import HTTPStatusError
 
 from app.api.dependencies import get_events_client
 from app.api.errors import translate_http_error
+from app.api.streaming import relay
 from app.clients.events_client import EventsClient
+from app.core.config import Settings, get_settings
 
 
 router = APIRouter(prefix="/api/events", tags=["Events"])
@@ -13,15 +15,77 @@ router = APIRouter(prefix="/api/events", tags=["Events"])
 
 @router.get("")
 async def list_events(
+    window_start: Optional[str] = Query(default=None, alias="from"),
+    window_end: Optional[str] = Query(default=None, alias="to"),
+    fields: Optional[str] = Query(default=None),
     authorization: str = Header(...),
     client: EventsClient = Depends(get_events_client),
 ):
+    params = {"from": window_start, "to": window_end, "fields": fields}
     try:
-        return await client.list_events(authorization)
+        return await client.list_events(authorization, params)
     except HTTPStatusError as exc:
         raise translate_http_error(exc)
 
 
+@router.get("/changes")
+async def list_event_changes(
+    since: Optional[str] = Query(default=None),
+    limit: Optional[int] = Query(default=None),
+    authorization: str = Header(...),
+    client: EventsClient = Depends(get_events_client),
+):
+    try:
+        return await client.list_changes(authorization, {"since": since, "limit": limit})
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+
+@router.get("/summary")
+async def summarize_events(
+    start_date: str = Query(alias="from"),
+    end_date: str = Query(alias="to"),
+    tz: str = Query(default="UTC"),
+    top: Optional[int] = Query(default=None),
+    authorization: str = Header(...),
+    client: EventsClient = Depends(get_events_client),
+):
+    params = {"from": start_date, "to": end_date, "tz": tz, "top": top}
+    try:
+        return await client.summarize_events(authorization, params)
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+
+@router.post("/import")
+async def import_events(
+    request: Request,
+    authorization: str = Header(...),
+    client: EventsClient = Depends(get_events_client),
+    settings: Settings = Depends(get_settings),
+):
+    content_type = request.headers.get("content-type", "")
+    try:
+        return await client.import_events(
+            authorization, content_type, request.stream(), settings.import_timeout
+        )
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+
+@router.get("/export")
+async def export_events(
+    fmt: Optional[str] = Query(default=None, alias="format"),
+    authorization: str = Header(...),
+    client: EventsClient = Depends(get_events_client),
+):
+    try:
+        upstream = await client.export_events(authorization, {"format": fmt})
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+    return relay(upstream)
+
+
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_event(
     payload: Dict[str, Any],
@@ -1,5 +1,9 @@
+from typing import Any
+
 from fastapi import APIRouter
 
+from shared.memory import process_stats, request_peaks
+
 from app.core.config import get_settings
 
 
@@ -9,12 +13,20 @@ router = APIRouter(tags=["Health"])
 @router.get("/health")
 async def health_check() -> dict[str, dict[str, str] | str]:
     settings = get_settings()
-    return {
-        "status": "API Gateway is running",
-        "services": {
+    if settings.mode == "monolith":
+        services = {name: "in-process" for name in ("auth", "events", "todos")}
+    else:
+        services = {
             "auth": f"{settings.auth_service_url}/health",
             "events": f"{settings.events_service_url}/health",
             "todos": f"{settings.todos_service_url}/health",
-        },
-    }
+        }
+    return {"status": "API Gateway is running", "services": services}
 
+
+@router.get("/metrics")
+def metrics() -> dict[str, dict[str, Any]]:
+    return {
+        "process": process_stats(),
+        "request_memory": request_peaks.stats(),
+    }
@@ -0,0 +1,91 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from httpx import HTTPStatusError, RequestError
+
+from app.api.dependencies import get_auth_client, get_change_broker
+from app.api.errors import translate_http_error
+from app.clients.auth_client import AuthClient
+from app.core.config import get_settings
+from app.realtime.broker import ChangeBroker, TooManyConnectionsError
+from app.realtime.sse import SSE_HEADERS, event_stream
+
+
+router = APIRouter(prefix="/api", tags=["Stream"])
+
+
+@router.post("/stream/ticket")
+async def create_stream_ticket(
+    authorization: str = Header(...),
+    client: AuthClient = Depends(get_auth_client),
+):
+    try:
+        return await client.stream_ticket(authorization)
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+
+@router.get("/stream")
+async def stream_changes(
+    authorization: Optional[str] = Header(default=None),
+    ticket: Optional[str] = Query(default=None),
+    client: AuthClient = Depends(get_auth_client),
+    broker: ChangeBroker = Depends(get_change_broker),
+    settings=Depends(get_settings),
+):
+    # EventSource cannot send headers, so browsers first exchange the access token
+    # for a short-lived, single-use ticket (POST /api/stream/ticket) and put that in the URL.
+    try:
+        if authorization:
+            ticket = (await client.stream_ticket(authorization))["ticket"]
+        if not ticket:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
+            )
+        grant = await client.check_stream_ticket(ticket)
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+    try:
+        subscription = broker.subscribe(int(grant["user_id"]))
+    except TooManyConnectionsError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "5"},
+        ) from exc
+
+    return StreamingResponse(
+        event_stream(
+            subscription,
+            settings.stream_heartbeat_interval,
+            expires_at=grant["token_expires_at"],
+            recheck=_recheck(client, grant["ticket"]),
+            recheck_interval=settings.stream_recheck_interval,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+def _recheck(client: AuthClient, ticket: str):
+    """Callback telling whether the stream's token is still good.
+
+    ``ticket`` is the renewal ticket from the grant; it only ever travels
+    between the gateway and auth, in request bodies.
+    """
+
+    async def still_valid() -> bool:
+        nonlocal ticket
+        try:
+            grant = await client.check_stream_ticket(ticket, renewal=True)
+        except HTTPStatusError as exc:
+            # Only a definite "no" ends the stream, not auth being briefly unavailable.
+            return exc.response.status_code not in (401, 403)
+        except RequestError:
+            return True
+        ticket = grant["ticket"]
+        return True
+
+    return still_valid
@@ -1,10 +1,11 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, Header, status
+from fastapi import APIRouter, Depends, Header, Query, status
 from httpx import HTTPStatusError
 
 from app.api.dependencies import get_todos_client
 from app.api.errors import translate_http_error
+from app.api.streaming import relay
 from app.clients.todos_client import TodosClient
 
 
@@ -13,15 +14,53 @@ router = APIRouter(prefix="/api/todos", tags=["Todos"])
 
 @router.get("")
 async def list_todos(
+    fields: Optional[str] = Query(default=None),
     authorization: str = Header(...),
     client: TodosClient = Depends(get_todos_client),
 ):
     try:
-        return await client.list_todos(authorization)
+        return await client.list_todos(authorization, {"fields": fields})
     except HTTPStatusError as exc:
         raise translate_http_error(exc)
 
 
+@router.get("/changes")
+async def list_todo_changes(
+    since: Optional[str] = Query(default=None),
+    limit: Optional[int] = Query(default=None),
+    authorization: str = Header(...),
+    client: TodosClient = Depends(get_todos_client),
+):
+    try:
+        return await client.list_changes(authorization, {"since": since, "limit": limit})
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+
+@router.get("/stats")
+async def get_todo_stats(
+    authorization: str = Header(...),
+    client: TodosClient = Depends(get_todos_client),
+):
+    try:
+        return await client.get_stats(authorization)
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+
+
+@router.get("/export")
+async def export_todos(
+    fmt: Optional[str] = Query(default=None, alias="format"),
+    authorization: str = Header(...),
+    client: TodosClient = Depends(get_todos_client),
+):
+    try:
+        upstream = await client.export_todos(authorization, {"format": fmt})
+    except HTTPStatusError as exc:
+        raise translate_http_error(exc)
+    return relay(upstream)
+
+
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_todo(
     payload: Dict[str, Any],
@@ -0,0 +1,18 @@
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from app.clients.base import StreamedResponse
+
+RELAYED_HEADERS = ("content-type", "content-disposition", "content-encoding")
+
+
+def relay(upstream: StreamedResponse) -> StreamingResponse:
+    """Pass an upstream body through as it arrives instead of buffering it."""
+
+    headers = {name: upstream.headers[name] for name in RELAYED_HEADERS if name in upstream.headers}
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers=headers,
+        background=BackgroundTask(upstream.aclose),
+    )
@@ -4,6 +4,8 @@ from app.clients.base import ServiceClient
 
 
 class AuthClient(ServiceClient):
+    name = "auth"
+
     async def register(self, payload: dict[str, Any]) -> Any:
         return await self._request("POST", "/register", json=payload)
 
@@ -24,6 +26,30 @@ class AuthClient(ServiceClient):
             headers={"Authorization": authorization},
         )
 
-    async def logout(self) -> Any:
-        return await self._request("POST", "/logout")
+    async def stream_ticket(self, authorization: str) -> Any:
+        return await self._request(
+            "POST",
+            "/stream-ticket",
+            headers={"Authorization": authorization},
+        )
+
+    async def check_stream_ticket(self, ticket: str, renewal: bool = False) -> Any:
+        return await self._request(
+            "POST", "/stream-ticket/check", json={"ticket": ticket, "renewal": renewal}
+        )
+
+    async def logout(self, authorization: str, payload: dict[str, Any] | None = None) -> Any:
+        return await self._request(
+            "POST",
+            "/logout",
+            headers={"Authorization": authorization},
+            json=payload,
+        )
+
+    async def logout_everywhere(self, authorization: str) -> Any:
+        return await self._request(
+            "POST",
+            "/logout/all",
+            headers={"Authorization": authorization},
+        )
 
@@ -1,26 +1,162 @@
 from __future__ import annotations
 
+import time
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
 
+from shared.tracing import KIND_CLIENT, TRACEPARENT_HEADER, current_context, tracer
+
+from app.core.timing import record_upstream
+
+# ``unix:/run/calendar/events.sock``: the service listens on a unix socket.
+UNIX_SCHEME = "unix:"
+
 
 class ServiceClient:
     """Base HTTP client with shared request logic."""
 
-    def __init__(self, base_url: str, timeout: float, connect_timeout: float):
-        self._base_url = base_url.rstrip("/")
+    # Prefix of this service's entries in the gateway's Server-Timing header.
+    name = "upstream"
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float,
+        connect_timeout: float,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
         self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        # An in-process ASGI transport in monolith mode, otherwise HTTP.
+        self._transport = transport
+        self._socket_path: str | None = None
+        if base_url.startswith(UNIX_SCHEME):
+            # The host only fills the Host header; the socket decides where requests go.
+            self._socket_path = base_url[len(UNIX_SCHEME):]
+            base_url = f"http://{self.name}"
+        self._base_url = base_url.rstrip("/")
+
+    def _client(self) -> httpx.AsyncClient:
+        transport = self._transport
+        if transport is None and self._socket_path is not None:
+            transport = httpx.AsyncHTTPTransport(uds=self._socket_path)
+        return httpx.AsyncClient(timeout=self._timeout, transport=transport)
 
     async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
         url = f"{self._base_url}{path}"
-        async with httpx.AsyncClient(timeout=self._timeout) as client:
-            response = await client.request(method, url, **kwargs)
+        with tracer.span(f"{self.name} {method} {path}", KIND_CLIENT) as span:
+            _propagate(span, kwargs)
+            async with self._client() as client:
+                started = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                self._record_timing(started, response, span)
+        response.raise_for_status()
+        return _extract_response_body(response)
+
+    async def _stream(self, method: str, path: str, **kwargs: Any) -> StreamedResponse:
+        """Send a request and return the response before its body has been read."""
+
+        client = self._client()
+        try:
+            # The span ends when the headers arrive; the body is relayed later.
+            with tracer.span(f"{self.name} {method} {path}", KIND_CLIENT) as span:
+                _propagate(span, kwargs)
+                request = client.build_request(method, f"{self._base_url}{path}", **kwargs)
+                started = time.perf_counter()
+                response = await client.send(request, stream=True)
+                self._record_timing(started, response, span)
+        except BaseException:
+            await client.aclose()
+            raise
+        if response.is_error:
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+                await client.aclose()
             response.raise_for_status()
-            return _extract_response_body(response)
+        return StreamedResponse(client, response)
+
+    def _record_timing(self, started: float, response: httpx.Response, span) -> None:
+        duration_ms = (time.perf_counter() - started) * 1000
+        record_upstream(self.name, duration_ms, response.headers.get("server-timing"))
+        if span is not None:
+            span.set("http.status_code", response.status_code)
+            span.error = response.status_code >= 500
+
+
+class StreamedResponse:
+    """Upstream response whose body is relayed chunk by chunk; close it when done."""
+
+    def __init__(self, client: httpx.AsyncClient, response: httpx.Response):
+        self._client = client
+        self._response = response
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self._response.headers
+
+    def aiter_raw(self) -> AsyncIterator[bytes]:
+        return self._response.aiter_raw()
+
+    async def aclose(self) -> None:
+        await self._response.aclose()
+        await self._client.aclose()
+
+
+# httpcore stages reported on the client span, e.g. ``http.connect_tcp_ms``.
+_TRACED_STAGES = (
+    "connect_tcp",
+    "connect_unix_socket",
+    "start_tls",
+    "send_request_body",
+    "receive_response_headers",
+)
+
+
+def _propagate(span, kwargs: dict[str, Any]) -> None:
+    """Pass the trace (or the decision not to sample it) to the service."""
+
+    context = span.context if span is not None else current_context()
+    if context is None:
+        return
+    kwargs["headers"] = {**kwargs.get("headers", {}), TRACEPARENT_HEADER: context.traceparent}
+    if span is not None:
+        kwargs["extensions"] = {"trace": _stage_timer(span)}
+
+
+def _stage_timer(span):
+    """httpcore trace hook: connect and wait times of the call as span attributes."""
+
+    started: dict[str, float] = {}
+
+    async def trace(event_name: str, info: dict) -> None:
+        stage, _, phase = event_name.rpartition(".")
+        stage = stage.rpartition(".")[2]
+        if stage not in _TRACED_STAGES:
+            return
+        if phase == "started":
+            started[stage] = time.perf_counter()
+        elif phase == "complete" and stage in started:
+            span.set(f"http.{stage}_ms", round((time.perf_counter() - started[stage]) * 1000, 3))
+
+    return trace
+
+
+def drop_empty_params(params: dict[str, Any] | None) -> dict[str, Any]:
+    """Drop unset query parameters so services apply their own defaults."""
+    return {key: value for key, value in (params or {}).items() if value is not None}
 
 
 def _extract_response_body(response: httpx.Response) -> Any:
+    # 204 replies from the services carry a JSON content type but no body.
+    if not response.content:
+        return None
     if "application/json" in response.headers.get("content-type", ""):
         return response.json()
     return response.text
@@ -1,12 +1,63 @@
+from collections.abc import AsyncIterator
 from typing import Any
 
-from app.clients.base import ServiceClient
+import httpx
+
+from app.clients.base import ServiceClient, StreamedResponse, drop_empty_params
 
 
 class EventsClient(ServiceClient):
-    async def list_events(self, authorization: str) -> Any:
+    name = "events"
+
+    async def list_events(
+        self, authorization: str, params: dict[str, Any] | None = None
+    ) -> Any:
         return await self._request(
-            "GET", "/events", headers={"Authorization": authorization}
+            "GET",
+            "/events",
+            headers={"Authorization": authorization},
+            params=drop_empty_params(params),
+        )
+
+    async def summarize_events(self, authorization: str, params: dict[str, Any]) -> Any:
+        return await self._request(
+            "GET",
+            "/events/summary",
+            headers={"Authorization": authorization},
+            params=drop_empty_params(params),
+        )
+
+    async def list_changes(self, authorization: str, params: dict[str, Any]) -> Any:
+        return await self._request(
+            "GET",
+            "/events/changes",
+            headers={"Authorization": authorization},
+            params=drop_empty_params(params),
+        )
+
+    async def import_events(
+        self,
+        authorization: str,
+        content_type: str,
+        body: AsyncIterator[bytes],
+        timeout: float,
+    ) -> Any:
+        """Relay an upload chunk by chunk without buffering it in the gateway."""
+
+        return await self._request(
+            "POST",
+            "/events/import",
+            headers={"Authorization": authorization, "Content-Type": content_type},
+            content=body,
+            timeout=httpx.Timeout(timeout, connect=self._timeout.connect),
+        )
+
+    async def export_events(self, authorization: str, params: dict[str, Any]) -> StreamedResponse:
+        return await self._stream(
+            "GET",
+            "/events/export",
+            headers={"Authorization": authorization},
+            params=drop_empty_params(params),
         )
 
     async def create_event(self, authorization: str, payload: dict[str, Any]) -> Any:
@@ -38,4 +89,3 @@ class EventsClient(ServiceClient):
             f"/events/{event_id}",
             headers={"Authorization": authorization},
         )
-
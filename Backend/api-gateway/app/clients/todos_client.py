@@ -1,12 +1,40 @@
 from typing import Any
 
-from app.clients.base import ServiceClient
+from app.clients.base import ServiceClient, StreamedResponse, drop_empty_params
 
 
 class TodosClient(ServiceClient):
-    async def list_todos(self, authorization: str) -> Any:
+    name = "todos"
+
+    async def list_todos(
+        self, authorization: str, params: dict[str, Any] | None = None
+    ) -> Any:
         return await self._request(
-            "GET", "/todos", headers={"Authorization": authorization}
+            "GET",
+            "/todos",
+            headers={"Authorization": authorization},
+            params=drop_empty_params(params),
+        )
+
+    async def get_stats(self, authorization: str) -> Any:
+        return await self._request(
+            "GET", "/todos/stats", headers={"Authorization": authorization}
+        )
+
+    async def list_changes(self, authorization: str, params: dict[str, Any]) -> Any:
+        return await self._request(
+            "GET",
+            "/todos/changes",
+            headers={"Authorization": authorization},
+            params=drop_empty_params(params),
+        )
+
+    async def export_todos(self, authorization: str, params: dict[str, Any]) -> StreamedResponse:
+        return await self._stream(
+            "GET",
+            "/todos/export",
+            headers={"Authorization": authorization},
+            params=drop_empty_params(params),
         )
 
     async def create_todo(self, authorization: str, payload: dict[str, Any]) -> Any:
@@ -38,4 +66,3 @@ class TodosClient(ServiceClient):
             f"/todos/{todo_id}",
             headers={"Authorization": authorization},
         )
-
@@ -1,15 +1,36 @@
+import os
 from functools import lru_cache
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
 class Settings(BaseModel):
+    # http://host:port, or unix:/path/to.sock for a service on the same host started with
+    # SERVICE_SOCKET=/path/to.sock (no TCP loopback; the socket file must be shared).
     auth_service_url: str = Field(default="http://auth-service:8001", alias="AUTH_SERVICE_URL")
     events_service_url: str = Field(default="http://events-service:8002", alias="EVENTS_SERVICE_URL")
     todos_service_url: str = Field(default="http://todos-service:8003", alias="TODOS_SERVICE_URL")
+    # "services": call the services over HTTP; "monolith": run them inside the gateway.
+    mode: str = Field(
+        default="services", alias="GATEWAY_MODE", pattern="^(services|monolith)$"
+    )
+    services_dir: Optional[str] = Field(default=None, alias="MONOLITH_SERVICES_DIR")
     request_timeout: float = Field(default=30.0, alias="GATEWAY_TIMEOUT")
     connect_timeout: float = Field(default=10.0, alias="GATEWAY_CONNECT_TIMEOUT")
+    import_timeout: float = Field(default=300.0, alias="GATEWAY_IMPORT_TIMEOUT")
     environment: str = Field(default="development", alias="ENVIRONMENT")
     debug: bool = Field(default=True, alias="DEBUG")
+    # Change push (SSE): "redis" needs REDIS_URL, "memory" only sees same-process publishers.
+    redis_url: Optional[str] = Field(default=None, alias="REDIS_URL")
+    change_broker: Optional[str] = Field(default=None, alias="CHANGE_BROKER")
+    stream_max_connections: int = Field(default=1000, alias="STREAM_MAX_CONNECTIONS")
+    stream_queue_size: int = Field(default=100, alias="STREAM_QUEUE_SIZE")
+    stream_heartbeat_interval: float = Field(default=15.0, alias="STREAM_HEARTBEAT_INTERVAL")
+    # How often an open stream re-checks its token; keep it below auth's STREAM_TICKET_TTL.
+    stream_recheck_interval: float = Field(default=15.0, alias="STREAM_RECHECK_INTERVAL")
+    # Continue traces from clients' traceparent; only behind a proxy that sets it itself.
+    trace_trust_incoming: bool = Field(default=False, alias="TRACE_TRUST_INCOMING")
 
     class Config:
         populate_by_name = True
@@ -17,5 +38,4 @@ class Settings(BaseModel):
 
 @lru_cache
 def get_settings() -> Settings:
-    return Settings()
-
+    return Settings.model_validate(dict(os.environ))
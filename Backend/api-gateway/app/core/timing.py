@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+
+_upstream_timings: ContextVar[list[str] | None] = ContextVar("upstream_timings", default=None)
+
+
+def record_upstream(service: str, duration_ms: float, server_timing: str | None) -> None:
+    """Remember an upstream call and the ``Server-Timing`` entries it returned.
+
+    The upstream entries are prefixed with the service name, so
+    ``db;dur=3.2`` from events-service becomes ``events-db;dur=3.2``.
+    """
+
+    timings = _upstream_timings.get()
+    if timings is None:
+        return
+    timings.append(f"{service};dur={duration_ms:.1f}")
+    for entry in (server_timing or "").split(","):
+        entry = entry.strip()
+        if entry:
+            timings.append(f"{service}-{entry}")
+
+
+class ServerTimingMiddleware:
+    """Adds ``gateway;dur=`` and the timings of every upstream call to the response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: list[str] = []
+        token = _upstream_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                gateway_ms = (time.perf_counter() - started) * 1000
+                value = ", ".join([f"gateway;dur={gateway_ms:.1f}", *timings])
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _upstream_timings.reset(token)
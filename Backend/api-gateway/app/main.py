@@ -1,16 +1,43 @@
+from contextlib import asynccontextmanager, nullcontext
+from pathlib import Path
+
 from fastapi import FastAPI
 
+from shared.tracing import configure_tracing, tracer
+
 from app.api.router import apply_middlewares, create_api_router
 from app.core.config import get_settings
+from app.monolith import DEFAULT_SERVICES_DIR, Monolith
+from app.realtime.broker import create_broker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    monolith = app.state.monolith
+    async with monolith.lifespan() if monolith is not None else nullcontext():
+        broker = create_broker(get_settings())
+        app.state.change_broker = broker
+        await broker.start()
+        try:
+            yield
+        finally:
+            await broker.stop()
+            tracer.shutdown()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title="API Gateway", version="2.0.0", debug=settings.debug)
+    monolith = None
+    if settings.mode == "monolith":
+        monolith = Monolith(Path(settings.services_dir or DEFAULT_SERVICES_DIR))
+    # After the services, which name the tracer after themselves when imported.
+    configure_tracing("api-gateway")
+    app = FastAPI(title="API Gateway", version="2.0.0", debug=settings.debug, lifespan=lifespan)
+    app.state.monolith = monolith
+    app.state.service_transports = monolith.transports if monolith is not None else {}
     apply_middlewares(app)
     app.include_router(create_api_router())
     return app
 
 
 app = create_app()
-
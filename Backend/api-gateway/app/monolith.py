@@ -0,0 +1,74 @@
+"""Single-process deployment: the services run inside the gateway.
+
+With ``GATEWAY_MODE=monolith`` the auth, events and todos FastAPI apps are
+imported into the gateway process and the service clients reach them through
+``httpx.ASGITransport``: the same requests, middlewares and error handling as
+over the network, without sockets or a second event loop. All of them share
+the one ``shared.database`` engine. ``ASGITransport`` collects a response
+before returning it, so exports are no longer streamed in this mode.
+
+Every service is a package named ``app``, like the gateway itself, so each is
+imported with the other ``app`` modules moved out of ``sys.modules`` and put
+back afterwards. The service modules stay alive through the objects that use
+them; only ``import app...`` done at request time would find the gateway's.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+# Client name -> service directory under the Backend directory.
+SERVICES = {"auth": "auth-service", "events": "events-service", "todos": "todos-service"}
+
+DEFAULT_SERVICES_DIR = Path(__file__).resolve().parents[2]
+
+
+def _is_app_module(name: str) -> bool:
+    return name == "app" or name.startswith("app.")
+
+
+def load_service_app(service_dir: Path) -> FastAPI:
+    """Import ``app.main`` of the service in ``service_dir`` and return its FastAPI app."""
+
+    if not (service_dir / "app" / "main.py").is_file():
+        raise RuntimeError(f"No service found in {service_dir}")
+    ours = {name: module for name, module in sys.modules.items() if _is_app_module(name)}
+    for name in ours:
+        del sys.modules[name]
+    sys.path.insert(0, str(service_dir))
+    try:
+        return importlib.import_module("app.main").app
+    finally:
+        sys.path.remove(str(service_dir))
+        for name in [name for name in sys.modules if _is_app_module(name)]:
+            del sys.modules[name]
+        sys.modules.update(ours)
+
+
+class Monolith:
+    """The service apps of this process and a transport to each of them."""
+
+    def __init__(self, services_dir: Path = DEFAULT_SERVICES_DIR):
+        self.apps = {
+            name: load_service_app(services_dir / directory) for name, directory in SERVICES.items()
+        }
+        # Services answer their own errors with 500 responses, as over HTTP.
+        self.transports = {
+            name: httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            for name, app in self.apps.items()
+        }
+
+    @asynccontextmanager
+    async def lifespan(self):
+        """Run the services' startup and shutdown around the gateway's own."""
+
+        async with AsyncExitStack() as stack:
+            for app in self.apps.values():
+                await stack.enter_async_context(app.router.lifespan_context(app))
+            yield
@@ -0,0 +1 @@
+"""Real-time change push to connected clients."""
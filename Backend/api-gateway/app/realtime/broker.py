@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PATTERN = "changes:*"
+
+
+class TooManyConnectionsError(Exception):
+    """Raised when the worker already serves the maximum number of streams."""
+
+
+class Subscription:
+    """Bounded per-connection queue; a slow consumer is told to resync instead of growing it."""
+
+    RESYNC = {"type": "resync"}
+
+    def __init__(self, broker: ChangeBroker, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self._broker = broker
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, message: dict[str, Any]) -> None:
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(self.RESYNC)
+
+    async def get(self) -> dict[str, Any]:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class ChangeBroker:
+    """Routes change notifications to the subscriptions of this worker."""
+
+    def __init__(self, max_connections: int, queue_size: int):
+        self._max_connections = max_connections
+        self._queue_size = queue_size
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+        self._connections = 0
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def subscribe(self, user_id: int) -> Subscription:
+        if self._connections >= self._max_connections:
+            raise TooManyConnectionsError("Слишком много подключений")
+        subscription = Subscription(self, user_id, self._queue_size)
+        self._subscriptions[user_id].add(subscription)
+        self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.remove(subscription)
+            self._connections -= 1
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def dispatch(self, user_id: int, message: dict[str, Any]) -> None:
+        for subscription in list(self._subscriptions.get(user_id, ())):
+            subscription.offer(message)
+
+    async def start(self) -> None:
+        """Start receiving notifications."""
+
+    async def stop(self) -> None:
+        """Stop receiving notifications."""
+
+
+class InMemoryBroker(ChangeBroker):
+    """Receives notifications published in this process (single-node and local runs)."""
+
+    def __init__(self, max_connections: int, queue_size: int):
+        super().__init__(max_connections, queue_size)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._hub = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        try:
+            from shared.notifications import hub
+        except ImportError:
+            logger.info("shared.notifications is unavailable; in-memory broker only relays local publishes")
+            return
+        self._hub = hub
+        hub.add_listener(self._on_publish)
+
+    async def stop(self) -> None:
+        if self._hub is not None:
+            self._hub.remove_listener(self._on_publish)
+
+    def _on_publish(self, user_id: int, message: dict[str, Any]) -> None:
+        # Publishers run in request threads; hop onto the event loop.
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.dispatch, user_id, message)
+
+
+class RedisBroker(ChangeBroker):
+    """Receives notifications from Redis pub/sub with one subscription per worker."""
+
+    def __init__(self, url: str, max_connections: int, queue_size: int):
+        super().__init__(max_connections, queue_size)
+        self._url = url
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _listen(self) -> None:
+        import redis.asyncio as redis
+
+        delay = 1.0
+        while True:
+            client = redis.Redis.from_url(self._url)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(CHANNEL_PATTERN)
+                delay = 1.0
+                async for raw in pubsub.listen():
+                    self._handle(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Redis change subscription lost, retrying in %.0fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                await pubsub.close()
+                await client.close()
+
+    def _handle(self, raw: dict[str, Any]) -> None:
+        if raw.get("type") != "pmessage":
+            return
+        try:
+            channel = raw["channel"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            user_id = int(channel.rsplit(":", 1)[1])
+            message = json.loads(raw["data"])
+        except (KeyError, ValueError, IndexError):
+            logger.warning("Ignoring malformed change notification: %r", raw)
+            return
+        self.dispatch(user_id, message)
+
+
+def create_broker(settings) -> ChangeBroker:
+    backend = settings.change_broker or ("redis" if settings.redis_url else "memory")
+    if backend == "redis" and settings.redis_url:
+        return RedisBroker(
+            settings.redis_url, settings.stream_max_connections, settings.stream_queue_size
+        )
+    return InMemoryBroker(settings.stream_max_connections, settings.stream_queue_size)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from app.realtime.broker import Subscription
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# Last messages of a stream whose credentials ran out; the client gets a new ticket.
+EXPIRED = {"type": "expired"}
+REVOKED = {"type": "revoked"}
+
+
+async def event_stream(
+    subscription: Subscription,
+    heartbeat_interval: float,
+    expires_at: float | None = None,
+    recheck: Callable[[], Awaitable[bool]] | None = None,
+    recheck_interval: float = 15.0,
+) -> AsyncIterator[str]:
+    """Server-Sent Events for one subscription, with comment heartbeats while idle.
+
+    The stream ends with ``event: expired`` at ``expires_at`` (Unix time, when
+    the access token runs out) and with ``event: revoked`` as soon as
+    ``recheck``, awaited every ``recheck_interval`` seconds, returns False.
+    """
+
+    next_check = time.monotonic() + recheck_interval
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            timeout = heartbeat_interval
+            if expires_at is not None:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    yield _format(EXPIRED)
+                    return
+                timeout = min(timeout, remaining)
+            if recheck is not None:
+                until_check = next_check - time.monotonic()
+                if until_check <= 0:
+                    if not await recheck():
+                        yield _format(REVOKED)
+                        return
+                    next_check = time.monotonic() + recheck_interval
+                    continue
+                timeout = min(timeout, until_check)
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield _format(message)
+            if message is Subscription.RESYNC:
+                return
+    finally:
+        subscription.close()
+
+
+def _format(message: dict[str, Any]) -> str:
+    event = message.get("type", "change")
+    return f"event: {event}\ndata: {json.dumps(message, ensure_ascii=False)}\n\n"
@@ -1 +1,7 @@
-from app.main import app
+import os
+import sys
+
+BASE_DIR = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(BASE_DIR, ".."))
+
+from app.main import app  # noqa: E402,F401
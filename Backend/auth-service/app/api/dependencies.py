@@ -1,14 +1,23 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.orm import Session
 
 from shared.database import get_db
 
+from app.repositories.token_repository import RevokedTokenRepository
 from app.repositories.user_repository import UserRepository
 from app.services.auth_service import AuthService
+from app.services.password_pool import PasswordHasherPool
 
 
-def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+def get_password_pool(request: Request) -> PasswordHasherPool:
+    return request.app.state.password_pool
+
+
+def get_auth_service(
+    db: Session = Depends(get_db),
+    passwords: PasswordHasherPool = Depends(get_password_pool),
+) -> AuthService:
     """Provide an AuthService instance for request handling."""
     repository = UserRepository(db)
-    return AuthService(repository)
+    return AuthService(repository, passwords, RevokedTokenRepository(db))
 
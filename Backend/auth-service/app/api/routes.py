@@ -3,7 +3,11 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.api.dependencies import get_auth_service
 from app.domain.schemas import (
+    LogoutRequest,
     MessageResponse,
+    StreamGrant,
+    StreamTicket,
+    StreamTicketCheck,
     TokenPair,
     UserLoginRequest,
     UserRegisterRequest,
@@ -12,6 +16,7 @@ from app.domain.schemas import (
 from app.services.auth_service import AuthService
 from app.services.errors import (
     DuplicateUserError,
+    HashingOverloadedError,
     InactiveUserError,
     InvalidCredentialsError,
     TokenValidationError,
@@ -27,27 +32,31 @@ def health_check() -> dict[str, str]:
 
 
 @router.post("/register", response_model=UserResponse)
-def register_user(
+async def register_user(
     payload: UserRegisterRequest,
     auth_service: AuthService = Depends(get_auth_service),
 ):
     try:
-        return auth_service.register(payload)
+        return await auth_service.register(payload)
     except DuplicateUserError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except HashingOverloadedError as exc:
+        raise _overloaded(exc) from exc
 
 
 @router.post("/login", response_model=TokenPair)
-def login_user(
+async def login_user(
     payload: UserLoginRequest,
     auth_service: AuthService = Depends(get_auth_service),
 ):
     try:
-        return auth_service.login(payload)
+        return await auth_service.login(payload)
     except InvalidCredentialsError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
     except InactiveUserError as exc:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc)) from exc
+    except HashingOverloadedError as exc:
+        raise _overloaded(exc) from exc
 
 
 @router.post("/refresh", response_model=TokenPair)
@@ -75,6 +84,64 @@ def get_current_user(
 
 
 @router.post("/logout", response_model=MessageResponse)
-def logout() -> MessageResponse:
-    return MessageResponse(message="Успешно вышли. Удалите токены на клиенте.")
+def logout(
+    payload: LogoutRequest | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: AuthService = Depends(get_auth_service),
+) -> MessageResponse:
+    try:
+        auth_service.logout(credentials.credentials, payload.refresh_token if payload else None)
+    except TokenValidationError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
+    except InactiveUserError as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc)) from exc
+    return MessageResponse(message="Успешно вышли")
+
+
+@router.post("/logout/all", response_model=MessageResponse)
+def logout_everywhere(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: AuthService = Depends(get_auth_service),
+) -> MessageResponse:
+    try:
+        auth_service.logout_everywhere(credentials.credentials)
+    except TokenValidationError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
+    except InactiveUserError as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc)) from exc
+    return MessageResponse(message="Все сессии завершены")
+
+
+@router.post("/stream-ticket", response_model=StreamTicket)
+def create_stream_ticket(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: AuthService = Depends(get_auth_service),
+):
+    try:
+        return auth_service.issue_stream_ticket(credentials.credentials)
+    except TokenValidationError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
+    except InactiveUserError as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc)) from exc
+
+
+@router.post("/stream-ticket/check", response_model=StreamGrant)
+def check_stream_ticket(
+    payload: StreamTicketCheck,
+    auth_service: AuthService = Depends(get_auth_service),
+):
+    # Called by the gateway only; the ticket travels in the body, not the URL.
+    try:
+        return auth_service.check_stream_ticket(payload.ticket, payload.renewal)
+    except TokenValidationError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
+    except InactiveUserError as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc)) from exc
+
 
+def _overloaded(exc: HashingOverloadedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "1"},
+    )
@@ -1,4 +1,7 @@
+import os
 from functools import lru_cache
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -7,6 +10,14 @@ class Settings(BaseModel):
 
     environment: str = Field(default="development", alias="ENVIRONMENT")
     debug: bool = Field(default=True, alias="DEBUG")
+    # Password hashing runs on a process pool; 0 workers means one per CPU.
+    bcrypt_workers: int = Field(default=0, alias="BCRYPT_WORKERS")
+    bcrypt_queue_size: int = Field(default=64, alias="BCRYPT_QUEUE_SIZE")
+    # Fixed cost; when unset the cost is calibrated at startup to the target latency.
+    bcrypt_rounds: Optional[int] = Field(default=None, alias="BCRYPT_ROUNDS")
+    bcrypt_target_ms: float = Field(default=250.0, alias="BCRYPT_TARGET_MS")
+    bcrypt_min_rounds: int = Field(default=10, alias="BCRYPT_MIN_ROUNDS")
+    bcrypt_max_rounds: int = Field(default=14, alias="BCRYPT_MAX_ROUNDS")
 
     class Config:
         populate_by_name = True
@@ -15,5 +26,5 @@ class Settings(BaseModel):
 @lru_cache
 def get_settings() -> Settings:
     """Return cached settings instance."""
-    return Settings()
+    return Settings.model_validate(dict(os.environ))
 
@@ -1,4 +1,6 @@
 from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr, ConfigDict
 
 
@@ -19,6 +21,11 @@ class TokenPair(BaseModel):
     token_type: str = "bearer"
 
 
+class LogoutRequest(BaseModel):
+    # Revoked together with the access token when given.
+    refresh_token: Optional[str] = None
+
+
 class UserResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -32,3 +39,22 @@ class UserResponse(BaseModel):
 class MessageResponse(BaseModel):
     message: str
 
+
+class StreamTicket(BaseModel):
+    ticket: str
+    expires_in: int
+
+
+class StreamTicketCheck(BaseModel):
+    ticket: str
+    # False when opening a stream with a ticket from the client, True on re-checks.
+    renewal: bool = False
+
+
+class StreamGrant(BaseModel):
+    user_id: int
+    # Unix time when the access token behind the ticket expires.
+    token_expires_at: int
+    # Renewal ticket for the next check of the same stream; never sent to clients.
+    ticket: str
+
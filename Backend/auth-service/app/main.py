@@ -1,24 +1,74 @@
+import os
+from contextlib import asynccontextmanager
+from typing import Any
+
 from fastapi import FastAPI
-from sqlalchemy.exc import IntegrityError
 
-from shared.database import engine
-from shared.models import Base
+from shared.auth_utils import JWTHandler
+from shared.database import dispose_engine, init_database
+from shared.memory import MemoryTrackingMiddleware, process_stats, request_peaks
+from shared.memory import router as memory_router
+from shared.profiling import ProfilingMiddleware
+from shared.profiling import router as profiling_router
+# Also registers the session hooks that invalidate cached principals on user changes.
+from shared.security import check_principal_broadcast
+from shared.timing import ServerTimingMiddleware
+from shared.tracing import TracingMiddleware, configure_tracing, tracer
 
 from app.api.routes import router as auth_router
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.services.password_pool import PasswordHasherPool, calibrate_rounds
+
+
+def create_password_pool(settings: Settings) -> PasswordHasherPool:
+    rounds = settings.bcrypt_rounds or calibrate_rounds(
+        settings.bcrypt_target_ms, settings.bcrypt_min_rounds, settings.bcrypt_max_rounds
+    )
+    return PasswordHasherPool(
+        workers=settings.bcrypt_workers or os.cpu_count() or 1,
+        queue_size=settings.bcrypt_queue_size,
+        rounds=rounds,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database or the JWT keys at import time; both are
+    # prepared here so the first request does not pay for them.
+    init_database()
+    JWTHandler.backend()
+    check_principal_broadcast()
+    pool = create_password_pool(get_settings())
+    await pool.start()
+    app.state.password_pool = pool
+    try:
+        yield
+    finally:
+        pool.shutdown()
+        dispose_engine()
+        tracer.shutdown()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title="Auth Service", version="2.0.0", debug=settings.debug)
+    configure_tracing("auth-service")
+    app = FastAPI(title="Auth Service", version="2.0.0", debug=settings.debug, lifespan=lifespan)
+    app.add_middleware(MemoryTrackingMiddleware)
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(TracingMiddleware)
 
-    try:
-        Base.metadata.create_all(bind=engine)
-    except IntegrityError as exc:
-        if "pg_type_typname_nsp_index" not in str(exc):
-            raise
+    @app.get("/metrics", tags=["Health"])
+    def metrics() -> dict[str, dict[str, Any]]:
+        return {
+            "process": process_stats(),
+            "request_memory": request_peaks.stats(),
+            "jwt_cache": JWTHandler.cache_stats(),
+        }
 
     app.include_router(auth_router)
+    app.include_router(profiling_router)
+    app.include_router(memory_router)
     return app
 
 
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from shared.database import insert_on_conflict
+from shared.models import RevokedToken
+from shared.revocation import RevocationList, revocation_list
+from shared.tracing import traced_methods
+
+
+@traced_methods("RevokedTokenRepository")
+class RevokedTokenRepository:
+    """Stores revoked token ids and checks tokens against them."""
+
+    def __init__(self, session: Session, revoked: RevocationList = revocation_list):
+        self._session = session
+        self._revoked = revoked
+
+    def is_revoked(self, jti: str | None) -> bool:
+        return self._revoked.is_revoked(jti, self._session)
+
+    def revoke(self, tokens: list[tuple[str, int, datetime]]) -> None:
+        """Revoke ``(jti, user_id, expires_at)`` entries; already revoked ones are ignored."""
+
+        now = datetime.utcnow()
+        # Rows past their expiry protect nothing, the token is rejected anyway.
+        self._session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        for jti, user_id, expires_at in tokens:
+            if self._session.get(RevokedToken, jti) is None:
+                self._session.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        try:
+            self._session.commit()
+        except IntegrityError:
+            # A concurrent logout revoked the same token first.
+            self._session.rollback()
+        for jti, _, _ in tokens:
+            self._revoked.add(jti)
+
+    def consume(self, jti: str, user_id: int, expires_at: datetime) -> bool:
+        """Mark a single-use token as spent; ``False`` when it already was."""
+
+        values = {"jti": jti, "user_id": user_id, "expires_at": expires_at}
+        first_use = insert_on_conflict(self._session, RevokedToken, values)
+        self._session.commit()
+        return first_use
@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 
+from shared import sharding
 from shared.models import User
+from shared.tracing import traced_methods
 
 
+@traced_methods("UserRepository")
 class UserRepository:
     """Encapsulates data access for user entities."""
 
@@ -10,18 +13,37 @@ class UserRepository:
         self._session = session
 
     def get_by_email(self, email: str) -> User | None:
+        if sharding.users_colocated():
+            user_id = sharding.find_user(self._session, email=email)
+            return self.get_by_id(user_id) if user_id is not None else None
         return self._session.query(User).filter(User.email == email).first()
 
     def get_by_username(self, username: str) -> User | None:
+        if sharding.users_colocated():
+            user_id = sharding.find_user(self._session, username=username)
+            return self.get_by_id(user_id) if user_id is not None else None
         return self._session.query(User).filter(User.username == username).first()
 
     def get_by_id(self, user_id: int) -> User | None:
+        if sharding.users_colocated():
+            sharding.bind_user(self._session, user_id)
         return self._session.query(User).filter(User.id == user_id).first()
 
     def create_user(self, email: str, username: str, hashed_password: str) -> User:
         user = User(email=email, username=username, hashed_password=hashed_password)
+        if sharding.users_colocated():
+            user.id = sharding.register_user(self._session, email, username)
         self._session.add(user)
         self._session.commit()
         self._session.refresh(user)
         return user
 
+    def update_password(self, user: User, hashed_password: str) -> User:
+        user.hashed_password = hashed_password
+        self._session.commit()
+        return user
+
+    def bump_token_generation(self, user: User) -> User:
+        user.token_generation = User.token_generation + 1
+        self._session.commit()
+        return user
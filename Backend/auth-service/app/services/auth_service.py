@@ -1,13 +1,19 @@
-from datetime import datetime
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
 
-from shared.auth_utils import JWTHandler, PasswordHandler
+from shared.auth_utils import JWTHandler
 from shared.models import User
 
 from app.domain.schemas import (
+    StreamGrant,
+    StreamTicket,
     TokenPair,
     UserLoginRequest,
     UserRegisterRequest,
 )
+from app.repositories.token_repository import RevokedTokenRepository
 from app.repositories.user_repository import UserRepository
 from app.services.errors import (
     DuplicateUserError,
@@ -15,48 +21,156 @@ from app.services.errors import (
     InvalidCredentialsError,
     TokenValidationError,
 )
+from app.services.password_pool import PasswordHasherPool
+
+# Seconds a change stream ticket can be redeemed (or renewed) for.
+STREAM_TICKET_TTL = int(os.getenv("STREAM_TICKET_TTL", "30"))
 
 
 class AuthService:
     """Contains the core authentication use cases."""
 
-    def __init__(self, repository: UserRepository):
+    def __init__(
+        self,
+        repository: UserRepository,
+        passwords: PasswordHasherPool,
+        tokens: RevokedTokenRepository,
+    ):
         self._repository = repository
+        self._passwords = passwords
+        self._tokens = tokens
 
-    def register(self, payload: UserRegisterRequest) -> User:
-        if self._repository.get_by_email(payload.email) or self._repository.get_by_username(
-            payload.username
-        ):
+    async def register(self, payload: UserRegisterRequest) -> User:
+        if await asyncio.to_thread(self._is_taken, payload.email, payload.username):
             raise DuplicateUserError("Email или username уже зарегистрирован")
 
-        hashed_password = PasswordHandler.hash_password(payload.password)
-        return self._repository.create_user(payload.email, payload.username, hashed_password)
+        hashed_password = await self._passwords.hash(payload.password)
+        return await asyncio.to_thread(
+            self._repository.create_user, payload.email, payload.username, hashed_password
+        )
 
-    def login(self, payload: UserLoginRequest) -> TokenPair:
-        user = self._repository.get_by_email(payload.email)
-        if not user or not PasswordHandler.verify_password(payload.password, user.hashed_password):
+    async def login(self, payload: UserLoginRequest) -> TokenPair:
+        user = await asyncio.to_thread(self._repository.get_by_email, payload.email)
+        if not user or not await self._passwords.verify(payload.password, user.hashed_password):
             raise InvalidCredentialsError("Неверные учётные данные")
 
         if not user.is_active:
             raise InactiveUserError("Пользователь неактивен")
 
+        if self._passwords.needs_rehash(user.hashed_password):
+            # Upgrade hashes made with an older cost while the plain password is at hand.
+            hashed_password = await self._passwords.hash(payload.password)
+            await asyncio.to_thread(self._repository.update_password, user, hashed_password)
+
         return self._issue_tokens(user)
 
     def refresh_tokens(self, token: str) -> TokenPair:
-        user = self._resolve_user_from_token(token)
+        user, _ = self._resolve_user_from_token(token)
         return self._issue_tokens(user, refresh_override=token)
 
     def get_current_user(self, token: str) -> User:
-        return self._resolve_user_from_token(token)
+        return self._resolve_user_from_token(token)[0]
+
+    def logout(self, access_token: str, refresh_token: str | None = None) -> None:
+        """Revoke the presented access token and, if given, the matching refresh token."""
+
+        user, payload = self._resolve_user_from_token(access_token)
+        revoked = [payload]
+        if refresh_token:
+            refresh_user, refresh_payload = self._resolve_user_from_token(refresh_token)
+            if refresh_user.id != user.id:
+                raise TokenValidationError("Токен принадлежит другому пользователю")
+            revoked.append(refresh_payload)
+        self._tokens.revoke(
+            [
+                (item["jti"], user.id, datetime.utcfromtimestamp(item["exp"]))
+                for item in revoked
+                if item.get("jti")
+            ]
+        )
+
+    def logout_everywhere(self, token: str) -> None:
+        """Invalidate every token issued to the user so far."""
+
+        user, _ = self._resolve_user_from_token(token)
+        self._repository.bump_token_generation(user)
+
+    def issue_stream_ticket(self, access_token: str) -> StreamTicket:
+        """Short-lived ticket that opens the change stream instead of the access token.
+
+        EventSource cannot send headers, and a token in the URL ends up in
+        access logs; a ticket there is useless half a minute later.
+        """
+
+        user, payload = self._resolve_user_from_token(access_token)
+        ticket = self._stream_ticket(user.id, payload)
+        return StreamTicket(ticket=ticket, expires_in=STREAM_TICKET_TTL)
+
+    def check_stream_ticket(self, ticket: str, renewal: bool = False) -> StreamGrant:
+        """Validate a stream ticket and the access token it was issued for.
+
+        A ticket from ``issue_stream_ticket`` opens one stream: it is spent on
+        first use, so a copy left in an access log is worthless. The grant
+        carries a renewal ticket the gateway keeps to itself for its periodic
+        checks (``renewal=True``). Every check repeats the token's revocation,
+        generation and user checks, and no ticket outlives the token.
+        """
+
+        try:
+            claims = JWTHandler.verify_token(ticket)
+            user_id = int(claims["stream_uid"])
+            if bool(claims.get("stream_renewal")) != renewal:
+                raise ValueError("wrong kind of stream ticket")
+            expires_at = datetime.utcfromtimestamp(claims["exp"])
+            token = {
+                "jti": claims.get("token_jti"),
+                "gen": claims["gen"],
+                "exp": claims["token_exp"],
+            }
+        except Exception as exc:
+            raise TokenValidationError("Невалидный тикет") from exc
+
+        user = self._check_user(user_id, token)
+        if not renewal and not self._tokens.consume(claims["jti"], user.id, expires_at):
+            raise TokenValidationError("Тикет уже использован")
+        return StreamGrant(
+            user_id=user.id,
+            token_expires_at=int(token["exp"]),
+            ticket=self._stream_ticket(user.id, token, renewal=True),
+        )
+
+    def _stream_ticket(self, user_id: int, token: dict, renewal: bool = False) -> str:
+        # No "sub": a ticket is never accepted where an access token is expected.
+        lifetime = min(STREAM_TICKET_TTL, token["exp"] - time.time())
+        if lifetime <= 0:
+            raise TokenValidationError("Токен истёк")
+        return JWTHandler.create_access_token(
+            {
+                "stream_uid": user_id,
+                "stream_renewal": renewal,
+                "gen": token.get("gen", 0),
+                "token_jti": token.get("jti"),
+                "token_exp": int(token["exp"]),
+            },
+            expires_delta=timedelta(seconds=lifetime),
+        )
+
+    def _is_taken(self, email: str, username: str) -> bool:
+        return bool(
+            self._repository.get_by_email(email) or self._repository.get_by_username(username)
+        )
 
     def _issue_tokens(self, user: User, refresh_override: str | None = None) -> TokenPair:
+        generation = user.token_generation or 0
         access_token = JWTHandler.create_access_token(
-            {"sub": str(user.id), "email": user.email, "iat": datetime.utcnow().timestamp()}
+            {"sub": str(user.id), "email": user.email, "gen": generation}
+        )
+        refresh_token = refresh_override or JWTHandler.create_refresh_token(
+            {"sub": str(user.id), "gen": generation}
         )
-        refresh_token = refresh_override or JWTHandler.create_refresh_token({"sub": str(user.id)})
         return TokenPair(access_token=access_token, refresh_token=refresh_token)
 
-    def _resolve_user_from_token(self, token: str) -> User:
+    def _resolve_user_from_token(self, token: str) -> tuple[User, dict]:
         try:
             payload = JWTHandler.verify_token(token)
             raw_user_id = payload.get("sub")
@@ -64,6 +178,14 @@ class AuthService:
         except Exception as exc:
             raise TokenValidationError("Невалидный токен") from exc
 
+        return self._check_user(user_id, payload), payload
+
+    def _check_user(self, user_id: int, payload: dict) -> User:
+        """The token's user, unless the token was revoked or the user disabled."""
+
+        if self._tokens.is_revoked(payload.get("jti")):
+            raise TokenValidationError("Токен отозван")
+
         user = self._repository.get_by_id(user_id)
         if not user:
             raise TokenValidationError("Пользователь не найден")
@@ -71,5 +193,7 @@ class AuthService:
         if not user.is_active:
             raise InactiveUserError("Пользователь неактивен")
 
-        return user
+        if payload.get("gen", 0) < (user.token_generation or 0):
+            raise TokenValidationError("Токен отозван")
 
+        return user
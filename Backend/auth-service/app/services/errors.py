@@ -17,3 +17,6 @@ class InactiveUserError(AuthServiceError):
 class TokenValidationError(AuthServiceError):
     """Raised when decoding or validating a JWT fails."""
 
+
+class HashingOverloadedError(AuthServiceError):
+    """Raised when the password hashing queue is full."""
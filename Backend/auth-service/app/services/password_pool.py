@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from shared.passwords import hash_password, verify_password, warm_up
+
+from app.services.errors import HashingOverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+def hash_rounds(hashed_password: str) -> int | None:
+    """Cost factor of a ``$2b$12$...`` hash, or ``None`` if it is not bcrypt."""
+
+    parts = hashed_password.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """Highest cost whose hash time stays within ``target_ms`` on this machine.
+
+    One hash is timed at ``min_rounds``; each extra round doubles the work.
+    """
+
+    started = time.perf_counter()
+    hash_password("calibration", min_rounds)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+class PasswordHasherPool:
+    """Runs bcrypt on a dedicated process pool with bounded admission.
+
+    At most ``workers + queue_size`` operations are accepted at a time;
+    beyond that callers get :class:`HashingOverloadedError` immediately
+    instead of queueing behind a login storm.
+    """
+
+    def __init__(self, workers: int, queue_size: int, rounds: int):
+        self.rounds = rounds
+        self._workers = workers
+        self._capacity = workers + queue_size
+        self._in_flight = 0
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, warm_up) for _ in range(self._workers))
+        )
+        logger.info("Password pool ready: %d worker(s), bcrypt cost %d", self._workers, self.rounds)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        rounds = hash_rounds(hashed_password)
+        return rounds is None or rounds < self.rounds
+
+    async def _submit(self, func, *args):
+        if self._in_flight >= self._capacity:
+            raise HashingOverloadedError("Сервис перегружен, повторите попытку позже")
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._in_flight -= 1
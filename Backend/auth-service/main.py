@@ -1 +1,14 @@
+import os
+
 from app.main import app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # SERVICE_SOCKET=/run/calendar/auth.sock: listen on a unix socket instead of TCP.
+    socket_path = os.getenv("SERVICE_SOCKET")
+    if socket_path:
+        uvicorn.run(app, uds=socket_path)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
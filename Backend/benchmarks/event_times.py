@@ -0,0 +1,211 @@
+"""Checks how event times with a UTC offset are stored, through the gateway.
+
+Clients send ISO times with an offset (the frontend sends ``toISOString()``
+values ending in ``Z``), while ``UNTIL``, ``EXDATE`` and list windows are
+naive UTC. Creates and updates recurring events with offset starts and an
+``UNTIL`` rule and checks that they are accepted, stored as naive UTC and
+expanded at the right times. Then checks that a reminder is due the lead
+time before the stored start, and that edits which leave start, lead and
+recurrence alone do not bring back a reminder that already fired. Any
+mismatch fails the run; request timings are printed.
+
+Run from the Backend directory (SQLite in a temp directory unless a URL is
+given):
+
+    python benchmarks/event_times.py
+    python benchmarks/event_times.py --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", help="DATABASE_URL; an empty database is expected")
+    return parser.parse_args()
+
+
+def configure(args: argparse.Namespace, directory: str) -> None:
+    # Everything reads its settings at import time.
+    os.environ.update(
+        DATABASE_URL=args.database_url or f"sqlite:///{os.path.join(directory, 'events.db')}",
+        DB_CREATE_SCHEMA="true",
+        GATEWAY_MODE="monolith",
+    )
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("BCRYPT_WORKERS", "1")
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, os.path.join(BACKEND_DIR, "api-gateway"))
+
+
+async def sign_up(client) -> dict[str, str]:
+    credentials = {"email": "times@example.com", "password": "password123"}
+    response = await client.post("/api/auth/register", json={**credentials, "username": "times"})
+    response.raise_for_status()
+    response = await client.post("/api/auth/login", json=credentials)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def check_series(client, headers: dict[str, str], problems: list[str], timings: list[float]):
+    weekly = "FREQ=WEEKLY;UNTIL=20300527T235959Z"
+    began = time.perf_counter()
+    response = await client.post(
+        "/api/events",
+        json={
+            "title": "Планёрка",
+            "start_time": "2030-05-06T09:00:00+03:00",
+            "end_time": "2030-05-06T10:00:00+03:00",
+            "recurrence_rule": weekly,
+        },
+        headers=headers,
+    )
+    timings.append((time.perf_counter() - began) * 1000)
+    if response.status_code != 201:
+        problems.append(f"create with offset start and UNTIL gave {response.status_code}")
+        return
+    event = response.json()
+    if (event["start_time"], event["end_time"]) != ("2030-05-06T06:00:00", "2030-05-06T07:00:00"):
+        problems.append(f"created event stored as {event['start_time']} - {event['end_time']}")
+
+    began = time.perf_counter()
+    response = await client.put(
+        f"/api/events/{event['id']}",
+        json={
+            "start_time": "2030-05-07T07:30:00Z",
+            "end_time": "2030-05-07T08:30:00Z",
+            "recurrence_rule": "FREQ=DAILY;UNTIL=20300510T073000Z",
+        },
+        headers=headers,
+    )
+    timings.append((time.perf_counter() - began) * 1000)
+    if response.status_code != 200:
+        problems.append(f"update with offset start and UNTIL gave {response.status_code}")
+        return
+    if response.json()["start_time"] != "2030-05-07T07:30:00":
+        problems.append(f"updated event stored as {response.json()['start_time']}")
+
+    # A start edit alone keeps the stored naive rule and end; mixing them must not fail.
+    response = await client.put(
+        f"/api/events/{event['id']}",
+        json={"start_time": "2030-05-07T09:00:00+02:00"},
+        headers=headers,
+    )
+    if response.status_code != 200:
+        problems.append(f"start-only update with an offset gave {response.status_code}")
+
+    response = await client.get(
+        "/api/events",
+        params={"from": "2030-05-01T00:00:00+03:00", "to": "2030-06-01T00:00:00+03:00"},
+        headers=headers,
+    )
+    response.raise_for_status()
+    starts = [item["start_time"] for item in response.json()]
+    expected = [f"2030-05-{day:02d}T07:00:00" for day in range(7, 11)]
+    if starts != expected:
+        problems.append(f"series expands to {starts}, expected {expected}")
+
+
+def stored_reminder(event_id: int):
+    from shared.database import get_engine
+    from shared.models import Event
+
+    with get_engine().connect() as conn:
+        query = Event.__table__.select().where(Event.id == event_id)
+        return conn.execute(query).one().reminder_at
+
+
+def mark_fired(event_id: int) -> None:
+    # What the reminder worker's claim leaves behind for a one-off event.
+    from shared.database import get_engine
+    from shared.models import Event
+
+    with get_engine().begin() as conn:
+        conn.execute(Event.__table__.update().where(Event.id == event_id).values(reminder_at=None))
+
+
+async def check_reminders(
+    client, headers: dict[str, str], problems: list[str], timings: list[float]
+) -> None:
+    start = datetime.now(timezone(timedelta(hours=3))).replace(microsecond=0) + timedelta(days=2)
+    event = {
+        "title": "Созвон",
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(hours=1)).isoformat(),
+        "reminder_enabled": True,
+        "reminder_time": 15,
+    }
+    began = time.perf_counter()
+    response = await client.post("/api/events", json=event, headers=headers)
+    timings.append((time.perf_counter() - began) * 1000)
+    response.raise_for_status()
+    event_id = response.json()["id"]
+    utc_start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if stored_reminder(event_id) != utc_start - timedelta(minutes=15):
+        problems.append(f"reminder at {stored_reminder(event_id)} for a start at {utc_start} UTC")
+
+    mark_fired(event_id)
+    edits = (
+        ("title-only edit", {"title": "Созвон (перенесён в другую комнату)"}),
+        # Forms send every field back, start time included, as toISOString().
+        ("full-form edit", {**event, "start_time": f"{utc_start.isoformat()}Z"}),
+    )
+    for name, payload in edits:
+        began = time.perf_counter()
+        response = await client.put(f"/api/events/{event_id}", json=payload, headers=headers)
+        timings.append((time.perf_counter() - began) * 1000)
+        response.raise_for_status()
+        if stored_reminder(event_id) is not None:
+            problems.append(f"{name} re-armed a fired reminder at {stored_reminder(event_id)}")
+
+    path = f"/api/events/{event_id}"
+    response = await client.put(path, json={"reminder_time": 30}, headers=headers)
+    response.raise_for_status()
+    if stored_reminder(event_id) != utc_start - timedelta(minutes=30):
+        problems.append(f"changed lead time gave a reminder at {stored_reminder(event_id)}")
+
+
+async def run() -> list[str]:
+    import httpx
+
+    from app.main import app
+
+    problems: list[str] = []
+    timings: list[float] = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            headers = await sign_up(client)
+            await check_series(client, headers, problems, timings)
+            await check_reminders(client, headers, problems, timings)
+
+    if timings:
+        print(f"create/update p50 {statistics.median(timings):.1f} ms over {len(timings)} requests")
+    return problems
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="event-times-") as directory:
+        configure(args, directory)
+        problems = asyncio.run(run())
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
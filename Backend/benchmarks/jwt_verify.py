@@ -0,0 +1,93 @@
+"""Micro-benchmark of JWT signing and verification backends.
+
+Run from the Backend directory:
+
+    python benchmarks/jwt_verify.py --iterations 20000
+
+Reports microseconds per operation for every backend/algorithm pair, plus
+``JWTHandler.verify_token`` with a warm verified-token cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa  # noqa: E402
+
+from shared.auth_utils import JWTHandler, create_backend, load_keys  # noqa: E402
+
+ALGORITHMS = ("HS256", "RS256", "EdDSA")
+
+
+def _private_pem(algorithm: str) -> str | None:
+    if algorithm == "RS256":
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        return None
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def _per_op_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def run(iterations: int) -> list[tuple[str, str, float, float]]:
+    payload = {
+        "sub": "42",
+        "email": "user@example.com",
+        "gen": 0,
+        "jti": "0" * 32,
+        "exp": datetime.utcnow() + timedelta(hours=1),
+    }
+    results = []
+    for algorithm in ALGORITHMS:
+        keys = load_keys(algorithm, "benchmark-secret", _private_pem(algorithm))
+        for name in ("jose", "pyjwt"):
+            try:
+                backend = create_backend(name, algorithm, *keys)
+            except ValueError:
+                continue
+            token = backend.encode(payload)
+            assert backend.decode(token)["sub"] == "42"
+            encode_us = _per_op_us(lambda: backend.encode(payload), iterations)
+            decode_us = _per_op_us(lambda: backend.decode(token), iterations)
+            results.append((name, algorithm, encode_us, decode_us))
+    return results
+
+
+def run_cached(iterations: int) -> float:
+    token = JWTHandler.create_access_token({"sub": "42"})
+    JWTHandler.verify_token(token)
+    return _per_op_us(lambda: JWTHandler.verify_token(token), iterations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'alg':<6} {'encode, us':>11} {'verify, us':>11}")
+    for name, algorithm, encode_us, decode_us in run(args.iterations):
+        print(f"{name:<8} {algorithm:<6} {encode_us:>11.1f} {decode_us:>11.1f}")
+    cached_us = run_cached(args.iterations)
+    print(f"verify_token with warm cache ({JWTHandler.BACKEND}): {cached_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Checks and times the lean list path of events-service and todos-service.
+
+For a generated dataset the bytes produced by ``shared.serialization`` must
+equal what FastAPI renders for ``list[EventResponse]`` / ``list[TodoResponse]``
+from ORM objects; any difference fails the run. Then both paths are timed.
+
+CI runs it on every change to Backend (``.github/workflows/backend-checks.yml``).
+Run from the Backend directory (SQLite in a temp file unless DATABASE_URL is set):
+
+    python benchmarks/list_serialization.py --rows 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND_DIR)
+if "DATABASE_URL" not in os.environ:
+    # Removed with the directory when the interpreter exits.
+    _DATABASE_DIR = tempfile.TemporaryDirectory(prefix="bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATABASE_DIR.name, 'bench.db')}"
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from shared.database import SessionLocal, engine  # noqa: E402
+from shared.models import Base, Event, Todo, User  # noqa: E402
+from shared.serialization import encode_rows  # noqa: E402
+
+# Values that tend to expose encoder differences.
+TITLES = ("Встреча", 'Quote " and \\ slash', "tab\tnew\nline", "emoji 📅", "ctrl \x01\x1f", "")
+
+
+def load_service(name: str):
+    """Import ``<name>/app`` as ``app``; every service package has that name."""
+
+    for module in [key for key in sys.modules if key == "app" or key.startswith("app.")]:
+        del sys.modules[module]
+    sys.path.insert(0, os.path.join(BACKEND_DIR, name))
+    try:
+        return importlib.import_module("app.domain.schemas")
+    finally:
+        sys.path.pop(0)
+
+
+def seed(rows: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    user = User(email="bench@example.com", username="bench", hashed_password="x")
+    session.add(user)
+    session.flush()
+    base = datetime(2024, 1, 1, 9, 0, 0, 123456)
+    for index in range(rows):
+        start = base + timedelta(hours=index, microseconds=index % 3)
+        session.add(
+            Event(
+                user_id=user.id,
+                title=TITLES[index % len(TITLES)] + str(index),
+                description=None if index % 2 else TITLES[(index + 1) % len(TITLES)],
+                start_time=start,
+                end_time=start + timedelta(minutes=30),
+                reminder_enabled=bool(index % 2),
+                tags="a,b" if index % 3 else None,
+                recurrence_rule="FREQ=WEEKLY;COUNT=5" if index % 50 == 0 else None,
+                created_at=base,
+                updated_at=start,
+            )
+        )
+        session.add(
+            Todo(
+                user_id=user.id,
+                title=TITLES[index % len(TITLES)] + str(index),
+                completed=bool(index % 2),
+                due_date=None if index % 4 else start,
+                created_at=base,
+                updated_at=start,
+            )
+        )
+    session.commit()
+    user_id = user.id
+    session.close()
+    return user_id
+
+
+def reference_body(model, objects) -> bytes:
+    """What FastAPI 0.104 renders for ``response_model=list[model]``."""
+
+    adapter = TypeAdapter(list[model])
+    return JSONResponse(adapter.dump_python(adapter.validate_python(objects), mode="json")).body
+
+
+def timed(func, repeat: int) -> tuple[float, bytes]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = func()
+    return (time.perf_counter() - started) / repeat * 1000, body
+
+
+def compare(label: str, model_path, lean_path, repeat: int) -> bool:
+    model_ms, expected = timed(model_path, repeat)
+    lean_ms, actual = timed(lean_path, repeat)
+    identical = expected == actual
+    print(
+        f"{label:<18} models {model_ms:8.1f} ms  lean {lean_ms:8.1f} ms  "
+        f"x{model_ms / lean_ms:4.1f}  {'identical' if identical else 'MISMATCH'}"
+    )
+    return identical
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    user_id = seed(args.rows)
+    session = SessionLocal()
+    ok = True
+
+    schemas = load_service("events-service")
+    from app.repositories.event_repository import EventRepository
+    from app.services.event_service import RESPONSE_FIELDS as EVENT_FIELDS, EventService
+
+    service = EventService(EventRepository(session))
+    window = (datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+    def orm_events():
+        session.expunge_all()
+        events = session.query(Event).filter(Event.user_id == user_id).order_by(Event.start_time)
+        return reference_body(schemas.EventResponse, events.all())
+
+    def orm_window():
+        session.expunge_all()
+        # The windowed path mixes rows and expanded occurrences; the reference
+        # validates exactly the same items through the model.
+        return reference_body(schemas.EventResponse, service.list_events(user_id, *window))
+
+    ok &= compare(
+        "events",
+        orm_events,
+        lambda: encode_rows(service.list_events(user_id), EVENT_FIELDS),
+        args.repeat,
+    )
+    ok &= compare(
+        "events (window)",
+        orm_window,
+        lambda: encode_rows(service.list_events(user_id, *window), EVENT_FIELDS),
+        args.repeat,
+    )
+
+    schemas = load_service("todos-service")
+    from app.repositories.todo_repository import TodoRepository
+    from app.services.todo_service import RESPONSE_FIELDS as TODO_FIELDS, TodoService
+
+    todo_service = TodoService(TodoRepository(session))
+
+    def orm_todos():
+        session.expunge_all()
+        todos = session.query(Todo).filter(Todo.user_id == user_id).all()
+        return reference_body(schemas.TodoResponse, todos)
+
+    ok &= compare(
+        "todos",
+        orm_todos,
+        lambda: encode_rows(todo_service.list_todos(user_id), TODO_FIELDS),
+        args.repeat,
+    )
+    session.close()
+    if not ok:
+        sys.exit("lean list output differs from the response models")
+
+
+if __name__ == "__main__":
+    main()
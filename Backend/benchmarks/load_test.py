@@ -0,0 +1,282 @@
+"""Open-loop load test of the API gateway.
+
+Synthetic users are registered (if missing) and logged in through
+``/api/auth/login``, then requests of a weighted mix arrive as a Poisson
+process at ``--rate`` per second for ``--duration`` seconds, regardless of
+how fast the stack answers. At most ``--concurrency`` requests are in flight;
+the rest wait, and their latency is measured from the moment they were due to
+start, so a slow server shows up in the percentiles instead of lowering the
+offered load.
+
+Needs only a running stack (``docker compose up`` or the services started
+locally against Postgres). From the Backend directory:
+
+    python benchmarks/load_test.py --rate 50 --duration 60 --output run.json
+    python benchmarks/load_test.py --rate 50 --duration 60 --compare run.json
+
+The JSON report holds the run settings and, per operation and in total, the
+request count, error count, throughput and p50/p95/p99/max latency in ms.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any
+
+import httpx
+
+PASSWORD = "load-test-password"
+
+# Relative weights of the operations; roughly what the calendar UI sends.
+MIX = {
+    "month_view": 35,
+    "list_todos": 15,
+    "me": 10,
+    "create_event": 10,
+    "update_event": 8,
+    "delete_event": 4,
+    "create_todo": 8,
+    "update_todo": 6,
+    "delete_todo": 4,
+}
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    headers: dict[str, str] = field(default_factory=dict)
+    event_ids: list[int] = field(default_factory=list)
+    todo_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class Sample:
+    operation: str
+    status: int
+    latency_ms: float
+
+
+async def _post_with_retry(client: httpx.AsyncClient, path: str, payload: dict) -> httpx.Response:
+    # auth-service answers 503 + Retry-After while its bcrypt queue is full.
+    while True:
+        response = await client.post(path, json=payload)
+        if response.status_code != 503:
+            return response
+        await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+
+
+async def sign_in(client: httpx.AsyncClient, index: int, run_id: str) -> VirtualUser:
+    user = VirtualUser(email=f"load-{run_id}-{index}@example.com")
+    credentials = {"email": user.email, "password": PASSWORD}
+    response = await _post_with_retry(client, "/api/auth/login", credentials)
+    if response.status_code != 200:
+        await _post_with_retry(
+            client,
+            "/api/auth/register",
+            {**credentials, "username": f"load-{run_id}-{index}"},
+        )
+        response = await _post_with_retry(client, "/api/auth/login", credentials)
+    response.raise_for_status()
+    user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return user
+
+
+def _event_payload(rng: random.Random) -> dict[str, Any]:
+    start = datetime.combine(date.today(), datetime.min.time()) + timedelta(
+        days=rng.randint(0, 27), hours=rng.randint(8, 18)
+    )
+    return {
+        "title": f"Встреча {rng.randint(1, 10_000)}",
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=rng.choice((30, 60, 90)))).isoformat(),
+    }
+
+
+async def perform(
+    operation: str, client: httpx.AsyncClient, user: VirtualUser, rng: random.Random
+) -> httpx.Response:
+    """Send one request of ``operation``; id-based operations create an object first if needed."""
+
+    headers = user.headers
+    if operation in ("update_event", "delete_event") and not user.event_ids:
+        operation = "create_event"
+    if operation in ("update_todo", "delete_todo") and not user.todo_ids:
+        operation = "create_todo"
+
+    if operation == "month_view":
+        first = datetime.combine(date.today().replace(day=1), datetime.min.time())
+        params = {"from": first.isoformat(), "to": (first + timedelta(days=31)).isoformat()}
+        return await client.get("/api/events", params=params, headers=headers)
+    if operation == "list_todos":
+        return await client.get("/api/todos", headers=headers)
+    if operation == "me":
+        return await client.get("/api/auth/me", headers=headers)
+    if operation == "create_event":
+        response = await client.post("/api/events", json=_event_payload(rng), headers=headers)
+        if response.status_code == 201:
+            user.event_ids.append(response.json()["id"])
+        return response
+    if operation == "update_event":
+        event_id = rng.choice(user.event_ids)
+        payload = {"title": f"Перенесено {rng.randint(1, 10_000)}"}
+        return await client.put(f"/api/events/{event_id}", json=payload, headers=headers)
+    if operation == "delete_event":
+        event_id = user.event_ids.pop(rng.randrange(len(user.event_ids)))
+        return await client.delete(f"/api/events/{event_id}", headers=headers)
+    if operation == "create_todo":
+        payload = {"title": f"Задача {rng.randint(1, 10_000)}"}
+        response = await client.post("/api/todos", json=payload, headers=headers)
+        if response.status_code == 201:
+            user.todo_ids.append(response.json()["id"])
+        return response
+    if operation == "update_todo":
+        todo_id = rng.choice(user.todo_ids)
+        payload = {"completed": rng.random() < 0.5}
+        return await client.put(f"/api/todos/{todo_id}", json=payload, headers=headers)
+    if operation == "delete_todo":
+        todo_id = user.todo_ids.pop(rng.randrange(len(user.todo_ids)))
+        return await client.delete(f"/api/todos/{todo_id}", headers=headers)
+    raise ValueError(f"unknown operation {operation!r}")
+
+
+async def run_load(args: argparse.Namespace) -> tuple[list[Sample], float]:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        run_id = args.run_id or str(args.seed)
+        users = await asyncio.gather(*(sign_in(client, i, run_id) for i in range(args.users)))
+
+        operations = list(MIX)
+        weights = [MIX[name] for name in operations]
+        in_flight = asyncio.Semaphore(args.concurrency)
+        samples: list[Sample] = []
+
+        async def request(operation: str, user: VirtualUser, due: float, record: bool) -> None:
+            async with in_flight:
+                try:
+                    response = await perform(operation, client, user, rng)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+            if record:
+                samples.append(Sample(operation, status, (time.perf_counter() - due) * 1000))
+
+        tasks = []
+        started = time.perf_counter()
+        measured_from = started + args.warmup
+        deadline = measured_from + args.duration
+        due = started
+        while due < deadline:
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            operation = rng.choices(operations, weights)[0]
+            tasks.append(
+                asyncio.create_task(
+                    request(operation, rng.choice(users), due, record=due >= measured_from)
+                )
+            )
+            due += rng.expovariate(args.rate)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - measured_from
+    return samples, elapsed
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict[str, dict[str, float]]:
+    groups: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        groups[sample.operation].append(sample)
+        groups["total"].append(sample)
+
+    summary = {}
+    for operation, group in sorted(groups.items()):
+        latencies = sorted(sample.latency_ms for sample in group)
+        summary[operation] = {
+            "requests": len(group),
+            "errors": sum(1 for sample in group if not 200 <= sample.status < 400),
+            "throughput_rps": round(len(group) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    return summary
+
+
+def print_summary(summary: dict[str, dict[str, float]], baseline: dict | None) -> None:
+    print(
+        f"{'operation':<14} {'req':>6} {'err':>5} {'rps':>8} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    )
+    for operation, row in summary.items():
+        line = (
+            f"{operation:<14} {row['requests']:>6} {row['errors']:>5} {row['throughput_rps']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+        previous = (baseline or {}).get(operation)
+        if previous and previous["p95_ms"]:
+            change = (row["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"  p95 {change:+.0f}%"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=20.0, help="arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds first")
+    parser.add_argument("--concurrency", type=int, default=100, help="max requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--run-id", help="suffix of the synthetic user emails")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare p95 with")
+    args = parser.parse_args()
+
+    samples, elapsed = asyncio.run(run_load(args))
+    summary = summarize(samples, elapsed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as report_file:
+            baseline = json.load(report_file)["operations"]
+    print_summary(summary, baseline)
+
+    if args.output:
+        report = {
+            "started_at": datetime.utcnow().isoformat(),
+            "settings": {
+                key: getattr(args, key)
+                for key in ("base_url", "users", "rate", "duration", "warmup", "concurrency", "seed")
+            },
+            "mix": MIX,
+            "operations": summary,
+        }
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2, ensure_ascii=False)
+    if not samples:
+        sys.exit("no requests were measured")
+
+
+if __name__ == "__main__":
+    main()
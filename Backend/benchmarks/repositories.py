@@ -0,0 +1,340 @@
+"""Repository and service timings against generated accounts of growing size.
+
+For every ``--sizes`` entry the tables are recreated and filled with that
+many events (and ``--todo-ratio`` as many todos) spread over ``--users``
+users with a Zipf-like skew, so one account is much larger than the median
+one. On PostgreSQL the rows are loaded with ``COPY`` into a separate schema
+(``--schema``, dropped at the end), so the application's tables are never
+touched. On SQLite plain ``executemany`` is used. Then each operation is
+timed for the largest and the median account:
+
+* ``EventRepository.list_for_user`` and ``TodoRepository.list_for_user``;
+* ``EventService.list_events`` for a one-month window;
+* ``EventService.update_event`` (one row, including the commit);
+* ``resolve_user_from_token`` with a cold and a warm principal cache.
+
+Reports the median latency and rows per second. With ``--baseline`` the run is
+compared to a report saved earlier with ``--output``, and the script exits
+non-zero when any median is more than ``--threshold`` (and ``--floor-ms``)
+slower. From the Backend directory:
+
+    python benchmarks/repositories.py --sizes 1000,10000 --output base.json
+    python benchmarks/repositories.py --sizes 1000,10000 --baseline base.json
+    DATABASE_URL=postgresql://... python benchmarks/repositories.py --sizes 100000,10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND_DIR)
+if "DATABASE_URL" not in os.environ:
+    # Removed with the directory when the interpreter exits.
+    _DATABASE_DIR = tempfile.TemporaryDirectory(prefix="bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATABASE_DIR.name, 'bench.db')}"
+
+from sqlalchemy import create_engine, insert, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from shared.auth_utils import JWTHandler  # noqa: E402
+from shared.models import Base, Event, Todo, User  # noqa: E402
+from shared.security import PrincipalCache, resolve_user_from_token  # noqa: E402
+
+BASE_TIME = datetime(2024, 1, 1, 8, 0, 0)
+SPAN_DAYS = 730
+MONTH = (datetime(2024, 6, 1), datetime(2024, 7, 1))
+CHUNK_ROWS = 50_000
+
+EVENT_COLUMNS = (
+    "user_id", "title", "description", "start_time", "end_time", "color", "source",
+    "reminder_enabled", "reminder_time", "reminder_type", "tags", "recurrence_rule",
+    "recurrence_end", "created_at", "updated_at",
+)
+TODO_COLUMNS = (
+    "user_id", "title", "completed", "priority", "category", "due_date", "created_at",
+    "updated_at",
+)
+COLORS = ("#3b82f6", "#ef4444", "#10b981", "#f59e0b")
+
+
+def load_service(name: str):
+    """Import ``<name>/app`` as ``app``; every service package has that name."""
+
+    for module in [key for key in sys.modules if key == "app" or key.startswith("app.")]:
+        del sys.modules[module]
+    sys.path.insert(0, os.path.join(BACKEND_DIR, name))
+    try:
+        return importlib.import_module("app.domain.schemas")
+    finally:
+        sys.path.pop(0)
+
+
+def account_sizes(total: int, users: int, skew: float) -> list[int]:
+    """Split ``total`` rows over ``users`` with weights ``1 / rank ** skew``."""
+
+    weights = [1 / (rank ** skew) for rank in range(1, users + 1)]
+    scale = total / sum(weights)
+    sizes = [int(weight * scale) for weight in weights]
+    sizes[0] += total - sum(sizes)
+    return sizes
+
+
+def event_rows(sizes: list[int], rng: random.Random):
+    for user_id, count in enumerate(sizes, start=1):
+        for index in range(count):
+            start = BASE_TIME + timedelta(
+                days=rng.randrange(SPAN_DAYS), minutes=15 * rng.randrange(40)
+            )
+            end = start + timedelta(minutes=rng.choice((30, 60, 90)))
+            # About one event in a hundred is a weekly series of ten.
+            recurring = index % 100 == 0
+            yield (
+                user_id,
+                f"Событие {index}",
+                None if index % 3 else "Описание события",
+                start,
+                end,
+                COLORS[index % len(COLORS)],
+                "local",
+                index % 2 == 0,
+                15,
+                "notification",
+                "work,team" if index % 5 == 0 else None,
+                "FREQ=WEEKLY;COUNT=10" if recurring else None,
+                start + timedelta(weeks=10) if recurring else None,
+                start,
+                start,
+            )
+
+
+def todo_rows(sizes: list[int], rng: random.Random):
+    for user_id, count in enumerate(sizes, start=1):
+        for index in range(count):
+            created = BASE_TIME + timedelta(days=rng.randrange(SPAN_DAYS))
+            yield (
+                user_id,
+                f"Задача {index}",
+                index % 3 == 0,
+                ("low", "medium", "high")[index % 3],
+                ("day", "week", "general")[index % 3],
+                created + timedelta(days=7) if index % 2 else None,
+                created,
+                created,
+            )
+
+
+def _chunks(rows, size: int = CHUNK_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_load(engine, table, columns: tuple[str, ...], rows) -> None:
+    if engine.dialect.name == "postgresql":
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+            for chunk in _chunks(rows):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+            raw.commit()
+        finally:
+            raw.close()
+        return
+    with engine.begin() as connection:
+        for chunk in _chunks(rows):
+            connection.execute(insert(table), [dict(zip(columns, row)) for row in chunk])
+
+
+def seed(engine, sizes: list[int], todo_ratio: float, seed_value: int) -> float:
+    started = time.perf_counter()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User.__table__),
+            [
+                {
+                    "id": user_id,
+                    "email": f"bench-{user_id}@example.com",
+                    "username": f"bench-{user_id}",
+                    "hashed_password": "x",
+                    "is_active": True,
+                    "created_at": BASE_TIME,
+                    "updated_at": BASE_TIME,
+                }
+                for user_id in range(1, len(sizes) + 1)
+            ],
+        )
+    rng = random.Random(seed_value)
+    bulk_load(engine, Event.__table__, EVENT_COLUMNS, event_rows(sizes, rng))
+    todo_sizes = [int(size * todo_ratio) for size in sizes]
+    bulk_load(engine, Todo.__table__, TODO_COLUMNS, todo_rows(todo_sizes, rng))
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    return time.perf_counter() - started
+
+
+def timed(func, repeat: int) -> tuple[float, int]:
+    """Median milliseconds of ``func`` and the row count of its last result."""
+
+    func()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), rows
+
+
+def operations(session: Session, user_id: int):
+    """``(name, callable returning a row count)`` for one account."""
+
+    load_service("events-service")
+    from app.domain.schemas import EventUpdateRequest
+    from app.repositories.event_repository import EventRepository
+    from app.services.event_service import RESPONSE_FIELDS as EVENT_FIELDS
+    from app.services.event_service import EventService
+
+    events = EventRepository(session)
+    event_service = EventService(events)
+    event_id = session.execute(
+        select(Event.id).where(Event.user_id == user_id).limit(1)
+    ).scalar()
+    update = EventUpdateRequest(title="Перенесено")
+
+    load_service("todos-service")
+    from app.repositories.todo_repository import TodoRepository
+    from app.services.todo_service import RESPONSE_FIELDS as TODO_FIELDS
+
+    todos = TodoRepository(session)
+    token = JWTHandler.create_access_token({"sub": str(user_id)})
+    cold, warm = PrincipalCache(), PrincipalCache()
+
+    def update_event() -> int:
+        event_service.update_event(user_id, event_id, update)
+        session.expunge_all()
+        return 1
+
+    def resolve_cold() -> int:
+        cold.clear()
+        resolve_user_from_token(token, session, cache=cold)
+        return 1
+
+    def resolve_warm() -> int:
+        resolve_user_from_token(token, session, cache=warm)
+        return 1
+
+    return [
+        ("events.list_for_user", lambda: len(events.list_for_user(user_id, EVENT_FIELDS))),
+        ("events.list_month", lambda: len(event_service.list_events(user_id, *MONTH))),
+        *([("events.update_event", update_event)] if event_id is not None else []),
+        ("todos.list_for_user", lambda: len(todos.list_for_user(user_id, TODO_FIELDS))),
+        ("resolve_user.cold", resolve_cold),
+        ("resolve_user.warm", resolve_warm),
+    ]
+
+
+def create_bench_engine(url: str, schema: str):
+    if url.startswith("postgresql"):
+        engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+        with engine.begin() as connection:
+            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+        return engine
+    return create_engine(url)
+
+
+def drop_bench_schema(engine, schema: str) -> None:
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+
+
+def compare(results: dict, baseline: dict, threshold: float, floor_ms: float) -> list[str]:
+    """Operations slower than the baseline by more than ``threshold`` and ``floor_ms``."""
+
+    regressions = []
+    for key, row in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        slower_ms = row["median_ms"] - previous["median_ms"]
+        if slower_ms > floor_ms and slower_ms > previous["median_ms"] * threshold:
+            regressions.append(
+                f"{key}: {previous['median_ms']:.2f} -> {row['median_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000", help="total events per run")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--skew", type=float, default=1.1, help="0 spreads rows evenly")
+    parser.add_argument("--todo-ratio", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--schema", default="bench_repositories", help="PostgreSQL only")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --output")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--floor-ms", type=float, default=0.5, help="ignore smaller slowdowns")
+    args = parser.parse_args()
+
+    engine = create_bench_engine(os.environ["DATABASE_URL"], args.schema)
+    results = {}
+    try:
+        for total in (int(size) for size in args.sizes.split(",")):
+            sizes = account_sizes(total, args.users, args.skew)
+            seconds = seed(engine, sizes, args.todo_ratio, args.seed)
+            print(f"{total} events over {args.users} users seeded in {seconds:.1f} s "
+                  f"({total / seconds:,.0f} rows/s), largest account {sizes[0]}")
+            accounts = {"largest": 1, "median": args.users // 2 + 1}
+            with Session(engine) as session:
+                for account, user_id in accounts.items():
+                    for name, func in operations(session, user_id):
+                        median_ms, rows = timed(func, args.repeat)
+                        key = f"{total}:{account}:{name}"
+                        results[key] = {
+                            "median_ms": round(median_ms, 3),
+                            "rows": rows,
+                            "rows_per_s": round(rows / median_ms * 1000, 1) if median_ms else None,
+                        }
+                        print(f"  {account:<8} {name:<22} {median_ms:9.2f} ms {rows:>9} rows "
+                              f"{rows / median_ms * 1000 if median_ms else 0:>12,.0f} rows/s")
+    finally:
+        drop_bench_schema(engine, args.schema)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            json.dump({"settings": vars(args), "results": results}, report_file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as report_file:
+            baseline = json.load(report_file)["results"]
+        regressions = compare(results, baseline, args.threshold, args.floor_ms)
+        if regressions:
+            sys.exit("Slower than the baseline:\n  " + "\n  ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Checks that ``shared.schema`` upgrades a database created by the first release.
+
+Creates the original ``users``, ``events`` and ``todos`` tables (as they were
+before recurrence, reminders, delta sync and token generations), fills them,
+then runs ``create_schema`` twice and checks that every model column and
+index exists, that existing rows got their defaults and change numbers, and
+that the models can read and write the upgraded tables. Any mismatch fails
+the run; the time of each upgrade pass is printed.
+
+Run from the Backend directory (SQLite in a temp directory unless a URL is
+given):
+
+    python benchmarks/schema_upgrade.py --users 5 --rows 20
+    python benchmarks/schema_upgrade.py --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import (  # noqa: E402
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    inspect,
+)
+
+BASELINE = MetaData()
+Table(
+    "users",
+    BASELINE,
+    Column("id", Integer, primary_key=True),
+    Column("email", String(255), unique=True, nullable=False, index=True),
+    Column("username", String(255), unique=True, nullable=False),
+    Column("hashed_password", String(255), nullable=False),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+Table(
+    "events",
+    BASELINE,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("title", String(255), nullable=False),
+    Column("description", Text),
+    Column("start_time", DateTime, nullable=False),
+    Column("end_time", DateTime, nullable=False),
+    Column("color", String(7)),
+    Column("source", Enum("local", "google", "yandex", name="event_source")),
+    Column("reminder_enabled", Boolean),
+    Column("reminder_time", Integer),
+    Column("reminder_type", Enum("notification", "email", "both", name="reminder_type")),
+    Column("tags", String(255)),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+Table(
+    "todos",
+    BASELINE,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("title", String(255), nullable=False),
+    Column("description", Text),
+    Column("completed", Boolean),
+    Column("priority", Enum("low", "medium", "high", name="todo_priority")),
+    Column("category", Enum("day", "week", "general", name="todo_category")),
+    Column("due_date", DateTime),
+    Column("tags", String(255)),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=5, help="events and todos per user")
+    parser.add_argument("--database-url", help="an empty database is expected")
+    return parser.parse_args()
+
+
+def fill_baseline(engine, users: int, rows: int) -> None:
+    tables = BASELINE.tables
+    now = datetime(2024, 5, 6, 9)
+    with engine.begin() as conn:
+        for user_id in range(1, users + 1):
+            conn.execute(
+                tables["users"].insert(),
+                {
+                    "id": user_id,
+                    "email": f"old-{user_id}@example.com",
+                    "username": f"old-{user_id}",
+                    "hashed_password": "x",
+                    "is_active": True,
+                    "created_at": now,
+                },
+            )
+            conn.execute(
+                tables["events"].insert(),
+                [
+                    {
+                        "user_id": user_id,
+                        "title": f"Встреча {index}",
+                        "start_time": now + timedelta(days=index),
+                        "end_time": now + timedelta(days=index, hours=1),
+                        "source": "local",
+                        "reminder_type": "notification",
+                    }
+                    for index in range(rows)
+                ],
+            )
+            conn.execute(
+                tables["todos"].insert(),
+                [
+                    {"user_id": user_id, "title": f"Задача {index}", "priority": "medium"}
+                    for index in range(rows)
+                ],
+            )
+
+
+def check_schema(engine, problems: list[str]) -> None:
+    from shared.models import Base
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            problems.append(f"table {table.name} missing")
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for name in sorted(set(table.columns.keys()) - columns):
+            problems.append(f"column {table.name}.{name} missing")
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for name in sorted({index.name for index in table.indexes} - indexes):
+            problems.append(f"index {name} on {table.name} missing")
+
+
+def check_rows(engine, users: int, rows: int, problems: list[str]) -> None:
+    from sqlalchemy.orm import Session
+
+    from shared.models import Event, Todo, User
+
+    with Session(bind=engine) as session:
+        generations = {user.token_generation for user in session.query(User)}
+        if generations != {0}:
+            problems.append(f"existing users have token_generation {sorted(generations)}")
+        for model in (Event, Todo):
+            for user_id in range(1, users + 1):
+                numbers = [
+                    seq
+                    for (seq,) in session.query(model.sync_seq)
+                    .filter(model.user_id == user_id)
+                    .order_by(model.id)
+                ]
+                if numbers != list(range(1, rows + 1)):
+                    problems.append(f"{model.__tablename__} of user {user_id}: sync_seq {numbers}")
+
+        # The upgraded tables take rows using the new columns.
+        start = datetime(2024, 6, 3, 9)
+        session.add(
+            Event(
+                user_id=1,
+                title="Серия",
+                start_time=start,
+                end_time=start + timedelta(hours=1),
+                recurrence_rule="FREQ=WEEKLY;COUNT=3",
+                recurrence_end=start + timedelta(weeks=2, hours=1),
+                reminder_enabled=True,
+                reminder_at=start - timedelta(minutes=15),
+            )
+        )
+        session.commit()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="schema-upgrade-") as directory:
+        url = args.database_url or f"sqlite:///{os.path.join(directory, 'upgrade.db')}"
+        os.environ["DATABASE_URL"] = url
+        os.environ.pop("SHARD_URLS", None)
+        engine = create_engine(url)
+        BASELINE.create_all(bind=engine)
+        fill_baseline(engine, args.users, args.rows)
+
+        from shared.schema import create_schema
+
+        problems: list[str] = []
+        for attempt in ("first", "second"):
+            began = time.perf_counter()
+            try:
+                create_schema(engine)
+            except Exception as exc:
+                problems.append(f"{attempt} upgrade pass failed: {exc!r}")
+                break
+            print(f"{attempt} upgrade pass {(time.perf_counter() - began) * 1000:.1f} ms")
+        else:
+            check_schema(engine, problems)
+            check_rows(engine, args.users, args.rows, problems)
+        engine.dispose()
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Checks user-id sharding end to end through the gateway in monolith mode.
+
+Registers users, creates events and todos for each through the API, then
+checks that every user's rows are on ``hashed_shard(user_id)`` and nowhere
+else, that ``users`` rows are where ``SHARD_USERS`` puts them, and that a
+user moved with ``move_user`` still sees the same data from the new shard
+while the old one keeps nothing of theirs, and that a token revoked on logout
+is refused by every service. Any mismatch fails the run; the
+spread of users over the shards and request timings are printed.
+
+Run from the Backend directory (SQLite files in a temp directory unless
+URLs are given):
+
+    python benchmarks/sharding.py --shards 4 --users 40
+    python benchmarks/sharding.py --users-placement colocated
+    python benchmarks/sharding.py --global-url postgresql://... \\
+        --shard-url postgresql://.../s0 --shard-url postgresql://.../s1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shards", type=int, default=3, help="SQLite shards when no --shard-url")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=3, help="events and todos per user")
+    parser.add_argument("--users-placement", choices=("global", "colocated"), default="global")
+    parser.add_argument("--global-url", help="DATABASE_URL; empty databases are expected")
+    parser.add_argument("--shard-url", action="append", default=[], help="repeat for every shard")
+    return parser.parse_args()
+
+
+def configure(args: argparse.Namespace, directory: str) -> None:
+    # Everything reads its settings at import time.
+    shard_urls = args.shard_url or [
+        f"sqlite:///{os.path.join(directory, f'shard{index}.db')}" for index in range(args.shards)
+    ]
+    os.environ.update(
+        DATABASE_URL=args.global_url or f"sqlite:///{os.path.join(directory, 'global.db')}",
+        SHARD_URLS=",".join(shard_urls),
+        SHARD_USERS=args.users_placement,
+        DB_CREATE_SCHEMA="true",
+        GATEWAY_MODE="monolith",
+    )
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("BCRYPT_WORKERS", "1")
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, os.path.join(BACKEND_DIR, "api-gateway"))
+
+
+async def sign_up(client, index: int) -> tuple[int, dict[str, str]]:
+    credentials = {"email": f"shard-{index}@example.com", "password": "password123"}
+    response = await client.post(
+        "/api/auth/register", json={**credentials, "username": f"shard-{index}"}
+    )
+    response.raise_for_status()
+    response = await client.post("/api/auth/login", json=credentials)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.get("/api/auth/me", headers=headers)
+    response.raise_for_status()
+    return response.json()["id"], headers
+
+
+async def fill(client, headers: dict[str, str], rows: int, timings: list[float]) -> None:
+    start = datetime(2024, 5, 6, 9)
+    for index in range(rows):
+        event = {
+            "title": f"Встреча {index}",
+            "start_time": (start + timedelta(days=index)).isoformat(),
+            "end_time": (start + timedelta(days=index, hours=1)).isoformat(),
+        }
+        todo = {"title": f"Задача {index}"}
+        for path, payload in (("/api/events", event), ("/api/todos", todo)):
+            began = time.perf_counter()
+            response = await client.post(path, json=payload, headers=headers)
+            timings.append((time.perf_counter() - began) * 1000)
+            response.raise_for_status()
+
+
+async def listing(client, headers: dict[str, str]) -> tuple[list[str], list[str]]:
+    events = await client.get("/api/events", headers=headers)
+    todos = await client.get("/api/todos", headers=headers)
+    events.raise_for_status()
+    todos.raise_for_status()
+    return sorted(item["title"] for item in events.json()), sorted(
+        item["title"] for item in todos.json()
+    )
+
+
+def placement(user_ids: list[int]) -> dict[int, dict[str, int]]:
+    """``{user_id: {shard: rows}}`` of users, events and todos, read from every shard."""
+
+    from sqlalchemy import func, select
+
+    from shared import sharding
+
+    tables = [
+        table for table in sharding.shard_tables() if table.name in ("users", "events", "todos")
+    ]
+    found: dict[int, dict[str, int]] = {}
+    for index in range(sharding.shard_count()):
+        with sharding.get_shard_engine(index).connect() as conn:
+            for table in tables:
+                column = table.c.id if table.name == "users" else table.c.user_id
+                rows = conn.execute(
+                    select(column, func.count()).where(column.in_(user_ids)).group_by(column)
+                ).all()
+                for user_id, count in rows:
+                    found.setdefault(user_id, {}).setdefault(index, 0)
+                    found[user_id][index] += count
+    return found
+
+
+def check_placement(user_ids: list[int], problems: list[str]) -> Counter:
+    from sqlalchemy import inspect, select
+
+    from shared import sharding
+    from shared.database import get_engine
+    from shared.models import User
+
+    found = placement(user_ids)
+    spread: Counter = Counter()
+    for user_id in user_ids:
+        expected = sharding.hashed_shard(user_id)
+        shards = set(found.get(user_id, {}))
+        spread[expected] += 1
+        if shards != {expected}:
+            problems.append(f"user {user_id}: rows on shards {sorted(shards)}, expected {expected}")
+
+    with get_engine().connect() as conn:
+        global_users = set()
+        if inspect(conn).has_table(User.__tablename__):
+            query = select(User.id).where(User.id.in_(user_ids))
+            global_users = set(conn.execute(query).scalars())
+    if sharding.users_colocated() and global_users:
+        problems.append(f"{len(global_users)} users rows on the global database")
+    if not sharding.users_colocated() and global_users != set(user_ids):
+        missing = len(set(user_ids) - global_users)
+        problems.append(f"{missing} users rows missing from the global database")
+    return spread
+
+
+async def run(args: argparse.Namespace) -> list[str]:
+    import httpx
+
+    from shared import sharding
+
+    from app.main import app
+
+    problems: list[str] = []
+    timings: list[float] = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            users = [await sign_up(client, index) for index in range(args.users)]
+            for _, headers in users:
+                await fill(client, headers, args.rows, timings)
+            before = {user_id: await listing(client, headers) for user_id, headers in users}
+            for user_id, (events, todos) in before.items():
+                if len(events) != args.rows or len(todos) != args.rows:
+                    listed = f"{len(events)} events, {len(todos)} todos"
+                    problems.append(f"user {user_id} lists {listed}")
+
+            user_ids = [user_id for user_id, _ in users]
+            spread = check_placement(user_ids, problems)
+
+            moved_id, moved_headers = users[0]
+            source = sharding.hashed_shard(moved_id)
+            target = (source + 1) % sharding.shard_count()
+            began = time.perf_counter()
+            copied = sharding.move_user(moved_id, target)
+            move_ms = (time.perf_counter() - began) * 1000
+            if await listing(client, moved_headers) != before[moved_id]:
+                problems.append(f"user {moved_id} lists different data after the move")
+            where = placement([moved_id]).get(moved_id, {})
+            if set(where) != {target}:
+                problems.append(f"moved user {moved_id} has rows on shards {sorted(where)}")
+            response = await client.get("/api/auth/me", headers=moved_headers)
+            if response.status_code != 200:
+                problems.append(f"moved user {moved_id}: /api/auth/me gave {response.status_code}")
+
+            # Revocations are on the global database, per-user rows on the shard.
+            _, revoked_headers = users[-1]
+            response = await client.post("/api/auth/logout", headers=revoked_headers)
+            response.raise_for_status()
+            for path in ("/api/events", "/api/todos", "/api/auth/me"):
+                response = await client.get(path, headers=revoked_headers)
+                if response.status_code != 401:
+                    problems.append(f"revoked token: {path} gave {response.status_code}")
+
+    print(f"{sharding.shard_count()} shards, users {args.users_placement}")
+    per_shard = ", ".join(f"{index}: {spread[index]}" for index in range(sharding.shard_count()))
+    print(f"users per shard: {per_shard}")
+    print(
+        f"create p50 {statistics.median(timings):.1f} ms, "
+        f"max {max(timings):.1f} ms over {len(timings)} requests"
+    )
+    print(f"moved user {moved_id} {source} -> {target} in {move_ms:.1f} ms: {copied}")
+    return problems
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="shards-") as directory:
+        configure(args, directory)
+        problems = asyncio.run(run(args))
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Cold-start profile of every service, with a time budget.
+
+For each service a fresh interpreter is started twice:
+
+* ``python -X importtime -c "import main"``: total import time and the
+  modules with the largest self time (cumulative times only show the chain
+  ``main -> fastapi -> ...``);
+* import + lifespan startup + the first ``GET /health``, timed from the
+  parent process, so interpreter startup is included.
+
+Most of that is the interpreter plus importing FastAPI and SQLAlchemy, which
+no service can avoid and which depends heavily on the machine (1.3-1.9 s on
+the slow container the baseline was taken on). So a bare interpreter
+importing just those is timed next to every service run, and the budget
+applies to what a service adds on top: its own imports, lifespan and first
+request, the median of ``--runs`` pairs. Baseline on that container: 190 ms
+(gateway) to 410 ms (auth) over the framework.
+
+Exits with a non-zero status if any service adds more than ``--budget-ms``.
+Run from the Backend directory:
+
+    python benchmarks/startup.py --budget-ms 600 --top 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVICES = ("api-gateway", "auth-service", "events-service", "todos-service")
+
+FIRST_REQUEST = """
+from fastapi.testclient import TestClient
+import main
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+"""
+# What every service imports before any of its own code.
+FRAMEWORK_ONLY = """
+from fastapi.testclient import TestClient
+import sqlalchemy.orm
+"""
+
+
+def _env(directory: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(directory, 'startup.db')}")
+    # Keep the auth worker pool small and the hash cost fixed: this measures
+    # start-up, not bcrypt calibration on the benchmark machine.
+    env.setdefault("BCRYPT_WORKERS", "1")
+    env.setdefault("BCRYPT_ROUNDS", "10")
+    env.pop("DB_CREATE_SCHEMA", None)
+    return env
+
+
+def import_profile(service: str, env: dict[str, str]) -> list[tuple[int, int, str]]:
+    """``(self_us, cumulative_us, module)`` for every module imported by ``main``."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=os.path.join(BACKEND_DIR, service),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us), int(cumulative_us), name.strip()))
+    return modules
+
+
+def run_ms(code: str, service: str, env: dict[str, str]) -> float:
+    """Wall time of ``python -c code`` in the service directory."""
+
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.join(BACKEND_DIR, service),
+        env=env,
+        capture_output=True,
+        check=True,
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def first_request_ms(service: str, env: dict[str, str], runs: int) -> tuple[float, float]:
+    """Median ``(time to first response, part of it over the framework)``.
+
+    The framework-only run is repeated next to every service run, so load on
+    the machine that changes during the benchmark mostly cancels out.
+    """
+
+    ready, own = [], []
+    for _ in range(runs):
+        framework_ms = run_ms(FRAMEWORK_ONLY, service, env)
+        ready_ms = run_ms(FIRST_REQUEST, service, env)
+        ready.append(ready_ms)
+        own.append(ready_ms - framework_ms)
+    return statistics.median(ready), statistics.median(own)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget-ms", type=float, default=600.0, help="allowed start-up time over the framework"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="runs per service, median used")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list")
+    parser.add_argument("services", nargs="*", default=SERVICES)
+    args = parser.parse_args()
+
+    over_budget = []
+    with tempfile.TemporaryDirectory(prefix="startup-") as directory:
+        env = _env(directory)
+        # Created up front: services expect it, and creating it is not start-up work.
+        schema = [sys.executable, "-m", "shared.schema"]
+        subprocess.run(schema, cwd=BACKEND_DIR, env=env, capture_output=True, check=True)
+        for service in args.services:
+            modules = import_profile(service, env)
+            total_ms = next(cum for _, cum, name in modules if name == "main") / 1000
+            ready_ms, own_ms = first_request_ms(service, env, args.runs)
+            status = "ok" if own_ms <= args.budget_ms else "OVER BUDGET"
+            print(
+                f"{service}: imports {total_ms:.0f} ms, first response {ready_ms:.0f} ms, "
+                f"{own_ms:.0f} ms over the framework [{status}]"
+            )
+            for self_us, _, name in sorted(modules, reverse=True)[: args.top]:
+                print(f"    {self_us / 1000:8.1f} ms  {name}")
+            if own_ms > args.budget_ms:
+                over_budget.append(service)
+
+    if over_budget:
+        sys.exit(f"Start-up budget of {args.budget_ms:.0f} ms exceeded: {', '.join(over_budget)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-hop latency breakdown of the slowest traces.
+
+Reads spans written with ``TRACE_EXPORTER=file`` (every service may append to
+the same ``TRACE_FILE``, or pass several files) and prints the slowest
+traces as trees: duration and self time of every span, i.e. the part not
+covered by its children. From the Backend directory:
+
+    python benchmarks/trace_breakdown.py traces.jsonl --top 5
+    python benchmarks/trace_breakdown.py traces.jsonl --route "GET /api/events"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import defaultdict
+
+
+def load_traces(paths: list[str]) -> dict[str, list[dict]]:
+    traces: dict[str, list[dict]] = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as trace_file:
+            for line in trace_file:
+                if line.strip():
+                    span = json.loads(line)
+                    traces[span["trace_id"]].append(span)
+    return traces
+
+
+def print_tree(spans: list[dict]) -> None:
+    children: dict[str | None, list[dict]] = defaultdict(list)
+    ids = {span["span_id"] for span in spans}
+    for span in spans:
+        # Spans whose parent was not exported are shown at the top level.
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        children[parent].append(span)
+
+    def walk(span: dict, depth: int) -> None:
+        kids = sorted(children[span["span_id"]], key=lambda item: item["start_ns"])
+        self_ms = span["duration_ms"] - sum(kid["duration_ms"] for kid in kids)
+        label = span["name"]
+        if "db.statement" in span["attributes"]:
+            label = " ".join(span["attributes"]["db.statement"].split())[:70]
+        stages = ", ".join(
+            f"{key[5:-3]} {value:.1f}"
+            for key, value in span["attributes"].items()
+            if key.startswith("http.") and key.endswith("_ms")
+        )
+        print(
+            f"  {span['duration_ms']:9.2f} ms  self {max(self_ms, 0):8.2f}  "
+            f"{'  ' * depth}[{span['service']}] {label}{f'  ({stages})' if stages else ''}"
+        )
+        for kid in kids:
+            walk(kid, depth + 1)
+
+    for root in sorted(children[None], key=lambda item: item["start_ns"]):
+        walk(root, 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--route", help="only traces whose root span has this name")
+    args = parser.parse_args()
+
+    roots = []
+    for spans in load_traces(args.files).values():
+        root = min(spans, key=lambda span: (span["parent_id"] is not None, span["start_ns"]))
+        if args.route is None or root["name"] == args.route:
+            roots.append((root["duration_ms"], root["name"], spans))
+
+    for duration_ms, name, spans in sorted(roots, key=lambda item: -item[0])[: args.top]:
+        print(f"{name}: {duration_ms:.2f} ms, {len(spans)} spans")
+        print_tree(spans)
+        print()
+
+
+if __name__ == "__main__":
+    main()
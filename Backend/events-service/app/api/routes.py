@@ -1,26 +1,81 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+from datetime import date, datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 
 from app.api.dependencies import get_current_user, get_event_service
+from shared.export import MEDIA_TYPES, content_disposition
 from shared.security import AuthContext
+from shared.serialization import InvalidFieldsError, rows_response, select_fields
+from shared.sync import MAX_CHANGES_PAGE, InvalidSyncTokenError, SyncTokenExpiredError
 from app.domain.schemas import (
+    EventChangesResponse,
     EventCreateRequest,
+    EventImportResponse,
     EventResponse,
+    EventSummaryResponse,
     EventUpdateRequest,
 )
-from app.services.event_service import EventService
-from app.services.errors import EventNotFoundError, InvalidEventTimingError
+from app.services.event_service import RESPONSE_FIELDS, EventService
+from app.services.errors import (
+    EventNotFoundError,
+    InvalidEventTimingError,
+    InvalidEventWindowError,
+    InvalidRecurrenceError,
+)
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
 
 @router.get("", response_model=list[EventResponse])
 def list_events(
+    window_start: datetime | None = Query(default=None, alias="from"),
+    window_end: datetime | None = Query(default=None, alias="to"),
+    fields: str | None = Query(default=None, description="Comma-separated subset of fields"),
+    auth: AuthContext = Depends(get_current_user),
+    service: EventService = Depends(get_event_service),
+):
+    try:
+        selected = select_fields(fields, RESPONSE_FIELDS)
+        events = service.list_events(auth.user.id, window_start, window_end, selected)
+    except (InvalidEventWindowError, InvalidFieldsError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # Encoded directly from the rows; response_model only documents the full shape.
+    return rows_response(events, selected)
+
+
+@router.get("/summary", response_model=EventSummaryResponse)
+def summarize_events(
+    start_date: date = Query(alias="from"),
+    end_date: date = Query(alias="to"),
+    tz: str = Query(default="UTC", max_length=64),
+    top: int = Query(default=3, ge=0, le=10),
     auth: AuthContext = Depends(get_current_user),
     service: EventService = Depends(get_event_service),
 ):
-    return service.list_events(auth.user.id)
+    try:
+        return service.summarize_days(auth.user.id, start_date, end_date, tz, top)
+    except InvalidEventWindowError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+@router.get("/changes", response_model=EventChangesResponse)
+def list_event_changes(
+    since: str | None = Query(default=None),
+    limit: int = Query(default=MAX_CHANGES_PAGE, ge=1, le=MAX_CHANGES_PAGE),
+    auth: AuthContext = Depends(get_current_user),
+    service: EventService = Depends(get_event_service),
+):
+    try:
+        return service.list_changes(auth.user.id, since, limit)
+    except InvalidSyncTokenError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except SyncTokenExpiredError as exc:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(exc)) from exc
 
 
 @router.post("", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
@@ -31,10 +86,39 @@ def create_event(
 ):
     try:
         return service.create_event(auth.user.id, payload)
-    except InvalidEventTimingError as exc:
+    except EventNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except (InvalidEventTimingError, InvalidRecurrenceError) as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
+@router.get("/export")
+def export_events(
+    fmt: Literal["ics", "csv", "ndjson"] = Query(default="ics", alias="format"),
+    auth: AuthContext = Depends(get_current_user),
+    service: EventService = Depends(get_event_service),
+):
+    return StreamingResponse(
+        service.export_events(auth.user.id, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": content_disposition("events", fmt)},
+    )
+
+
+@router.post("/import", response_model=EventImportResponse)
+def import_events(
+    file: UploadFile = File(...),
+    auth: AuthContext = Depends(get_current_user),
+    service: EventService = Depends(get_event_service),
+):
+    # The upload is spooled to disk by the framework and read line by line.
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        return service.import_events(auth.user.id, lines).as_dict()
+    finally:
+        lines.detach()
+
+
 @router.get("/{event_id}", response_model=EventResponse)
 def get_event(
     event_id: int,
@@ -58,7 +142,7 @@ def update_event(
         return service.update_event(auth.user.id, event_id, payload)
     except EventNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
-    except InvalidEventTimingError as exc:
+    except (InvalidEventTimingError, InvalidRecurrenceError) as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
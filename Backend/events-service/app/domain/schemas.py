@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date as date_type, datetime
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
@@ -17,6 +17,8 @@ class EventBase(BaseModel):
     reminder_time: Optional[int] = Field(default=15, ge=0)
     reminder_type: Optional[str] = Field(default="notification")
     tags: Optional[str] = None
+    recurrence_rule: Optional[str] = Field(default=None, max_length=255)
+    recurrence_exceptions: Optional[str] = None
 
     @field_validator("end_time")
     @classmethod
@@ -31,6 +33,8 @@ class EventCreateRequest(EventBase):
     title: str
     start_time: datetime
     end_time: datetime
+    recurrence_parent_id: Optional[int] = None
+    recurrence_id: Optional[datetime] = None
 
 
 class EventUpdateRequest(EventBase):
@@ -52,7 +56,37 @@ class EventResponse(BaseModel):
     reminder_time: Optional[int]
     reminder_type: Optional[str]
     tags: Optional[str]
+    recurrence_rule: Optional[str] = None
+    recurrence_exceptions: Optional[str] = None
+    recurrence_parent_id: Optional[int] = None
+    recurrence_id: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
 
+class DaySummary(BaseModel):
+    date: date_type
+    count: int
+    busy_minutes: int
+    colors: list[str]
+    titles: list[str]
+
+
+class EventSummaryResponse(BaseModel):
+    timezone: str
+    days: list[DaySummary]
+
+
+class EventChangesResponse(BaseModel):
+    upserts: list[EventResponse]
+    deleted: list[int]
+    next_token: str
+    has_more: bool
+
+
+class EventImportResponse(BaseModel):
+    processed: int
+    imported: int
+    skipped: int
+    failed: int
+    errors: list[str]
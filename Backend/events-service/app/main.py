@@ -1,28 +1,69 @@
+from contextlib import asynccontextmanager
+from typing import Any
+
 from fastapi import FastAPI
-from sqlalchemy.exc import IntegrityError
 
-from shared.database import engine
-from shared.models import Base
+from shared.auth_utils import JWTHandler
+from shared.database import dispose_engine, init_database
+from shared.notifications import start_change_relay
+from shared.revocation import revocation_list
+from shared.security import principal_cache, start_principal_listener
+from shared.memory import MemoryTrackingMiddleware, process_stats, request_peaks
+from shared.memory import router as memory_router
+from shared.profiling import ProfilingMiddleware
+from shared.profiling import router as profiling_router
+from shared.timing import ServerTimingMiddleware
+from shared.tracing import TracingMiddleware, configure_tracing, tracer
 
 from app.api.routes import router as events_router
 from app.core.config import get_settings
+from app.services.summary_cache import summary_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database or the JWT keys at import time; both are
+    # prepared here so the first request does not pay for them.
+    init_database()
+    JWTHandler.backend()
+    stop_listener = start_principal_listener()
+    stop_relay = start_change_relay()
+    try:
+        yield
+    finally:
+        stop_relay()
+        stop_listener()
+        dispose_engine()
+        tracer.shutdown()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title="Events Service", version="2.0.0", debug=settings.debug)
-
-    try:
-        Base.metadata.create_all(bind=engine)
-    except IntegrityError as exc:
-        if "pg_type_typname_nsp_index" not in str(exc):
-            raise
+    configure_tracing("events-service")
+    app = FastAPI(title="Events Service", version="2.0.0", debug=settings.debug, lifespan=lifespan)
+    app.add_middleware(MemoryTrackingMiddleware)
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(TracingMiddleware)
 
     @app.get("/health", tags=["Health"])
     def health_check() -> dict[str, str]:
         return {"status": "Events Service is running"}
 
+    @app.get("/metrics", tags=["Health"])
+    def metrics() -> dict[str, dict[str, Any]]:
+        return {
+            "process": process_stats(),
+            "request_memory": request_peaks.stats(),
+            "jwt_cache": JWTHandler.cache_stats(),
+            "principal_cache": principal_cache.stats(),
+            "revocation": revocation_list.stats(),
+            "summary_cache": summary_cache.stats(),
+        }
+
     app.include_router(events_router)
+    app.include_router(profiling_router)
+    app.include_router(memory_router)
     return app
 
 
@@ -0,0 +1 @@
+"""Reminder scheduling and dispatch for events service."""
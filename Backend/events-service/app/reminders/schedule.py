@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any
+
+from app.services.recurrence import iter_occurrences, parse_exceptions, parse_rrule
+
+# Upper bound on occurrences inspected when exceptions hide many of them.
+MAX_SCAN = 10000
+
+
+def next_reminder_at(event: Any, after: datetime) -> datetime | None:
+    """Fire time of the first reminder for an occurrence starting after ``after``.
+
+    Reminders whose nominal time has already passed for an upcoming
+    occurrence fire immediately (at ``after``). Returns ``None`` when the
+    reminder is disabled or no occurrence is left.
+    """
+
+    if not event.reminder_enabled or event.reminder_time is None:
+        return None
+    lead = timedelta(minutes=event.reminder_time)
+
+    if not event.recurrence_rule:
+        if event.start_time <= after:
+            return None
+        return max(event.start_time - lead, after)
+
+    rule = parse_rrule(event.recurrence_rule)
+    exceptions = parse_exceptions(event.recurrence_exceptions, event.start_time)
+    for start in islice(iter_occurrences(rule, event.start_time, not_before=after), MAX_SCAN):
+        if start > after and start not in exceptions:
+            return max(start - lead, after)
+    return None
+
+
+def occurrence_start(event: Any, reminder_at: datetime) -> datetime:
+    """Start of the occurrence a stored ``reminder_at`` belongs to.
+
+    ``next_reminder_at`` picks the first occurrence after a point in time and
+    never fires later than it starts, so it is the first remaining occurrence
+    starting at or after the fire time.
+    """
+
+    if not event.recurrence_rule:
+        return event.start_time
+    rule = parse_rrule(event.recurrence_rule)
+    exceptions = parse_exceptions(event.recurrence_exceptions, event.start_time)
+    for start in islice(iter_occurrences(rule, event.start_time, not_before=reminder_at), MAX_SCAN):
+        if start not in exceptions:
+            return start
+    return reminder_at
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+import os
+import smtplib
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Any
+
+from shared.notifications import publish_message
+from shared.outbox import Envelope, OutboxSink
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Reminder:
+    """A reminder that is due for delivery."""
+
+    event_id: int
+    user_id: int
+    title: str
+    start_time: datetime
+    fire_at: datetime
+    reminder_type: str
+    email: str | None = None
+
+    def wants(self, channel: str) -> bool:
+        return self.reminder_type in (channel, "both")
+
+    def to_payload(self) -> dict[str, Any]:
+        payload = asdict(self)
+        payload["start_time"] = self.start_time.isoformat()
+        payload["fire_at"] = self.fire_at.isoformat()
+        return payload
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> Reminder:
+        return cls(
+            **{
+                **payload,
+                "start_time": datetime.fromisoformat(payload["start_time"]),
+                "fire_at": datetime.fromisoformat(payload["fire_at"]),
+            }
+        )
+
+
+def topic_for(channel: str) -> str:
+    return f"reminder.{channel}"
+
+
+class NotificationSink:
+    """In-app notification pushed to the user's live stream."""
+
+    channel = "notification"
+    topic = topic_for(channel)
+
+    def deliver(self, messages: Sequence[Envelope]) -> None:
+        for reminder in map(_reminder, messages):
+            publish_message(
+                reminder.user_id,
+                {
+                    "type": "reminder",
+                    "event_id": reminder.event_id,
+                    "title": reminder.title,
+                    "start_time": reminder.start_time.isoformat(),
+                },
+            )
+
+
+class EmailSink:
+    """E-mail over SMTP; one connection per batch (a local stand-in such as MailHog in dev)."""
+
+    channel = "email"
+    topic = topic_for(channel)
+
+    def __init__(self, host: str, port: int, sender: str):
+        self._host = host
+        self._port = port
+        self._sender = sender
+
+    def deliver(self, messages: Sequence[Envelope]) -> None:
+        recipients = [reminder for reminder in map(_reminder, messages) if reminder.email]
+        if not recipients:
+            return
+        with smtplib.SMTP(self._host, self._port, timeout=10) as smtp:
+            for reminder in recipients:
+                smtp.send_message(self._compose(reminder))
+
+    def _compose(self, reminder: Reminder) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self._sender
+        message["To"] = reminder.email
+        message["Subject"] = f"Напоминание: {reminder.title}"
+        message.set_content(
+            f"Событие «{reminder.title}» начнётся {reminder.start_time:%d.%m.%Y %H:%M} (UTC)."
+        )
+        return message
+
+
+def channels_from_env() -> list[str]:
+    """Reminder channels listed in ``REMINDER_SINKS`` (default ``notification``)."""
+
+    channels = [name.strip() for name in os.getenv("REMINDER_SINKS", "notification").split(",")]
+    for channel in channels:
+        if channel not in ("notification", "email", ""):
+            raise ValueError(f"Unknown reminder sink: {channel}")
+    return [channel for channel in channels if channel]
+
+
+def sinks_from_env() -> list[OutboxSink]:
+    """Build the outbox sinks for :func:`channels_from_env`."""
+
+    sinks: list[OutboxSink] = []
+    for channel in channels_from_env():
+        if channel == "notification":
+            sinks.append(NotificationSink())
+        else:
+            sinks.append(
+                EmailSink(
+                    host=os.getenv("SMTP_HOST", "localhost"),
+                    port=int(os.getenv("SMTP_PORT", 1025)),
+                    sender=os.getenv("SMTP_SENDER", "calendar@localhost"),
+                )
+            )
+    return sinks
+
+
+def _reminder(message: Envelope) -> Reminder:
+    return Reminder.from_payload(message.payload)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Hashable
+from typing import Any
+
+
+class TimingWheel:
+    """Hierarchical timing wheel with O(1) schedule/cancel.
+
+    Level 0 has ``slots`` buckets of one ``tick`` each; every higher level
+    covers ``slots`` buckets of the level below. Entries are cascaded down
+    as the wheel turns and come out of :meth:`advance` once their tick is
+    reached. Times are absolute seconds (e.g. ``time.time()``); entries
+    beyond the wheel's span wait in an overflow bucket.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 256, levels: int = 3, now: float = 0.0):
+        self._tick = tick
+        self._slots = slots
+        self._levels = levels
+        self._wheels: list[list[dict[Hashable, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._overflow: dict[Hashable, int] = {}
+        # key -> (fire tick, payload, bucket currently holding the key)
+        self._entries: dict[Hashable, tuple[int, Any, dict[Hashable, int]]] = {}
+        self._current = math.floor(now / tick)
+
+    @property
+    def span(self) -> float:
+        """Seconds ahead that fit into the wheel without overflowing."""
+        return self._tick * self._slots**self._levels
+
+    def schedule(self, key: Hashable, fire_at: float, payload: Any) -> None:
+        """Schedule ``payload`` under ``key``, replacing any pending entry for it."""
+
+        self.cancel(key)
+        fire_tick = max(math.ceil(fire_at / self._tick), self._current + 1)
+        self._place(key, fire_tick, payload)
+
+    def cancel(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[2].pop(key, None)
+        return True
+
+    def advance(self, now: float) -> list[Any]:
+        """Turn the wheel up to ``now`` and return payloads that are due, in order."""
+
+        target = math.floor(now / self._tick)
+        due: list[Any] = []
+        while self._current < target:
+            self._current += 1
+            for level in range(self._levels - 1, 0, -1):
+                width = self._slots**level
+                if self._current % width == 0:
+                    self._cascade(self._wheels[level][(self._current // width) % self._slots])
+            if self._current % self._slots**self._levels == 0:
+                self._cascade(self._overflow)
+
+            bucket = self._wheels[0][self._current % self._slots]
+            if bucket:
+                for key in bucket:
+                    due.append(self._entries.pop(key)[1])
+                bucket.clear()
+        return due
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _cascade(self, bucket: dict[Hashable, int]) -> None:
+        keys = list(bucket)
+        bucket.clear()
+        for key in keys:
+            fire_tick, payload, _ = self._entries[key]
+            self._place(key, fire_tick, payload)
+
+    def _place(self, key: Hashable, fire_tick: int, payload: Any) -> None:
+        delta = fire_tick - self._current
+        bucket = self._overflow
+        for level in range(self._levels):
+            if delta < self._slots ** (level + 1):
+                bucket = self._wheels[level][(fire_tick // self._slots**level) % self._slots]
+                break
+        bucket[key] = fire_tick
+        self._entries[key] = (fire_tick, payload, bucket)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from shared.notifications import CHANNEL_PREFIX, hub
+from shared.outbox import enqueue
+
+from app.reminders.schedule import next_reminder_at, occurrence_start
+from app.reminders.sinks import Reminder, topic_for
+from app.reminders.timing_wheel import TimingWheel
+from app.repositories.reminder_repository import ReminderRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderWorker:
+    """Fires event reminders for one shard of users.
+
+    Pending fire times are read from the ``reminder_at`` index one window
+    ahead of the clock, so memory holds only the next couple of windows no
+    matter how many reminders exist. Edits arrive through change
+    notifications and only touch the affected events. On start and then every
+    ``rescan`` seconds everything pending up to the loaded horizon is read
+    again, which picks up reminders that came due while the worker was down
+    and edits whose notification never reached it. A reminder is claimed
+    with a conditional update, and its deliveries are written to the outbox in
+    the same transaction, so it fires at most once even if windows overlap or
+    the worker restarts; the outbox relay does the actual sending.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        channels: Sequence[str],
+        *,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        window: float = 60.0,
+        tick: float = 0.1,
+        rescan: float = 60.0,
+        page_size: int = 5000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._session_factory = session_factory
+        self._channels = list(channels)
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._window = window
+        self._tick = tick
+        self._rescan = rescan
+        self._page_size = page_size
+        self._clock = clock
+        now = clock()
+        self._wheel = TimingWheel(tick=tick, now=now)
+        self._loaded_until = now
+        self._rescan_at = now
+        self._changed: queue.SimpleQueue[int] = queue.SimpleQueue()
+        self._stopped = threading.Event()
+
+    @property
+    def pending(self) -> int:
+        return len(self._wheel)
+
+    def owns(self, user_id: int) -> bool:
+        return user_id % self._shard_count == self._shard_index
+
+    def notify_changed(self, event_id: int) -> None:
+        """Thread-safe hook for create/update/delete notifications."""
+        self._changed.put(event_id)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def run(self) -> None:
+        logger.info("Reminder worker started for shard %s/%s", self._shard_index, self._shard_count)
+        while not self._stopped.is_set():
+            self.run_once()
+            self._stopped.wait(self._tick - self._clock() % self._tick)
+
+    def run_once(self) -> int:
+        now = self._clock()
+        if now >= self._rescan_at:
+            self._load_window(None, max(self._loaded_until, now + self._window))
+            self._rescan_at = now + self._rescan
+        while self._loaded_until < now + self._window:
+            self._load_window(self._loaded_until, self._loaded_until + self._window)
+        self._apply_changes()
+        due = self._wheel.advance(now)
+        if due:
+            self._fire(due)
+        return len(due)
+
+    def _load_window(self, start: float | None, end: float) -> None:
+        """Schedule reminders pending in ``[start, end)``; ``None`` includes all overdue ones."""
+
+        start_at = None if start is None else _to_datetime(start)
+        end_at = _to_datetime(end)
+        after_at, after_id = None, 0
+        with self._session_factory() as session:
+            repository = ReminderRepository(session)
+            while True:
+                rows = repository.list_due_between(
+                    start_at,
+                    end_at,
+                    self._shard_index,
+                    self._shard_count,
+                    after_id=after_id,
+                    after_at=after_at,
+                    limit=self._page_size,
+                )
+                for row in rows:
+                    self._schedule(row, row.reminder_at)
+                if len(rows) < self._page_size:
+                    break
+                after_at, after_id = rows[-1].reminder_at, rows[-1].id
+        self._loaded_until = end
+
+    def _apply_changes(self) -> None:
+        event_ids: set[int] = set()
+        while True:
+            try:
+                event_ids.add(self._changed.get_nowait())
+            except queue.Empty:
+                break
+        if not event_ids:
+            return
+
+        for event_id in event_ids:
+            self._wheel.cancel(event_id)
+        with self._session_factory() as session:
+            rows = ReminderRepository(session).get_many(sorted(event_ids))
+        for row in rows:
+            if row.reminder_at is not None and self.owns(row.user_id):
+                if _to_timestamp(row.reminder_at) < self._loaded_until:
+                    self._schedule(row, row.reminder_at)
+
+    def _schedule(self, row: Any, reminder_at: datetime) -> None:
+        self._wheel.schedule(row.id, _to_timestamp(reminder_at), (row, reminder_at))
+
+    def _fire(self, due: list[tuple[Any, datetime]]) -> None:
+        with self._session_factory() as session:
+            repository = ReminderRepository(session)
+            now = _to_datetime(self._clock())
+            for row, reminder_at in due:
+                start = occurrence_start(row, reminder_at)
+                # A series that was overdue skips the occurrences it missed.
+                next_at = next_reminder_at(row, max(start, now)) if row.recurrence_rule else None
+                if not repository.claim(row.id, reminder_at, next_at):
+                    repository.rollback()
+                    continue
+                reminder = Reminder(
+                    event_id=row.id,
+                    user_id=row.user_id,
+                    title=row.title,
+                    start_time=start,
+                    fire_at=reminder_at,
+                    reminder_type=row.reminder_type or "notification",
+                    email=row.email,
+                )
+                for channel in self._channels:
+                    if reminder.wants(channel):
+                        enqueue(session, topic_for(channel), reminder.to_payload(), row.user_id)
+                repository.commit()
+                if next_at is not None and _to_timestamp(next_at) < self._loaded_until:
+                    self._schedule(row, next_at)
+
+
+def start_change_listener(worker: ReminderWorker) -> Callable[[], None]:
+    """Feed event change notifications to ``worker``; returns a stop callback."""
+
+    def on_change(user_id: int, message: dict[str, Any]) -> None:
+        if message.get("resource") == "events" and worker.owns(user_id):
+            worker.notify_changed(int(message["id"]))
+
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url or os.getenv("CHANGE_BROKER", "redis") != "redis":
+        hub.add_listener(on_change)
+        return lambda: hub.remove_listener(on_change)
+
+    import redis
+
+    client = redis.Redis.from_url(redis_url)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.psubscribe(**{f"{CHANNEL_PREFIX}*": lambda raw: _dispatch_redis(raw, on_change)})
+    thread = pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+    return thread.stop
+
+
+def _dispatch_redis(raw: dict[str, Any], on_change: Callable[[int, dict[str, Any]], None]) -> None:
+    try:
+        channel = raw["channel"].decode() if isinstance(raw["channel"], bytes) else raw["channel"]
+        on_change(int(channel.rsplit(":", 1)[1]), json.loads(raw["data"]))
+    except (KeyError, ValueError, IndexError):
+        logger.warning("Ignoring malformed change notification: %r", raw)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _to_datetime(value: float) -> datetime:
+    return datetime(1970, 1, 1) + timedelta(seconds=value)
@@ -1,26 +1,141 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
 
+from shared.export import YIELD_PER
 from shared.models import Event
+from shared.notifications import enqueue_change
+from shared.sync import ChangeSet, next_sync_seq, read_changes, record_tombstones
+from shared.tracing import traced_methods
 
+SYNC_RESOURCE = "events"
 
+
+@traced_methods("EventRepository")
 class EventRepository:
     """Data access layer for events."""
 
     def __init__(self, session: Session):
         self._session = session
 
-    def list_for_user(self, user_id: int) -> Sequence[Event]:
+    def list_for_user(self, user_id: int, fields: Sequence[str]) -> Sequence[Row]:
+        """Rows holding only ``fields``, without building ``Event`` objects."""
+
+        statement = (
+            select(*_columns(fields))
+            .where(Event.user_id == user_id)
+            .order_by(Event.start_time)
+        )
+        return self._session.execute(statement).all()
+
+    def list_in_window(
+        self, user_id: int, window_start: datetime, window_end: datetime, fields: Sequence[str]
+    ) -> Sequence[Row]:
+        """Single events overlapping the window plus series that may recur inside it."""
+
+        single = and_(
+            Event.recurrence_rule.is_(None),
+            Event.start_time < window_end,
+            Event.end_time > window_start,
+        )
+        statement = (
+            select(*_columns(fields))
+            .where(Event.user_id == user_id, or_(single, _series_filter(window_start, window_end)))
+            .order_by(Event.start_time)
+        )
+        return self._session.execute(statement).all()
+
+    def list_series_in_window(
+        self, user_id: int, window_start: datetime, window_end: datetime
+    ) -> Sequence[Event]:
         return (
             self._session.query(Event)
-            .filter(Event.user_id == user_id)
-            .order_by(Event.start_time)
+            .filter(Event.user_id == user_id, _series_filter(window_start, window_end))
+            .all()
+        )
+
+    def summarize_days(
+        self,
+        user_id: int,
+        window_start: datetime,
+        window_end: datetime,
+        utc_offset_minutes: int,
+        tz_name: str,
+        top_titles: int,
+    ) -> tuple[list[tuple], list[tuple]]:
+        """Aggregate non-recurring events starting in the window by local day.
+
+        Returns ``(day, color, count, busy_seconds)`` groups from one grouped
+        query and, when ``top_titles`` is positive, the first titles of each
+        day as ``(day, start_time, title)`` from a ranked query.
+        """
+
+        dialect = self._session.get_bind().dialect.name
+        day = _local_day(dialect, utc_offset_minutes, tz_name).label("day")
+        window = (
+            Event.user_id == user_id,
+            Event.recurrence_rule.is_(None),
+            Event.start_time >= window_start,
+            Event.start_time < window_end,
+        )
+
+        groups = self._session.execute(
+            select(day, Event.color, func.count(), func.sum(_duration_seconds(dialect)))
+            .where(*window)
+            .group_by(day, Event.color)
+        ).all()
+
+        titles: list[tuple] = []
+        if top_titles > 0:
+            rank = func.row_number().over(partition_by=day, order_by=Event.start_time).label("rank")
+            ranked = select(day, Event.start_time, Event.title, rank).where(*window).subquery()
+            titles = self._session.execute(
+                select(ranked.c.day, ranked.c.start_time, ranked.c.title).where(
+                    ranked.c.rank <= top_titles
+                )
+            ).all()
+        return groups, titles
+
+    def overridden_occurrences(self, series_ids: Sequence[int]) -> dict[int, set[datetime]]:
+        """Map series id to the original start times replaced by override rows."""
+
+        overridden: dict[int, set[datetime]] = defaultdict(set)
+        if not series_ids:
+            return overridden
+        rows = (
+            self._session.query(Event.recurrence_parent_id, Event.recurrence_id)
+            .filter(Event.recurrence_parent_id.in_(series_ids))
             .all()
         )
+        for parent_id, recurrence_id in rows:
+            overridden[parent_id].add(recurrence_id)
+        return overridden
+
+    def iter_export(self, user_id: int) -> Iterator[Row]:
+        """Stream a user's events as rows through a server-side cursor.
+
+        Each row also carries ``parent_uid``, the imported UID of an
+        override's series, if any.
+        """
+
+        parent = aliased(Event)
+        statement = (
+            select(*Event.__table__.columns, parent.ical_uid.label("parent_uid"))
+            .outerjoin(parent, parent.id == Event.recurrence_parent_id)
+            .where(Event.user_id == user_id)
+            .order_by(Event.id)
+            .execution_options(yield_per=YIELD_PER)
+        )
+        yield from self._session.execute(statement)
+
+    def list_changes(self, user_id: int, token: str | None, limit: int) -> ChangeSet:
+        return read_changes(self._session, Event, user_id, SYNC_RESOURCE, token, limit)
 
     def get_for_user(self, user_id: int, event_id: int) -> Event | None:
         return (
@@ -43,6 +158,12 @@ class EventRepository:
         reminder_time: int | None,
         reminder_type: str | None,
         tags: str | None,
+        recurrence_rule: str | None = None,
+        recurrence_exceptions: str | None = None,
+        recurrence_end: datetime | None = None,
+        recurrence_parent_id: int | None = None,
+        recurrence_id: datetime | None = None,
+        reminder_at: datetime | None = None,
     ) -> Event:
         event = Event(
             user_id=user_id,
@@ -56,20 +177,99 @@ class EventRepository:
             reminder_time=reminder_time,
             reminder_type=reminder_type,
             tags=tags,
+            recurrence_rule=recurrence_rule,
+            recurrence_exceptions=recurrence_exceptions,
+            recurrence_end=recurrence_end,
+            recurrence_parent_id=recurrence_parent_id,
+            recurrence_id=recurrence_id,
+            reminder_at=reminder_at,
+            sync_seq=next_sync_seq(self._session, user_id, SYNC_RESOURCE),
         )
         self._session.add(event)
+        self._session.flush()
+        enqueue_change(self._session, user_id, SYNC_RESOURCE, "created", event.id)
         self._session.commit()
         self._session.refresh(event)
         return event
 
+    def bulk_create(self, user_id: int, rows: list[dict]) -> None:
+        """Insert many events with multi-row statements and a block of change numbers."""
+
+        if not rows:
+            return
+        last_seq = next_sync_seq(self._session, user_id, SYNC_RESOURCE, count=len(rows))
+        for offset, row in enumerate(rows, start=last_seq - len(rows) + 1):
+            row["user_id"] = user_id
+            row["sync_seq"] = offset
+        # Core insert: executemany with multi-row VALUES, no ORM unit of work.
+        table = Event.__table__
+        inserted = self._session.execute(insert(table).returning(table.c.id), rows).scalars()
+        for event_id in inserted:
+            enqueue_change(self._session, user_id, SYNC_RESOURCE, "created", event_id)
+        self._session.commit()
+
+    def series_ids_by_uid(self, user_id: int, uids: Sequence[str]) -> dict[str, int]:
+        """Ids of already stored (non-override) events with the given iCalendar UIDs."""
+
+        if not uids:
+            return {}
+        rows = (
+            self._session.query(Event.ical_uid, Event.id)
+            .filter(
+                Event.user_id == user_id,
+                Event.ical_uid.in_(uids),
+                Event.recurrence_parent_id.is_(None),
+            )
+            .all()
+        )
+        return {uid: event_id for uid, event_id in rows}
+
+    def existing_overrides(self, series_ids: Sequence[int]) -> set[tuple[int, datetime]]:
+        return {
+            (parent_id, recurrence_id)
+            for parent_id, occurrences in self.overridden_occurrences(series_ids).items()
+            for recurrence_id in occurrences
+        }
+
     def save(self, event: Event) -> Event:
+        event.sync_seq = next_sync_seq(self._session, event.user_id, SYNC_RESOURCE)
         self._session.add(event)
+        enqueue_change(self._session, event.user_id, SYNC_RESOURCE, "updated", event.id)
         self._session.commit()
         self._session.refresh(event)
         return event
 
     def delete(self, event: Event) -> None:
+        is_override = Event.recurrence_parent_id == event.id
+        overrides = self._session.query(Event.id).filter(is_override).all()
+        deleted_ids = [override_id for (override_id,) in overrides] + [event.id]
+        self._session.query(Event).filter(is_override).delete(synchronize_session=False)
         self._session.delete(event)
+        record_tombstones(self._session, event.user_id, SYNC_RESOURCE, deleted_ids)
+        enqueue_change(self._session, event.user_id, SYNC_RESOURCE, "deleted", event.id)
         self._session.commit()
 
 
+def _series_filter(window_start: datetime, window_end: datetime):
+    return and_(
+        Event.recurrence_rule.is_not(None),
+        Event.start_time < window_end,
+        or_(Event.recurrence_end.is_(None), Event.recurrence_end > window_start),
+    )
+
+
+def _local_day(dialect: str, utc_offset_minutes: int, tz_name: str):
+    if dialect == "postgresql":
+        return func.date(func.timezone(tz_name, func.timezone("UTC", Event.start_time)))
+    # SQLite has no time zone database; shift by the window's UTC offset instead.
+    return func.date(Event.start_time, f"{utc_offset_minutes:+d} minutes")
+
+
+def _duration_seconds(dialect: str):
+    if dialect == "postgresql":
+        return func.extract("epoch", Event.end_time - Event.start_time)
+    return (func.julianday(Event.end_time) - func.julianday(Event.start_time)) * 86400
+
+
+def _columns(fields: Sequence[str]) -> list:
+    return [Event.__table__.c[name] for name in fields]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from shared import sharding
+from shared.models import Event, User
+
+EVENT_COLUMNS = (
+    Event.id,
+    Event.user_id,
+    Event.title,
+    Event.start_time,
+    Event.end_time,
+    Event.reminder_enabled,
+    Event.reminder_time,
+    Event.reminder_type,
+    Event.reminder_at,
+    Event.recurrence_rule,
+    Event.recurrence_exceptions,
+)
+REMINDER_COLUMNS = (*EVENT_COLUMNS, User.email)
+
+
+class ReminderRepository:
+    """Data access for the reminder dispatcher; reads only the columns it needs."""
+
+    def __init__(self, session: Session):
+        self._session = session
+        self._users_elsewhere = sharding.enabled() and not sharding.users_colocated()
+
+    def list_due_between(
+        self,
+        start: datetime | None,
+        end: datetime,
+        shard_index: int,
+        shard_count: int,
+        after_id: int = 0,
+        after_at: datetime | None = None,
+        limit: int = 5000,
+    ) -> Sequence[Row]:
+        """Page of pending reminders in ``[start, end)`` for one shard, keyset ordered.
+
+        Without ``start`` every reminder due before ``end`` is listed, overdue ones included.
+        """
+
+        query = self._query().filter(Event.reminder_at < end)
+        if start is not None:
+            query = query.filter(Event.reminder_at >= start)
+        if shard_count > 1:
+            query = query.filter(Event.user_id % shard_count == shard_index)
+        if after_at is not None:
+            query = query.filter(
+                (Event.reminder_at > after_at)
+                | ((Event.reminder_at == after_at) & (Event.id > after_id))
+            )
+        return self._with_emails(query.order_by(Event.reminder_at, Event.id).limit(limit).all())
+
+    def get_many(self, event_ids: Sequence[int]) -> Sequence[Row]:
+        if not event_ids:
+            return []
+        return self._with_emails(self._query().filter(Event.id.in_(event_ids)).all())
+
+    def _query(self):
+        if self._users_elsewhere:
+            return self._session.query(*EVENT_COLUMNS)
+        return self._session.query(*REMINDER_COLUMNS).join(User, User.id == Event.user_id)
+
+    def _with_emails(self, rows: Sequence[Row]) -> Sequence[Row]:
+        """Add ``email`` when ``users`` is in the global database, away from the shard."""
+
+        if not self._users_elsewhere or not rows:
+            return rows
+        user_ids = {row.user_id for row in rows}
+        emails = dict(
+            self._session.query(User.id, User.email).filter(User.id.in_(user_ids)).all()
+        )
+        return [
+            SimpleNamespace(**row._mapping, email=emails.get(row.user_id)) for row in rows
+        ]
+
+    def claim(self, event_id: int, expected_at: datetime, next_at: datetime | None) -> bool:
+        """Move a reminder to its next fire time if nobody else fired it first.
+
+        The caller commits, together with whatever it records for delivery.
+        """
+
+        result = self._session.execute(
+            update(Event)
+            .where(Event.id == event_id, Event.reminder_at == expected_at)
+            .values(reminder_at=next_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def commit(self) -> None:
+        self._session.commit()
+
+    def rollback(self) -> None:
+        self._session.rollback()
@@ -10,3 +10,9 @@ class InvalidEventTimingError(EventServiceError):
     """Raised when start/end time is invalid."""
 
 
+class InvalidRecurrenceError(EventServiceError):
+    """Raised when a recurrence rule or override is invalid."""
+
+
+class InvalidEventWindowError(EventServiceError):
+    """Raised when the requested time window is invalid."""
@@ -1,27 +1,184 @@
 from __future__ import annotations
 
-from datetime import datetime
+import heapq
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timedelta, timezone
+from operator import attrgetter
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from sqlalchemy.engine import Row
+
+from shared.export import csv_chunks, ical_chunks, ndjson_chunks
 from shared.models import Event
+from shared.notifications import publish_message
+from shared.sync import ChangeSet
 
-from app.domain.schemas import EventCreateRequest, EventUpdateRequest
+from app.domain.schemas import EventCreateRequest, EventResponse, EventUpdateRequest
+from app.reminders.schedule import next_reminder_at
 from app.repositories.event_repository import EventRepository
-from app.services.errors import EventNotFoundError, InvalidEventTimingError
+from app.services.errors import (
+    EventNotFoundError,
+    InvalidEventTimingError,
+    InvalidEventWindowError,
+    InvalidRecurrenceError,
+)
+from app.services.ical import iter_calendar
+from app.services.ical_export import event_component
+from app.services.ical_import import IMPORT_BATCH_SIZE, ImportReport, map_vevent
+from app.services.recurrence import (
+    EventOccurrence,
+    expand_series,
+    parse_exceptions,
+    parse_rrule,
+    series_end,
+)
+from app.services.summary_cache import SummaryCache, summary_cache
+
+MAX_SUMMARY_DAYS = 366
+# Columns of ``EventResponse``, in order; list and export rows carry exactly these.
+RESPONSE_FIELDS = tuple(EventResponse.model_fields)
+EXPORT_FIELDS = RESPONSE_FIELDS
+# Always selected for windowed lists: needed to expand and order series.
+_WINDOW_FIELDS = (
+    "id",
+    "start_time",
+    "end_time",
+    "recurrence_rule",
+    "recurrence_exceptions",
+)
+# Stored as naive UTC, the form list windows, UNTIL and EXDATE are compared in.
+_TIME_FIELDS = ("start_time", "end_time", "recurrence_id")
+_REMINDER_FIELDS = (
+    "reminder_enabled",
+    "reminder_time",
+    "start_time",
+    "recurrence_rule",
+    "recurrence_exceptions",
+)
 
 
 class EventService:
     """Application service encapsulating event use cases."""
 
-    def __init__(self, repository: EventRepository):
+    def __init__(self, repository: EventRepository, cache: SummaryCache = summary_cache):
         self._repository = repository
+        self._summary_cache = cache
+
+    def list_events(
+        self,
+        user_id: int,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        fields: tuple[str, ...] = RESPONSE_FIELDS,
+    ) -> list[Row | EventOccurrence]:
+        """Rows (or expanded occurrences) carrying at least ``fields``."""
+
+        if window_start is None and window_end is None:
+            return list(self._repository.list_for_user(user_id, fields))
+        if window_start is None or window_end is None:
+            raise InvalidEventWindowError("Both 'from' and 'to' are required")
+
+        window_start, window_end = _as_naive_utc(window_start), _as_naive_utc(window_end)
+        if window_end <= window_start:
+            raise InvalidEventWindowError("'to' must be greater than 'from'")
+
+        columns = [name for name in RESPONSE_FIELDS if name in fields or name in _WINDOW_FIELDS]
+        rows = self._repository.list_in_window(user_id, window_start, window_end, columns)
+        single = [row for row in rows if not row.recurrence_rule]
+        series = [row for row in rows if row.recurrence_rule]
+        overridden = self._repository.overridden_occurrences([row.id for row in series])
+
+        streams = [single] + [
+            expand_series(master, window_start, window_end, overridden.get(master.id, ()))
+            for master in series
+        ]
+        return list(heapq.merge(*streams, key=attrgetter("start_time")))
+
+    def summarize_days(
+        self,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        tz_name: str = "UTC",
+        top_titles: int = 3,
+    ) -> dict:
+        """Per-day buckets (count, busy minutes, colors, titles) for ``[start_date, end_date)``."""
+
+        if end_date <= start_date:
+            raise InvalidEventWindowError("'to' must be greater than 'from'")
+        if (end_date - start_date).days > MAX_SUMMARY_DAYS:
+            raise InvalidEventWindowError(f"Summary window is limited to {MAX_SUMMARY_DAYS} days")
+        try:
+            zone = ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError) as exc:
+            raise InvalidEventWindowError(f"Unknown time zone: {tz_name}") from exc
+
+        return self._summary_cache.get_or_load(
+            user_id,
+            (start_date, end_date, tz_name, top_titles),
+            lambda: self._build_summary(user_id, start_date, end_date, zone, tz_name, top_titles),
+        )
+
+    def _build_summary(
+        self,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        zone: ZoneInfo,
+        tz_name: str,
+        top_titles: int,
+    ) -> dict:
+        local_start = datetime.combine(start_date, time.min, tzinfo=zone)
+        window_start = _as_naive_utc(local_start)
+        window_end = _as_naive_utc(datetime.combine(end_date, time.min, tzinfo=zone))
+        offset_minutes = int((local_start.utcoffset() or timedelta()).total_seconds() // 60)
 
-    def list_events(self, user_id: int) -> list[Event]:
-        return list(self._repository.list_for_user(user_id))
+        groups, titled = self._repository.summarize_days(
+            user_id, window_start, window_end, offset_minutes, tz_name, top_titles
+        )
+        buckets: dict[date, _DayBucket] = defaultdict(_DayBucket)
+        for day, color, count, busy_seconds in groups:
+            buckets[_as_date(day)].add(count, float(busy_seconds or 0), color)
+        for day, start_time, title in titled:
+            buckets[_as_date(day)].titles.append((start_time, title))
+
+        series = self._repository.list_series_in_window(user_id, window_start, window_end)
+        overridden = self._repository.overridden_occurrences([row.id for row in series])
+        for master in series:
+            skipped = overridden.get(master.id, ())
+            for occurrence in expand_series(master, window_start, window_end, skipped):
+                if occurrence.start_time < window_start:
+                    continue
+                local = occurrence.start_time.replace(tzinfo=timezone.utc).astimezone(zone)
+                bucket = buckets[local.date()]
+                duration = occurrence.end_time - occurrence.start_time
+                bucket.add(1, duration.total_seconds(), occurrence.color)
+                bucket.titles.append((occurrence.start_time, occurrence.title))
+
+        return {
+            "timezone": tz_name,
+            "days": [
+                bucket.as_dict(day, top_titles) for day, bucket in sorted(buckets.items())
+            ],
+        }
+
+    def list_changes(self, user_id: int, token: str | None, limit: int) -> ChangeSet:
+        return self._repository.list_changes(user_id, token, limit)
 
     def create_event(self, user_id: int, payload: EventCreateRequest) -> Event:
-        self._ensure_valid_timing(payload.start_time, payload.end_time)
-        data = payload.model_dump()
-        return self._repository.create(user_id=user_id, **data)
+        data = _normalize_times(payload.model_dump())
+        self._ensure_valid_timing(data["start_time"], data["end_time"])
+        if data["recurrence_parent_id"] is not None:
+            self._ensure_valid_override(user_id, data)
+        data["recurrence_end"] = self._series_end(
+            data["recurrence_rule"], data["recurrence_exceptions"], data["start_time"], data["end_time"]
+        )
+        data["reminder_at"] = self._reminder_at(data)
+        event = self._repository.create(user_id=user_id, **data)
+        self._summary_cache.invalidate_user(user_id)
+        return event
 
     def get_event(self, user_id: int, event_id: int) -> Event:
         event = self._repository.get_for_user(user_id, event_id)
@@ -31,20 +188,161 @@ class EventService:
 
     def update_event(self, user_id: int, event_id: int, payload: EventUpdateRequest) -> Event:
         event = self.get_event(user_id, event_id)
-        update_data = payload.model_dump(exclude_unset=True)
+        update_data = _normalize_times(payload.model_dump(exclude_unset=True))
 
         start_time = update_data.get("start_time", event.start_time)
         end_time = update_data.get("end_time", event.end_time)
         self._ensure_valid_timing(start_time, end_time)
 
+        rule = update_data.get("recurrence_rule", event.recurrence_rule)
+        if rule and event.recurrence_parent_id is not None:
+            raise InvalidRecurrenceError("An occurrence override cannot recur")
+        update_data["recurrence_end"] = self._series_end(
+            rule,
+            update_data.get("recurrence_exceptions", event.recurrence_exceptions),
+            start_time,
+            end_time,
+        )
+
+        before = {field: getattr(event, field) for field in _REMINDER_FIELDS}
         for field, value in update_data.items():
             setattr(event, field, value)
+        after = {field: getattr(event, field) for field in _REMINDER_FIELDS}
+        # A reminder that already fired must not come back on unrelated edits.
+        if after != before:
+            event.reminder_at = self._reminder_at(after)
         event.updated_at = datetime.utcnow()
-        return self._repository.save(event)
+        event = self._repository.save(event)
+        self._summary_cache.invalidate_user(user_id)
+        return event
 
     def delete_event(self, user_id: int, event_id: int) -> None:
         event = self.get_event(user_id, event_id)
         self._repository.delete(event)
+        self._summary_cache.invalidate_user(user_id)
+
+    def export_events(self, user_id: int, fmt: str) -> Iterator[bytes]:
+        """Encode all of a user's events lazily; rows are streamed from the database."""
+
+        rows = self._repository.iter_export(user_id)
+        if fmt == "ics":
+            return ical_chunks(rows, event_component, "События")
+        if fmt == "csv":
+            return csv_chunks(rows, EXPORT_FIELDS)
+        return ndjson_chunks(rows, EXPORT_FIELDS)
+
+    def import_events(
+        self, user_id: int, lines: Iterable[str], batch_size: int = IMPORT_BATCH_SIZE
+    ) -> ImportReport:
+        """Import VEVENTs from an iCalendar stream in bounded batches.
+
+        Events whose UID is already stored are skipped. Overrides
+        (``RECURRENCE-ID``) are attached to their series, which must appear
+        earlier in the stream or already exist. Progress is published to the
+        user's notification channel after every batch.
+        """
+
+        report = ImportReport()
+        batch: list[dict] = []
+        for component, calendar in iter_calendar(lines):
+            report.processed += 1
+            try:
+                row = _normalize_times(map_vevent(component, calendar))
+                row["recurrence_end"] = self._series_end(
+                    row["recurrence_rule"],
+                    row["recurrence_exceptions"],
+                    row["start_time"],
+                    row["end_time"],
+                )
+            except (ValueError, InvalidRecurrenceError) as exc:
+                uid = component.get("UID")
+                report.fail(uid.value if uid else None, str(exc))
+                continue
+            row["reminder_at"] = self._reminder_at(row)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self._import_batch(user_id, batch, report)
+                batch = []
+        self._import_batch(user_id, batch, report)
+
+        self._summary_cache.invalidate_user(user_id)
+        publish_message(user_id, {"type": "import_progress", "done": True, **report.as_dict()})
+        return report
+
+    def _import_batch(self, user_id: int, batch: list[dict], report: ImportReport) -> None:
+        series: dict[object, dict] = {}
+        overrides: list[dict] = []
+        for row in batch:
+            if row["recurrence_id"] is not None:
+                overrides.append(row)
+            elif row["ical_uid"] is None:
+                series[id(row)] = row
+            elif row["ical_uid"] in series:
+                report.skipped += 1
+            else:
+                series[row["ical_uid"]] = row
+
+        stored = self._repository.series_ids_by_uid(
+            user_id, [row["ical_uid"] for row in series.values() if row["ical_uid"]]
+        )
+        new_rows = [row for row in series.values() if row["ical_uid"] not in stored]
+        report.skipped += len(series) - len(new_rows)
+        self._repository.bulk_create(user_id, new_rows)
+        report.imported += len(new_rows)
+
+        if overrides:
+            parents = self._repository.series_ids_by_uid(
+                user_id, list({row["ical_uid"] for row in overrides if row["ical_uid"]})
+            )
+            taken = self._repository.existing_overrides(list(parents.values()))
+            override_rows = []
+            for row in overrides:
+                parent_id = parents.get(row["ical_uid"])
+                if parent_id is None:
+                    report.fail(row["ical_uid"], "series for RECURRENCE-ID not found")
+                    continue
+                key = (parent_id, row["recurrence_id"])
+                if key in taken:
+                    report.skipped += 1
+                    continue
+                taken.add(key)
+                row["recurrence_parent_id"] = parent_id
+                override_rows.append(row)
+            self._repository.bulk_create(user_id, override_rows)
+            report.imported += len(override_rows)
+
+        if batch:
+            publish_message(user_id, {"type": "import_progress", "done": False, **report.as_dict()})
+
+    def _ensure_valid_override(self, user_id: int, data: dict) -> None:
+        parent = self.get_event(user_id, data["recurrence_parent_id"])
+        if not parent.recurrence_rule:
+            raise InvalidRecurrenceError("Parent event is not recurring")
+        if data["recurrence_id"] is None:
+            raise InvalidRecurrenceError("recurrence_id is required for an occurrence override")
+        if data["recurrence_rule"]:
+            raise InvalidRecurrenceError("An occurrence override cannot recur")
+
+    @staticmethod
+    def _series_end(
+        rule_text: str | None,
+        exceptions_text: str | None,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> datetime | None:
+        if not rule_text:
+            return None
+        try:
+            rule = parse_rrule(rule_text)
+            parse_exceptions(exceptions_text, start_time)
+            return series_end(rule, start_time, end_time - start_time)
+        except ValueError as exc:
+            raise InvalidRecurrenceError(str(exc)) from exc
+
+    @staticmethod
+    def _reminder_at(fields: dict) -> datetime | None:
+        view = SimpleNamespace(**{field: fields[field] for field in _REMINDER_FIELDS})
+        return next_reminder_at(view, datetime.utcnow())
 
     @staticmethod
     def _ensure_valid_timing(start_time: datetime, end_time: datetime) -> None:
@@ -52,3 +350,43 @@ class EventService:
             raise InvalidEventTimingError("end_time must be greater than start_time")
 
 
+class _DayBucket:
+    __slots__ = ("count", "busy_seconds", "colors", "titles")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.busy_seconds = 0.0
+        self.colors: list[str] = []
+        self.titles: list[tuple[datetime, str]] = []
+
+    def add(self, count: int, busy_seconds: float, color: str | None) -> None:
+        self.count += count
+        self.busy_seconds += busy_seconds
+        if color and color not in self.colors:
+            self.colors.append(color)
+
+    def as_dict(self, day: date, top_titles: int) -> dict:
+        return {
+            "date": day,
+            "count": self.count,
+            "busy_minutes": round(self.busy_seconds / 60),
+            "colors": self.colors,
+            "titles": [title for _, title in sorted(self.titles)[:top_titles]],
+        }
+
+
+def _as_date(value: date | str) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _normalize_times(data: dict) -> dict:
+    for field in _TIME_FIELDS:
+        if data.get(field) is not None:
+            data[field] = _as_naive_utc(data[field])
+    return data
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
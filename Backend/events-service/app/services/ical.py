@@ -0,0 +1,165 @@
+"""Minimal streaming reader for RFC 5545 iCalendar data."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+_DURATION = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+_UNESCAPE = re.compile(r"\\([\\;,nN])")
+
+
+@dataclass(slots=True)
+class Property:
+    name: str
+    params: dict[str, str]
+    value: str
+
+
+@dataclass(slots=True)
+class Component:
+    """A ``BEGIN:``/``END:`` block with its properties and nested components."""
+
+    name: str
+    properties: list[Property] = field(default_factory=list)
+    children: list[Component] = field(default_factory=list)
+
+    def get(self, name: str) -> Property | None:
+        for prop in self.properties:
+            if prop.name == name:
+                return prop
+        return None
+
+    def get_all(self, name: str) -> list[Property]:
+        return [prop for prop in self.properties if prop.name == name]
+
+
+def unfold(lines: Iterable[str]) -> Iterator[str]:
+    """Join folded content lines (continuations start with a space or tab)."""
+
+    current: str | None = None
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_line(line: str) -> Property:
+    """Split ``NAME;PARAM=x:value`` into its parts (quoted parameter values allowed)."""
+
+    head, sep, value = line.partition(":")
+    if '"' in head:
+        # A quoted parameter may contain ':'; find the first separator outside quotes.
+        in_quotes = False
+        for index, char in enumerate(line):
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char == ":" and not in_quotes:
+                head, value = line[:index], line[index + 1:]
+                break
+        else:
+            sep = ""
+    if not sep:
+        raise ValueError(f"Malformed content line: {line[:80]!r}")
+
+    name, *raw_params = head.split(";")
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return Property(name.upper(), params, value)
+
+
+def iter_calendar(
+    lines: Iterable[str], name: str = "VEVENT"
+) -> Iterator[tuple[Component, dict[str, str]]]:
+    """Yield top-level ``name`` components with the calendar properties seen so far.
+
+    Only the current component is kept in memory. Malformed lines are skipped.
+    """
+
+    calendar: dict[str, str] = {}
+    stack: list[Component] = []
+    for line in unfold(lines):
+        try:
+            prop = parse_line(line)
+        except ValueError:
+            continue
+        if prop.name == "BEGIN":
+            component = Component(prop.value.upper())
+            if stack:
+                stack[-1].children.append(component)
+            if stack or component.name == name:
+                stack.append(component)
+            continue
+        if prop.name == "END":
+            if stack and stack[-1].name == prop.value.upper():
+                component = stack.pop()
+                if not stack:
+                    yield component, calendar
+            continue
+        if stack:
+            stack[-1].properties.append(prop)
+        elif prop.name in ("PRODID", "X-WR-TIMEZONE", "X-WR-CALNAME"):
+            calendar[prop.name] = prop.value
+
+
+def unescape_text(value: str) -> str:
+    return _UNESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def parse_temporal(prop: Property, default_tz: str | None = None) -> tuple[datetime, bool]:
+    """Parse a DATE or DATE-TIME property into naive UTC; the flag is true for all-day values."""
+
+    value = prop.value.strip()
+    if prop.params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+        day = date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+        return datetime.combine(day, time.min), True
+
+    if len(value) < 15 or value[8] != "T":
+        raise ValueError(f"Malformed date-time: {value!r}")
+    parsed = datetime(
+        int(value[:4]),
+        int(value[4:6]),
+        int(value[6:8]),
+        int(value[9:11]),
+        int(value[11:13]),
+        int(value[13:15]),
+    )
+    if value.endswith("Z"):
+        return parsed, False
+    tz_name = prop.params.get("TZID") or default_tz
+    if tz_name:
+        try:
+            zone = ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return parsed, False
+        parsed = parsed.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed, False
+
+
+def parse_duration(value: str) -> timedelta:
+    match = _DURATION.match(value.strip().upper())
+    if not match:
+        raise ValueError(f"Malformed duration: {value!r}")
+    parts = {key: int(raw or 0) for key, raw in match.groupdict().items() if key != "sign"}
+    delta = timedelta(
+        weeks=parts["weeks"],
+        days=parts["days"],
+        hours=parts["hours"],
+        minutes=parts["minutes"],
+        seconds=parts["seconds"],
+    )
+    return -delta if match.group("sign") == "-" else delta
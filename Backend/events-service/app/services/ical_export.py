@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any
+
+from shared.export import ical_datetime, ical_text
+
+from app.services.recurrence import parse_exceptions
+
+_ALARM_ACTIONS = {"notification": ("DISPLAY",), "email": ("EMAIL",), "both": ("DISPLAY", "EMAIL")}
+
+
+def event_uid(event_id: int, ical_uid: str | None) -> str:
+    """UID of an exported event: the imported one if known, otherwise stable per id."""
+    return ical_uid or f"event-{event_id}@calendar"
+
+
+def event_component(row: Any) -> list[str]:
+    """Content lines of the VEVENT for an export row (see ``EventRepository.iter_export``)."""
+
+    lines = ["BEGIN:VEVENT"]
+    if row.recurrence_parent_id is not None:
+        lines.append(f"UID:{ical_text(event_uid(row.recurrence_parent_id, row.parent_uid))}")
+        lines.append(f"RECURRENCE-ID:{ical_datetime(row.recurrence_id)}")
+    else:
+        lines.append(f"UID:{ical_text(event_uid(row.id, row.ical_uid))}")
+    lines += [
+        f"DTSTAMP:{ical_datetime(row.updated_at or row.created_at)}",
+        f"DTSTART:{ical_datetime(row.start_time)}",
+        f"DTEND:{ical_datetime(row.end_time)}",
+        f"SUMMARY:{ical_text(row.title)}",
+    ]
+    if row.description:
+        lines.append(f"DESCRIPTION:{ical_text(row.description)}")
+    if row.tags:
+        categories = ",".join(ical_text(tag.strip()) for tag in row.tags.split(",") if tag.strip())
+        lines.append(f"CATEGORIES:{categories}")
+    if row.recurrence_rule:
+        lines.append(f"RRULE:{row.recurrence_rule}")
+        exceptions = sorted(parse_exceptions(row.recurrence_exceptions, row.start_time))
+        if exceptions:
+            lines.append("EXDATE:" + ",".join(ical_datetime(value) for value in exceptions))
+    if row.reminder_enabled and row.reminder_time is not None:
+        for action in _ALARM_ACTIONS.get(row.reminder_type or "notification", ("DISPLAY",)):
+            lines += [
+                "BEGIN:VALARM",
+                f"ACTION:{action}",
+                f"TRIGGER:-PT{row.reminder_time}M",
+                f"DESCRIPTION:{ical_text(row.title)}",
+            ]
+            if action == "EMAIL":
+                lines.append(f"SUMMARY:{ical_text(row.title)}")
+            lines.append("END:VALARM")
+    lines.append("END:VEVENT")
+    return lines
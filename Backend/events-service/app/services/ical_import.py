@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from app.services.ical import (
+    Component,
+    Property,
+    parse_duration,
+    parse_temporal,
+    unescape_text,
+)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+# Events without DTEND/DURATION last a day (all-day) or this long.
+DEFAULT_DURATION = timedelta(hours=1)
+
+_HEX_COLOR = re.compile(r"^#[0-9a-fA-F]{6}$")
+_ALARM_CHANNELS = {"DISPLAY": "notification", "AUDIO": "notification", "EMAIL": "email"}
+
+
+@dataclass(slots=True)
+class ImportReport:
+    """Running totals of an import; also sent as progress notifications."""
+
+    processed: int = 0
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def fail(self, uid: str | None, reason: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{uid or '<no UID>'}: {reason}")
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "errors": list(self.errors),
+        }
+
+
+def map_vevent(component: Component, calendar: dict[str, str]) -> dict[str, Any]:
+    """Map a VEVENT onto ``Event`` column values; raises ``ValueError`` on unusable data."""
+
+    default_tz = calendar.get("X-WR-TIMEZONE")
+    dtstart = component.get("DTSTART")
+    if dtstart is None:
+        raise ValueError("VEVENT has no DTSTART")
+    start, all_day = parse_temporal(dtstart, default_tz)
+
+    fallback = timedelta(days=1) if all_day else DEFAULT_DURATION
+    if (dtend := component.get("DTEND")) is not None:
+        end = parse_temporal(dtend, default_tz)[0]
+    elif (duration := component.get("DURATION")) is not None:
+        end = start + parse_duration(duration.value)
+    else:
+        end = start + fallback
+    if end <= start:
+        end = start + fallback
+
+    reminder_enabled, reminder_time, reminder_type = _reminder(component)
+    recurrence_id = None
+    if (prop := component.get("RECURRENCE-ID")) is not None:
+        recurrence_id = parse_temporal(prop, default_tz)[0]
+
+    return {
+        "ical_uid": _text(component, "UID", 255),
+        "title": _text(component, "SUMMARY", 255) or "Без названия",
+        "description": _text(component, "DESCRIPTION"),
+        "start_time": start,
+        "end_time": end,
+        "color": _color(component),
+        "source": _source(calendar.get("PRODID", "")),
+        "reminder_enabled": reminder_enabled,
+        "reminder_time": reminder_time,
+        "reminder_type": reminder_type,
+        "tags": _tags(component),
+        "recurrence_rule": None if recurrence_id else _text(component, "RRULE", 255),
+        "recurrence_exceptions": None if recurrence_id else _exdates(component, default_tz),
+        "recurrence_parent_id": None,
+        "recurrence_id": recurrence_id,
+    }
+
+
+def _text(component: Component, name: str, limit: int | None = None) -> str | None:
+    prop = component.get(name)
+    if prop is None or not prop.value.strip():
+        return None
+    value = unescape_text(prop.value).strip()
+    return value[:limit] if limit else value
+
+
+def _color(component: Component) -> str:
+    color = _text(component, "COLOR") or ""
+    return color if _HEX_COLOR.match(color) else "#3b82f6"
+
+
+def _source(prodid: str) -> str:
+    lowered = prodid.lower()
+    for source in ("google", "yandex"):
+        if source in lowered:
+            return source
+    return "local"
+
+
+def _tags(component: Component) -> str | None:
+    categories = [
+        unescape_text(item).strip()
+        for prop in component.get_all("CATEGORIES")
+        for item in re.split(r"(?<!\\),", prop.value)
+    ]
+    joined = ",".join(filter(None, categories))
+    return joined[:255] or None
+
+
+def _exdates(component: Component, default_tz: str | None) -> str | None:
+    values: list[datetime] = []
+    for prop in component.get_all("EXDATE"):
+        for item in prop.value.split(","):
+            if item.strip():
+                values.append(parse_temporal(Property(prop.name, prop.params, item), default_tz)[0])
+    return ",".join(value.isoformat() for value in values) or None
+
+
+def _reminder(component: Component) -> tuple[bool, int | None, str]:
+    """First relative alarm before the start becomes the event's reminder."""
+
+    channels: set[str] = set()
+    lead: int | None = None
+    for alarm in component.children:
+        trigger = alarm.get("TRIGGER")
+        if alarm.name != "VALARM" or trigger is None:
+            continue
+        if trigger.params.get("VALUE", "DURATION").upper() != "DURATION":
+            continue
+        if trigger.params.get("RELATED", "START").upper() != "START":
+            continue
+        try:
+            offset = parse_duration(trigger.value)
+        except ValueError:
+            continue
+        if offset > timedelta(0):
+            continue
+        action = (alarm.get("ACTION").value if alarm.get("ACTION") else "DISPLAY").upper()
+        channels.add(_ALARM_CHANNELS.get(action, "notification"))
+        if lead is None:
+            lead = int(-offset.total_seconds() // 60)
+
+    if lead is None:
+        return False, 15, "notification"
+    return True, lead, "both" if len(channels) > 1 else channels.pop()
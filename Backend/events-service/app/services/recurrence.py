@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import calendar
+import math
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any
+
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+MAX_OCCURRENCES_PER_WINDOW = 5000
+MAX_COUNT = 100_000
+
+
+@dataclass(frozen=True, slots=True)
+class RecurrenceRule:
+    """Parsed subset of RFC 5545 RRULE supported by the calendar."""
+
+    freq: str
+    interval: int = 1
+    count: int | None = None
+    until: datetime | None = None
+    by_weekday: tuple[int, ...] = ()
+
+
+@dataclass(slots=True)
+class EventOccurrence:
+    """Single expanded occurrence of a recurring event series."""
+
+    id: int
+    user_id: int
+    title: str
+    description: str | None
+    start_time: datetime
+    end_time: datetime
+    color: str
+    source: str
+    reminder_enabled: bool
+    reminder_time: int | None
+    reminder_type: str | None
+    tags: str | None
+    recurrence_rule: str | None
+    recurrence_exceptions: str | None
+    recurrence_parent_id: int | None
+    recurrence_id: datetime | None
+    created_at: datetime
+    updated_at: datetime
+
+
+def parse_rrule(value: str) -> RecurrenceRule:
+    """Parse an ``RRULE`` value such as ``FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10``."""
+
+    text = value.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+
+    parts: dict[str, str] = {}
+    for chunk in filter(None, text.split(";")):
+        key, sep, raw = chunk.partition("=")
+        if not sep or not raw:
+            raise ValueError(f"Malformed RRULE part: {chunk!r}")
+        parts[key.strip().upper()] = raw.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError("RRULE must define FREQ as DAILY, WEEKLY, MONTHLY or YEARLY")
+
+    interval = _positive_int(parts.pop("INTERVAL", "1"), "INTERVAL")
+    count = _positive_int(parts.pop("COUNT"), "COUNT") if "COUNT" in parts else None
+    if count is not None and count > MAX_COUNT:
+        raise ValueError(f"COUNT must not exceed {MAX_COUNT}")
+    until = _parse_until(parts.pop("UNTIL")) if "UNTIL" in parts else None
+    if count is not None and until is not None:
+        raise ValueError("RRULE cannot define both COUNT and UNTIL")
+
+    by_weekday: tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported for WEEKLY rules")
+        try:
+            by_weekday = tuple(sorted({WEEKDAYS[day] for day in parts.pop("BYDAY").split(",")}))
+        except KeyError as exc:
+            raise ValueError(f"Unknown weekday in BYDAY: {exc.args[0]}") from None
+
+    parts.pop("WKST", None)
+    if parts:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(parts))}")
+
+    return RecurrenceRule(freq=freq, interval=interval, count=count, until=until, by_weekday=by_weekday)
+
+
+def parse_exceptions(value: str | None, dtstart: datetime) -> frozenset[datetime]:
+    """Parse comma separated EXDATE values (ISO 8601 or iCalendar basic format).
+
+    A date without a time excludes the occurrence starting on that day at the
+    series' time of day (``dtstart``).
+    """
+
+    if not value:
+        return frozenset()
+    exceptions = set()
+    for item in value.split(","):
+        if item.strip():
+            parsed = _parse_date_or_datetime(item)
+            if not isinstance(parsed, datetime):
+                parsed = datetime.combine(parsed, dtstart.time())
+            exceptions.add(parsed)
+    return frozenset(exceptions)
+
+
+def iter_occurrences(
+    rule: RecurrenceRule,
+    dtstart: datetime,
+    not_before: datetime | None = None,
+) -> Iterator[datetime]:
+    """Lazily yield occurrence start times of a series in chronological order.
+
+    When ``not_before`` is given, whole periods before it are skipped
+    arithmetically instead of being generated; a ``COUNT`` is turned into the
+    start of the last occurrence first.
+    """
+
+    last = _last_start(rule, dtstart) if rule.count is not None else rule.until
+    for candidate in _candidates(rule, dtstart, not_before):
+        if last is not None and candidate > last:
+            return
+        if not_before is None or candidate >= not_before:
+            yield candidate
+
+
+def series_end(rule: RecurrenceRule, dtstart: datetime, duration: timedelta) -> datetime | None:
+    """Return the end of the last occurrence, or ``None`` for unbounded series.
+
+    Raises ``ValueError`` when the series would run past the year 9999.
+    """
+
+    if rule.count is None and rule.until is None:
+        return None
+    last = _last_start(rule, dtstart)
+    try:
+        if last is None:
+            raise OverflowError
+        return last + duration
+    except OverflowError:
+        raise ValueError("Recurrence runs past the year 9999") from None
+
+
+@lru_cache(maxsize=1024)
+def expand_window(
+    rule_text: str,
+    dtstart: datetime,
+    duration: timedelta,
+    exceptions_text: str | None,
+    window_start: datetime,
+    window_end: datetime,
+) -> tuple[datetime, ...]:
+    """Occurrence starts overlapping ``[window_start, window_end)``, memoized per window.
+
+    The key includes the rule, anchor and exceptions, so edits to a series
+    never hit a stale entry.
+    """
+
+    rule = parse_rrule(rule_text)
+    exceptions = parse_exceptions(exceptions_text, dtstart)
+    starts: list[datetime] = []
+    for start in iter_occurrences(rule, dtstart, not_before=window_start - duration):
+        if start >= window_end or len(starts) >= MAX_OCCURRENCES_PER_WINDOW:
+            break
+        if start + duration > window_start and start not in exceptions:
+            starts.append(start)
+    return tuple(starts)
+
+
+def expand_series(
+    master: Any,
+    window_start: datetime,
+    window_end: datetime,
+    overridden: Iterable[datetime] = (),
+) -> Iterator[EventOccurrence]:
+    """Yield occurrences of ``master`` inside the window, skipping overridden ones.
+
+    ``master`` may be a projected row (sparse fieldsets); columns it does not
+    carry are left as ``None`` in the occurrences.
+    """
+
+    duration = master.end_time - master.start_time
+    skipped = set(overridden)
+    starts = expand_window(
+        master.recurrence_rule,
+        master.start_time,
+        duration,
+        master.recurrence_exceptions,
+        window_start,
+        window_end,
+    )
+    for start in starts:
+        if start in skipped:
+            continue
+        yield EventOccurrence(
+            id=master.id,
+            user_id=getattr(master, "user_id", None),
+            title=getattr(master, "title", None),
+            description=getattr(master, "description", None),
+            start_time=start,
+            end_time=start + duration,
+            color=getattr(master, "color", None),
+            source=getattr(master, "source", None),
+            reminder_enabled=getattr(master, "reminder_enabled", None),
+            reminder_time=getattr(master, "reminder_time", None),
+            reminder_type=getattr(master, "reminder_type", None),
+            tags=getattr(master, "tags", None),
+            recurrence_rule=master.recurrence_rule,
+            recurrence_exceptions=master.recurrence_exceptions,
+            recurrence_parent_id=None,
+            recurrence_id=start,
+            created_at=getattr(master, "created_at", None),
+            updated_at=getattr(master, "updated_at", None),
+        )
+
+
+def _candidates(
+    rule: RecurrenceRule, dtstart: datetime, skip_to: datetime | None
+) -> Iterator[datetime]:
+    # Ends quietly where datetime does (the year 9999).
+    try:
+        if rule.freq == "DAILY":
+            step = timedelta(days=rule.interval)
+            index = _periods_before(skip_to - dtstart, step) if skip_to else 0
+            while True:
+                yield dtstart + index * step
+                index += 1
+
+        elif rule.freq == "WEEKLY":
+            weekdays = rule.by_weekday or (dtstart.weekday(),)
+            week_anchor = dtstart - timedelta(days=dtstart.weekday())
+            step = timedelta(weeks=rule.interval)
+            index = _periods_before(skip_to - week_anchor, step) if skip_to else 0
+            while True:
+                week_start = week_anchor + index * step
+                for weekday in weekdays:
+                    candidate = week_start + timedelta(days=weekday)
+                    if candidate >= dtstart:
+                        yield candidate
+                index += 1
+
+        else:
+            months = _months(rule)
+            index = 0
+            if skip_to and skip_to > dtstart:
+                elapsed = (skip_to.year - dtstart.year) * 12 + skip_to.month - dtstart.month
+                index = max(elapsed // months - 1, 0)
+            while True:
+                year, month = _month_at(dtstart, months, index)
+                # Dates such as February 30th do not exist and are skipped (RFC 5545).
+                if dtstart.day <= calendar.monthrange(year, month)[1]:
+                    yield dtstart.replace(year=year, month=month)
+                index += 1
+    except (OverflowError, ValueError):
+        return
+
+
+@lru_cache(maxsize=1024)
+def _last_start(rule: RecurrenceRule, dtstart: datetime) -> datetime | None:
+    """Start of the last occurrence of a bounded series, without generating the others.
+
+    ``None`` when it would fall after the year 9999.
+    """
+
+    if rule.count is None:
+        # The last occurrence is within one period of UNTIL, unless months
+        # without the start's day are skipped: look further back until found.
+        lookback = _period(rule)
+        while True:
+            since = dtstart if lookback >= rule.until - dtstart else rule.until - lookback
+            last = None
+            for last in iter_occurrences(rule, dtstart, not_before=since):
+                pass
+            if last is not None or since == dtstart:
+                return last if last is not None else dtstart
+            lookback *= 2
+
+    index = rule.count - 1
+    try:
+        if rule.freq == "DAILY":
+            return dtstart + index * timedelta(days=rule.interval)
+
+        if rule.freq == "WEEKLY":
+            weekdays = rule.by_weekday or (dtstart.weekday(),)
+            first_week = [weekday for weekday in weekdays if weekday >= dtstart.weekday()]
+            if index < len(first_week):
+                week, weekday = 0, first_week[index]
+            else:
+                week, position = divmod(index - len(first_week), len(weekdays))
+                week, weekday = week + 1, weekdays[position]
+            week_anchor = dtstart - timedelta(days=dtstart.weekday())
+            return week_anchor + week * timedelta(weeks=rule.interval) + timedelta(days=weekday)
+
+        months = _months(rule)
+        if dtstart.day > 28:
+            # Which months have the start's day repeats every 400 years (4800 months).
+            period = 4800 // math.gcd(months, 4800)
+            present = [
+                offset
+                for offset in range(period)
+                if dtstart.day <= calendar.monthrange(*_month_at(dtstart, months, offset))[1]
+            ]
+            cycles, position = divmod(index, len(present))
+            index = cycles * period + present[position]
+        year, month = _month_at(dtstart, months, index)
+        return dtstart.replace(year=year, month=month)
+    except (OverflowError, ValueError):
+        return None
+
+
+def _months(rule: RecurrenceRule) -> int:
+    return rule.interval * (12 if rule.freq == "YEARLY" else 1)
+
+
+def _month_at(dtstart: datetime, months: int, index: int) -> tuple[int, int]:
+    offset = dtstart.month - 1 + index * months
+    return dtstart.year + offset // 12, offset % 12 + 1
+
+
+def _period(rule: RecurrenceRule) -> timedelta:
+    if rule.freq == "DAILY":
+        return timedelta(days=rule.interval)
+    if rule.freq == "WEEKLY":
+        return timedelta(weeks=rule.interval)
+    return timedelta(days=31 * _months(rule))
+
+
+def _periods_before(delta: timedelta, step: timedelta) -> int:
+    return max(delta // step, 0)
+
+
+def _positive_int(raw: str, name: str) -> int:
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if value < 1:
+        raise ValueError(f"{name} must be positive")
+    return value
+
+
+def _parse_until(raw: str) -> datetime:
+    # A date-only UNTIL includes the whole day.
+    value = _parse_date_or_datetime(raw)
+    return value if isinstance(value, datetime) else datetime.combine(value, time.max)
+
+
+def _parse_date_or_datetime(raw: str) -> date | datetime:
+    text = raw.strip()
+    try:
+        if len(text) == 8 and text.isdigit():
+            return date(int(text[:4]), int(text[4:6]), int(text[6:]))
+        if len(text) == 10 and "T" not in text:
+            return date.fromisoformat(text)
+        if "T" in text and "-" not in text:
+            return datetime.strptime(text.rstrip("Zz"), "%Y%m%dT%H%M%S")
+        value = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid date-time value: {raw!r}") from None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from shared.cache import TTLCache
+
+
+class SummaryCache:
+    """Per-user cache of day summaries, invalidated wholesale on event writes.
+
+    Each user has a generation number that is part of every key, so
+    invalidation is O(1): bumping it orphans old entries, which then age out
+    of the underlying LRU. The TTL bounds staleness for writes served by
+    other worker processes.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 30.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, user_id: int, key: Hashable, loader: Callable[[], Any]) -> Any:
+        # The generation is read before loading, so a summary computed while
+        # a write invalidated the user is stored under the orphaned key.
+        full_key = (user_id, self._generations.get(user_id, 0), key)
+        value = self._entries.get(full_key)
+        if value is None:
+            value = loader()
+            self._entries.set(full_key, value)
+        return value
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def stats(self) -> dict[str, float]:
+        return self._entries.stats()
+
+
+summary_cache = SummaryCache()
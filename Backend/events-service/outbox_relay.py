@@ -0,0 +1,66 @@
+"""Deliver queued outbox messages (change notifications, reminders and e-mails).
+
+Change notifications of both events-service and todos-service are published
+here only with Redis; without it each service delivers its own in-process.
+
+Usage: python outbox_relay.py [--batch-size N] [--concurrency N]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+
+BASE_DIR = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(BASE_DIR, ".."))
+
+from shared import sharding  # noqa: E402
+from shared.database import SessionLocal  # noqa: E402
+from shared.notifications import ChangeSink, crosses_processes  # noqa: E402
+from shared.outbox import OutboxRelay  # noqa: E402
+
+from app.reminders.sinks import sinks_from_env  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--batch-size", type=int, default=int(os.getenv("OUTBOX_BATCH_SIZE", 200))
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("OUTBOX_CONCURRENCY", 4))
+    )
+    parser.add_argument(
+        "--db-shard",
+        type=int,
+        default=int(os.environ["DB_SHARD"]) if os.getenv("DB_SHARD") else None,
+        help="database shard to work on when SHARD_URLS is set (one process per shard)",
+    )
+    args = parser.parse_args()
+
+    if sharding.enabled() and args.db_shard is None:
+        parser.error("--db-shard is required when SHARD_URLS is set")
+    session_factory = (
+        SessionLocal if args.db_shard is None else sharding.shard_sessionmaker(args.db_shard)
+    )
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    sinks = sinks_from_env()
+    if crosses_processes():
+        sinks.append(ChangeSink())
+    relay = OutboxRelay(
+        session_factory,
+        sinks,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: relay.stop())
+    try:
+        relay.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
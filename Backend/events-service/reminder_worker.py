@@ -0,0 +1,75 @@
+"""Run the reminder dispatcher for one shard of users.
+
+Usage: python reminder_worker.py [--shard-index N] [--shard-count M]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+
+BASE_DIR = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(BASE_DIR, ".."))
+
+from shared import sharding  # noqa: E402
+from shared.database import SessionLocal  # noqa: E402
+
+from app.reminders.sinks import channels_from_env  # noqa: E402
+from app.reminders.worker import ReminderWorker, start_change_listener  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--shard-index", type=int, default=int(os.getenv("REMINDER_SHARD_INDEX", 0))
+    )
+    parser.add_argument(
+        "--shard-count", type=int, default=int(os.getenv("REMINDER_SHARD_COUNT", 1))
+    )
+    parser.add_argument(
+        "--window", type=float, default=float(os.getenv("REMINDER_WINDOW_SECONDS", 60))
+    )
+    parser.add_argument(
+        "--rescan",
+        type=float,
+        default=float(os.getenv("REMINDER_RESCAN_SECONDS", 60)),
+        help="seconds between full re-reads of pending reminders, overdue ones included",
+    )
+    parser.add_argument(
+        "--db-shard",
+        type=int,
+        default=int(os.environ["DB_SHARD"]) if os.getenv("DB_SHARD") else None,
+        help="database shard to work on when SHARD_URLS is set (one process per shard)",
+    )
+    args = parser.parse_args()
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be in [0, --shard-count)")
+
+    if sharding.enabled() and args.db_shard is None:
+        parser.error("--db-shard is required when SHARD_URLS is set")
+    session_factory = (
+        SessionLocal if args.db_shard is None else sharding.shard_sessionmaker(args.db_shard)
+    )
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = ReminderWorker(
+        session_factory,
+        channels_from_env(),
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+        window=args.window,
+        rescan=args.rescan,
+    )
+    stop_listener = start_change_listener(worker)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_listener()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
-# Shared utilities
-from .auth_utils import JWTHandler, PasswordHandler
-from .database import get_db, engine, SessionLocal
-from .models import User, Event, Todo, Base
+# Shared utilities.
+#
+# Names are resolved on first access so that importing one helper does not
+# pull in the JWT libraries, the database layer and the models all at once.
+import importlib
 
-__all__ = [
-    "JWTHandler",
-    "PasswordHandler",
-    "get_db",
-    "engine",
-    "SessionLocal",
-    "User",
-    "Event",
-    "Todo",
-    "Base",
-]
+_EXPORTS = {
+    "JWTHandler": "auth_utils",
+    "PasswordHandler": "auth_utils",
+    "get_db": "database",
+    "get_engine": "database",
+    "engine": "database",
+    "SessionLocal": "database",
+    "User": "models",
+    "Event": "models",
+    "Todo": "models",
+    "TodoCounter": "models",
+    "Base": "models",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    if name != "engine":
+        globals()[name] = value
+    return value
@@ -1,19 +1,170 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import uuid4
+import hashlib
 import os
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from shared.cache import TTLCache
+
+JWT_BACKENDS = ("pyjwt", "jose")
+_ASYMMETRIC_PREFIXES = ("RS", "PS", "ES", "EdDSA")
+
+
+def load_keys(
+    algorithm: str,
+    secret: str,
+    private_pem: Optional[str] = None,
+    public_pem: Optional[str] = None,
+) -> tuple[Any, Any]:
+    """Ключи подписи и проверки, разобранные один раз.
+
+    Для HS* это байты секрета. Для RS*/ES*/EdDSA — объекты ``cryptography``;
+    без приватного ключа сервис может только проверять токены.
+    """
+    if not algorithm.startswith(_ASYMMETRIC_PREFIXES):
+        key = secret.encode()
+        return key, key
+
+    from cryptography.hazmat.primitives import serialization
+
+    signing_key = None
+    if private_pem:
+        signing_key = serialization.load_pem_private_key(private_pem.encode(), password=None)
+    if public_pem:
+        verifying_key = serialization.load_pem_public_key(public_pem.encode())
+    elif signing_key is not None:
+        verifying_key = signing_key.public_key()
+    else:
+        raise ValueError(f"{algorithm} требует JWT_PUBLIC_KEY или JWT_PRIVATE_KEY")
+    return signing_key, verifying_key
+
+
+class PyJWTBackend:
+    """Подпись и проверка через PyJWT."""
+
+    name = "pyjwt"
+
+    def __init__(self, algorithm: str, signing_key: Any, verifying_key: Any, leeway: float = 0):
+        import jwt
+
+        self._jwt = jwt.PyJWT()
+        self._algorithm = algorithm
+        self._algorithms = [algorithm]
+        self._leeway = leeway
+        self._signing_key = signing_key
+        self._verifying_key = verifying_key
+        self.errors = (jwt.PyJWTError,)
+
+    def encode(self, payload: dict) -> str:
+        if self._signing_key is None:
+            raise RuntimeError("Приватный ключ JWT не задан, сервис не может выпускать токены")
+        return self._jwt.encode(payload, self._signing_key, algorithm=self._algorithm)
+
+    def decode(self, token: str) -> dict:
+        # PyJWT отклоняет iat из будущего: часы выпустившего токен хоста могут спешить.
+        return self._jwt.decode(
+            token, self._verifying_key, algorithms=self._algorithms, leeway=self._leeway
+        )
+
+
+class JoseBackend:
+    """Подпись и проверка через python-jose (без EdDSA)."""
+
+    name = "jose"
+
+    def __init__(self, algorithm: str, signing_key: Any, verifying_key: Any, leeway: float = 0):
+        from jose import jwk, jwt
+        from jose.exceptions import JOSEError
+
+        if algorithm == "EdDSA":
+            raise ValueError("python-jose не поддерживает EdDSA, используйте JWT_BACKEND=pyjwt")
+        self._jwt = jwt
+        self._algorithm = algorithm
+        self._algorithms = [algorithm]
+        self._signing_key = jwk.construct(_pem(signing_key), algorithm) if signing_key else None
+        self._verifying_key = jwk.construct(_pem(verifying_key), algorithm)
+        self._options = {"leeway": leeway}
+        self.errors = (JOSEError,)
+
+    def encode(self, payload: dict) -> str:
+        if self._signing_key is None:
+            raise RuntimeError("Приватный ключ JWT не задан, сервис не может выпускать токены")
+        return self._jwt.encode(payload, self._signing_key, algorithm=self._algorithm)
+
+    def decode(self, token: str) -> dict:
+        return self._jwt.decode(
+            token, self._verifying_key, algorithms=self._algorithms, options=self._options
+        )
+
+
+def _pem(key: Any) -> Any:
+    """python-jose принимает асимметричные ключи только в PEM."""
+    if isinstance(key, bytes):
+        return key
+
+    from cryptography.hazmat.primitives import serialization
+
+    if hasattr(key, "private_bytes"):
+        return key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    return key.public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
+def create_backend(
+    name: str, algorithm: str, signing_key: Any, verifying_key: Any, leeway: float = 0
+):
+    if name == "jose":
+        return JoseBackend(algorithm, signing_key, verifying_key, leeway)
+    if name == "pyjwt":
+        return PyJWTBackend(algorithm, signing_key, verifying_key, leeway)
+    raise ValueError(f"Неизвестный JWT_BACKEND: {name!r}, ожидается одно из {JWT_BACKENDS}")
+
+
+def _read_key(name: str) -> Optional[str]:
+    """PEM из переменной ``name`` или из файла ``name_FILE``."""
+    value = os.getenv(name)
+    path = os.getenv(f"{name}_FILE")
+    if not value and path:
+        with open(path, encoding="utf-8") as key_file:
+            value = key_file.read()
+    return value or None
 
 
 class JWTHandler:
     """Обработка JWT токенов"""
-    
+
     SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-change-this")
     ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    BACKEND = os.getenv("JWT_BACKEND", "pyjwt")
     ACCESS_TOKEN_EXPIRE = int(os.getenv("JWT_EXPIRATION", 3600))
     REFRESH_TOKEN_EXPIRE = int(os.getenv("JWT_REFRESH_EXPIRATION", 604800))
+    # Допустимое расхождение часов между сервисами при проверке exp, iat и nbf, секунды.
+    LEEWAY = float(os.getenv("JWT_LEEWAY", 30))
+    # Проверенные токены по хешу: повторный запрос с тем же токеном не проверяет подпись.
+    VERIFY_CACHE_TTL = float(os.getenv("JWT_VERIFY_CACHE_TTL", 300))
+
+    _backend = None
+    _verified = TTLCache(maxsize=int(os.getenv("JWT_VERIFY_CACHE_SIZE", 10000)), ttl=300)
+
+    @classmethod
+    def backend(cls):
+        """Бэкенд с заранее подготовленными ключами (создаётся при первом обращении)."""
+        if cls._backend is None:
+            keys = load_keys(
+                cls.ALGORITHM,
+                cls.SECRET_KEY,
+                _read_key("JWT_PRIVATE_KEY"),
+                _read_key("JWT_PUBLIC_KEY"),
+            )
+            cls._backend = create_backend(cls.BACKEND, cls.ALGORITHM, *keys, leeway=cls.LEEWAY)
+        return cls._backend
 
     @classmethod
     def create_access_token(cls, data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -23,10 +174,11 @@ class JWTHandler:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(seconds=cls.ACCESS_TOKEN_EXPIRE)
-        
+
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, cls.SECRET_KEY, algorithm=cls.ALGORITHM)
-        return encoded_jwt
+        to_encode.setdefault("iat", int(time.time()))
+        to_encode.setdefault("jti", uuid4().hex)
+        return cls.backend().encode(to_encode)
 
     @classmethod
     def create_refresh_token(cls, data: dict) -> str:
@@ -34,28 +186,52 @@ class JWTHandler:
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(seconds=cls.REFRESH_TOKEN_EXPIRE)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, cls.SECRET_KEY, algorithm=cls.ALGORITHM)
-        return encoded_jwt
+        to_encode.setdefault("iat", int(time.time()))
+        to_encode.setdefault("jti", uuid4().hex)
+        return cls.backend().encode(to_encode)
 
     @classmethod
     def verify_token(cls, token: str) -> dict:
         """Проверить токен"""
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        payload = cls._verified.get(key)
+        if payload is not None:
+            return dict(payload)
+
+        backend = cls.backend()
         try:
-            payload = jwt.decode(token, cls.SECRET_KEY, algorithms=[cls.ALGORITHM])
-            return payload
-        except JWTError:
+            payload = backend.decode(token)
+        except backend.errors:
             raise Exception("Невалидный токен")
 
+        # Кешируем не дольше, чем живёт сам токен.
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            cls._verified.set(key, payload, ttl=min(remaining, cls.VERIFY_CACHE_TTL))
+        return dict(payload)
+
+    @classmethod
+    def cache_stats(cls) -> dict[str, float]:
+        return cls._verified.stats()
+
+
+@lru_cache(maxsize=1)
+def pwd_context():
+    """passlib импортируется только там, где хешируют пароли."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 
 class PasswordHandler:
     """Обработка паролей"""
-    
+
     @staticmethod
     def hash_password(password: str) -> str:
         """Хешировать пароль"""
-        return pwd_context.hash(password)
-    
+        return pwd_context().hash(password)
+
     @staticmethod
     def verify_password(password: str, hashed_password: str) -> bool:
         """Проверить пароль"""
-        return pwd_context.verify(password, hashed_password)
+        return pwd_context().verify(password, hashed_password)
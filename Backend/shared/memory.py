@@ -0,0 +1,219 @@
+"""Memory accounting: process stats, sampled per-request peaks and snapshots.
+
+* ``process_stats()`` is RSS (current and high-water mark, from
+  ``/proc/self/status``) and garbage-collector counters, cheap enough for
+  every ``/metrics`` call.
+* ``MemoryTrackingMiddleware`` measures the peak Python allocation of a
+  ``MEMORY_SAMPLE_RATE`` fraction of requests with ``tracemalloc``. One
+  request is tracked at a time, so the peak is that request's alone unless
+  others allocate concurrently. Peaks are aggregated per route.
+* ``POST /debug/memory/snapshot`` (guarded by ``PROFILER_TOKEN`` like the
+  profiler) returns the top allocation sites and, with ``compare_to``, the
+  difference from an earlier snapshot; that is how leaks are found.
+  ``DELETE`` stops tracing again.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import random
+import resource
+import threading
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+
+from shared.profiling import require_debug_token
+
+SAMPLE_RATE = float(os.getenv("MEMORY_SAMPLE_RATE", "0"))
+TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+KEPT_SNAPSHOTS = 5
+
+_MB = 1024 * 1024
+
+
+def process_stats() -> dict[str, Any]:
+    stats: dict[str, Any] = {}
+    try:
+        with open("/proc/self/status", encoding="ascii") as status_file:
+            fields = dict(line.split(":", 1) for line in status_file if ":" in line)
+        stats["rss_mb"] = round(int(fields["VmRSS"].split()[0]) / 1024, 1)
+        stats["peak_rss_mb"] = round(int(fields["VmHWM"].split()[0]) / 1024, 1)
+        stats["threads"] = int(fields["Threads"])
+    except (OSError, KeyError, ValueError):
+        # Not Linux: ru_maxrss is the peak, in KiB on Linux but bytes on macOS.
+        stats["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        stats["threads"] = threading.active_count()
+    for generation, (pending, generation_stats) in enumerate(zip(gc.get_count(), gc.get_stats())):
+        stats[f"gc{generation}_pending"] = pending
+        stats[f"gc{generation}_collections"] = generation_stats["collections"]
+        stats[f"gc{generation}_collected"] = generation_stats["collected"]
+    stats["gc_uncollectable"] = sum(item["uncollectable"] for item in gc.get_stats())
+    stats["tracemalloc"] = tracemalloc.is_tracing()
+    return stats
+
+
+class RequestPeaks:
+    """Peak allocation of sampled requests, per route."""
+
+    def __init__(self) -> None:
+        self._routes: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, peak_bytes: int) -> None:
+        peak_mb = peak_bytes / _MB
+        with self._lock:
+            entry = self._routes.setdefault(route, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += peak_mb
+            entry[2] = max(entry[2], peak_mb)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                route: {
+                    "samples": count,
+                    "avg_peak_mb": round(total / count, 3),
+                    "max_peak_mb": round(maximum, 3),
+                }
+                for route, (count, total, maximum) in sorted(
+                    self._routes.items(), key=lambda item: -item[1][2]
+                )
+            }
+
+
+request_peaks = RequestPeaks()
+
+# Held while a request is being measured. ``_snapshot_session`` tells whether
+# tracemalloc was started for snapshots (and must keep running) or only for
+# that request; it has its own lock, as snapshots are taken from requests.
+_tracking = threading.Lock()
+_snapshot_lock = threading.Lock()
+_snapshot_session = False
+
+
+class MemoryTrackingMiddleware:
+    def __init__(self, app, sample_rate: float = SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith("/debug/")
+            or random.random() >= self.sample_rate
+            or not _tracking.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started_here = not tracemalloc.is_tracing()
+        try:
+            if started_here:
+                tracemalloc.start(1)
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                route = scope.get("route")
+                name = f"{scope['method']} {route.path if route is not None else scope['path']}"
+                request_peaks.record(name, max(peak, 0))
+        finally:
+            if started_here and not _snapshot_session:
+                tracemalloc.stop()
+            _tracking.release()
+
+
+_snapshots: OrderedDict[str, tracemalloc.Snapshot] = OrderedDict()
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+def take_snapshot() -> tuple[str, tracemalloc.Snapshot]:
+    global _snapshot_session
+    with _snapshot_lock:
+        _snapshot_session = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        snapshot_id = uuid.uuid4().hex[:12]
+        _snapshots[snapshot_id] = snapshot
+        while len(_snapshots) > KEPT_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot_id, snapshot
+
+
+def stop_tracing() -> None:
+    # Not under ``_tracking``: a request being measured may be this one. Its
+    # peak then reads as 0, and the middleware only stops tracing it started.
+    global _snapshot_session
+    with _snapshot_lock:
+        _snapshot_session = False
+        _snapshots.clear()
+        tracemalloc.stop()
+
+
+def _site(statistic) -> str:
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in statistic.traceback)
+
+
+router = APIRouter(prefix="/debug/memory", tags=["Debug"], include_in_schema=False)
+
+
+@router.post("/snapshot")
+def snapshot_memory(
+    top: int = Query(default=20, ge=1, le=200),
+    group_by: str = Query(default="lineno", pattern="^(lineno|filename|traceback)$"),
+    compare_to: str | None = Query(default=None),
+    token: str | None = Header(default=None, alias="X-Profiler-Token"),
+) -> dict[str, Any]:
+    """Top allocation sites now and, with ``compare_to``, growth since that snapshot.
+
+    Allocations made before the first snapshot started tracing are not seen,
+    so take one snapshot, let the suspected leak happen, then compare.
+    """
+
+    require_debug_token(token)
+    previous = _snapshots.get(compare_to) if compare_to else None
+    if compare_to and previous is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found")
+
+    snapshot_id, snapshot = take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    result: dict[str, Any] = {
+        "id": snapshot_id,
+        "traced_mb": round(current / _MB, 3),
+        "traced_peak_mb": round(peak / _MB, 3),
+        "top": [
+            {"site": _site(stat), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:top]
+        ],
+    }
+    if previous is not None:
+        result["diff"] = [
+            {
+                "site": _site(stat),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+                "size_kb": round(stat.size / 1024, 1),
+            }
+            for stat in snapshot.compare_to(previous, group_by)[:top]
+        ]
+    return result
+
+
+@router.delete("/snapshot", status_code=status.HTTP_204_NO_CONTENT)
+def stop_memory_tracing(token: str | None = Header(default=None, alias="X-Profiler-Token")):
+    """Stop tracemalloc (it slows allocations down) and drop kept snapshots."""
+
+    require_debug_token(token)
+    stop_tracing()
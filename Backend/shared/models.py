@@ -1,4 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, ForeignKey, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Enum as SQLEnum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -15,6 +27,8 @@ class User(Base):
     username = Column(String(255), unique=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
+    # Tokens carrying an older generation are rejected ("log out everywhere").
+    token_generation = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -25,6 +39,40 @@ class User(Base):
         return f"<User(id={self.id}, email={self.email}, username={self.username})>"
 
 
+class RevokedToken(Base):
+    """JWT revoked before its expiry; kept until ``expires_at``."""
+
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Database clock, so processes reading new revocations by it agree with every writer.
+    revoked_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken(jti={self.jti}, user_id={self.user_id})>"
+
+
+class UserShard(Base):
+    """Where a user's rows live when it is not the hashed shard (see ``shared.sharding``).
+
+    With ``SHARD_USERS=colocated`` every user has an entry: it allocates the
+    id and finds the user by e-mail or username at login.
+    """
+
+    __tablename__ = "shard_directory"
+
+    user_id = Column(Integer, primary_key=True)
+    shard = Column(Integer, nullable=False)
+    email = Column(String(255), unique=True, nullable=True)
+    username = Column(String(255), unique=True, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UserShard(user_id={self.user_id}, shard={self.shard})>"
+
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -39,12 +87,32 @@ class Event(Base):
     reminder_enabled = Column(Boolean, default=False)
     reminder_time = Column(Integer, default=15)
     reminder_type = Column(SQLEnum("notification", "email", "both", name="reminder_type"), default="notification")
+    # Next time the reminder fires (start minus reminder_time); NULL when nothing is pending.
+    reminder_at = Column(DateTime, nullable=True, index=True)
     tags = Column(String(255), nullable=True)
+    # RRULE-style recurrence: the series is stored once and expanded on read.
+    recurrence_rule = Column(String(255), nullable=True)
+    recurrence_exceptions = Column(Text, nullable=True)
+    recurrence_end = Column(DateTime, nullable=True)
+    # Overrides of a single occurrence point at their series and original start.
+    recurrence_parent_id = Column(
+        Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    recurrence_id = Column(DateTime, nullable=True)
+    # UID of the VEVENT this event was imported from, used to skip re-imports.
+    ical_uid = Column(String(255), nullable=True)
+    sync_seq = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="events")
 
+    __table_args__ = (
+        Index("ix_events_user_start", "user_id", "start_time"),
+        Index("ix_events_user_sync_seq", "user_id", "sync_seq"),
+        Index("ix_events_user_ical_uid", "user_id", "ical_uid"),
+    )
+
     def __repr__(self):
         return f"<Event(id={self.id}, title={self.title}, user_id={self.user_id})>"
 
@@ -61,10 +129,93 @@ class Todo(Base):
     category = Column(SQLEnum("day", "week", "general", name="todo_category"), default="general")
     due_date = Column(DateTime, nullable=True)
     tags = Column(String(255), nullable=True)
+    sync_seq = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="todos")
 
+    __table_args__ = (
+        Index("ix_todos_user_open_due", "user_id", "completed", "due_date"),
+        Index("ix_todos_user_sync_seq", "user_id", "sync_seq"),
+    )
+
     def __repr__(self):
         return f"<Todo(id={self.id}, title={self.title}, user_id={self.user_id})>"
+
+
+class TodoCounter(Base):
+    """Per-user todo counters maintained in the same transaction as todo writes."""
+
+    __tablename__ = "todo_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    open_low = Column(Integer, default=0, nullable=False)
+    open_medium = Column(Integer, default=0, nullable=False)
+    open_high = Column(Integer, default=0, nullable=False)
+    open_day = Column(Integer, default=0, nullable=False)
+    open_week = Column(Integer, default=0, nullable=False)
+    open_general = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TodoCounter(user_id={self.user_id}, total={self.total})>"
+
+
+class SyncCursor(Base):
+    """Last change sequence number handed out per user and resource."""
+
+    __tablename__ = "sync_cursors"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    resource = Column(String(32), primary_key=True)
+    seq = Column(BigInteger, default=0, nullable=False)
+    purged_seq = Column(BigInteger, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<SyncCursor(user_id={self.user_id}, resource={self.resource}, seq={self.seq})>"
+
+
+class SyncTombstone(Base):
+    """Record of a deleted row kept for delta sync until retention expires."""
+
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    resource = Column(String(32), nullable=False)
+    object_id = Column(Integer, nullable=False)
+    sync_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_seq", "user_id", "resource", "sync_seq"),
+    )
+
+    def __repr__(self):
+        return f"<SyncTombstone(resource={self.resource}, object_id={self.object_id})>"
+
+
+class OutboxMessage(Base):
+    """Side effect recorded in the same transaction as the write that caused it."""
+
+    __tablename__ = "outbox_messages"
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String(64), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Next time a relay may pick the message up; NULL once retries are exhausted.
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_outbox_messages_available", "available_at", "id"),
+    )
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, topic={self.topic}, attempts={self.attempts})>"
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "changes:"
+
+Listener = Callable[[int, dict[str, Any]], None]
+
+
+class InProcessHub:
+    """Fan-out of change notifications to listeners living in the same process."""
+
+    def __init__(self) -> None:
+        self._listeners: list[Listener] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Listener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def publish(self, user_id: int, message: dict[str, Any]) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(user_id, message)
+            except Exception:
+                logger.exception("Change listener failed")
+
+
+class RedisPublisher:
+    """Publishes change notifications to ``changes:<user_id>`` Redis channels."""
+
+    def __init__(self, url: str):
+        self._url = url
+        self._client = None
+
+    def publish(self, user_id: int, message: dict[str, Any]) -> None:
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._url, socket_timeout=1.0)
+        self._client.publish(f"{CHANNEL_PREFIX}{user_id}", json.dumps(message))
+
+
+hub = InProcessHub()
+_publisher: RedisPublisher | InProcessHub | None = None
+
+
+def get_publisher() -> RedisPublisher | InProcessHub:
+    """Redis when ``CHANGE_BROKER=redis`` (default if ``REDIS_URL`` is set), else in-process."""
+
+    global _publisher
+    if _publisher is None:
+        redis_url = os.getenv("REDIS_URL")
+        backend = os.getenv("CHANGE_BROKER", "redis" if redis_url else "memory")
+        if backend == "redis" and redis_url:
+            _publisher = RedisPublisher(redis_url)
+        else:
+            _publisher = hub
+    return _publisher
+
+
+CHANGE_TOPIC = "change"
+
+
+def enqueue_change(
+    session: Session, user_id: int, resource: str, action: str, object_id: int
+) -> None:
+    """Queue a change notification in the writer's transaction (see ``shared.outbox``)."""
+
+    from shared.outbox import enqueue
+
+    payload = {"resource": resource, "action": action, "id": object_id}
+    enqueue(session, CHANGE_TOPIC, payload, user_id)
+
+
+class ChangeSink:
+    """Outbox sink publishing queued change notifications; a failed publish is retried."""
+
+    topic = CHANGE_TOPIC
+
+    def deliver(self, messages) -> None:
+        publisher = get_publisher()
+        for message in messages:
+            publisher.publish(message.user_id, {"type": "change", **message.payload})
+
+
+def crosses_processes() -> bool:
+    """Whether messages published here reach other processes (Redis) or only this one."""
+
+    return get_publisher() is not hub
+
+
+_relay_lock = threading.Lock()
+_relay_users = 0
+_relay_stop: Callable[[], None] | None = None
+
+
+def start_change_relay() -> Callable[[], None]:
+    """Deliver change notifications from within this process; returns a stop callback.
+
+    Only without Redis: subscribers can then only be in this process, and a
+    separate ``outbox_relay.py`` would publish into its own. One relay per
+    process (services sharing a monolith share it), one thread per shard.
+    """
+
+    global _relay_users, _relay_stop
+    if crosses_processes():
+        return lambda: None
+    with _relay_lock:
+        _relay_users += 1
+        if _relay_stop is None:
+            _relay_stop = _run_change_relays()
+
+    def stop() -> None:
+        global _relay_users, _relay_stop
+        with _relay_lock:
+            _relay_users -= 1
+            if _relay_users == 0 and _relay_stop is not None:
+                _relay_stop()
+                _relay_stop = None
+
+    return stop
+
+
+def _run_change_relays() -> Callable[[], None]:
+    from shared import sharding
+    from shared.database import SessionLocal
+    from shared.outbox import OutboxRelay
+
+    factories = (
+        [sharding.shard_sessionmaker(index) for index in range(sharding.shard_count())]
+        if sharding.enabled()
+        else [SessionLocal]
+    )
+    relays = [OutboxRelay(factory, [ChangeSink()], concurrency=1) for factory in factories]
+    threads = [
+        threading.Thread(target=relay.run, name="change-relay", daemon=True) for relay in relays
+    ]
+    for thread in threads:
+        thread.start()
+
+    def stop() -> None:
+        for relay in relays:
+            relay.stop()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    return stop
+
+
+def publish_message(user_id: int, message: dict[str, Any]) -> None:
+    try:
+        get_publisher().publish(user_id, message)
+    except Exception:
+        logger.warning("Failed to publish notification for user %s", user_id, exc_info=True)
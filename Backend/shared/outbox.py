@@ -0,0 +1,230 @@
+"""Transactional outbox: side effects are stored with the write and delivered later.
+
+Writers call :func:`enqueue` before committing, so a message exists if and
+only if the change that caused it was committed. :class:`OutboxRelay` runs
+in a separate process, claims due messages in batches and hands them to
+per-topic sinks. Delivery is at-least-once; sinks should tolerate repeats.
+Relays running in the writer's process are woken as soon as a transaction
+with messages commits instead of waiting for their next poll.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Protocol
+
+from sqlalchemy import delete, event
+from sqlalchemy.orm import Session
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Envelope:
+    """A claimed outbox message, detached from the session."""
+
+    id: int
+    topic: str
+    user_id: int | None
+    payload: dict[str, Any]
+    attempts: int
+
+
+class OutboxSink(Protocol):
+    """Delivers all messages of one topic; raising fails (and retries) the whole batch."""
+
+    topic: str
+
+    def deliver(self, messages: Sequence[Envelope]) -> None:
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    base: float = 5.0
+    cap: float = 3600.0
+    max_attempts: int = 8
+
+    def delay(self, attempts: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempts - 1)))
+
+
+def enqueue(
+    session: Session, topic: str, payload: dict[str, Any], user_id: int | None = None
+) -> None:
+    """Add a message to the caller's transaction; it is sent only if the caller commits."""
+
+    session.add(OutboxMessage(topic=topic, user_id=user_id, payload=json.dumps(payload)))
+    session.info[_PENDING_KEY] = True
+
+
+# Set in ``session.info`` by enqueue(); relays of this process are woken on commit.
+_PENDING_KEY = "outbox_pending"
+_relays: list[OutboxRelay] = []
+_relays_lock = threading.Lock()
+
+
+class OutboxRelay:
+    """Claims due outbox messages and delivers them through sinks.
+
+    Rows are locked with ``FOR UPDATE SKIP LOCKED`` and leased by pushing
+    ``available_at`` forward, so several relays can run side by side without
+    delivering the same batch twice. Each topic's batch goes to its sink in
+    one call; up to ``concurrency`` sinks deliver in parallel.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        sinks: Sequence[OutboxSink],
+        *,
+        batch_size: int = 200,
+        concurrency: int = 4,
+        lease: float = 300.0,
+        poll_interval: float = 1.0,
+        retry: RetryPolicy = RetryPolicy(),
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self._session_factory = session_factory
+        self._sinks = {sink.topic: sink for sink in sinks}
+        self._batch_size = batch_size
+        self._lease = timedelta(seconds=lease)
+        self._poll_interval = poll_interval
+        self._retry = retry
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="outbox")
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def wake(self) -> None:
+        """Look for messages now instead of at the next poll."""
+
+        self._wakeup.set()
+
+    def run(self) -> None:
+        logger.info("Outbox relay started for topics: %s", ", ".join(sorted(self._sinks)))
+        with _relays_lock:
+            _relays.append(self)
+        try:
+            while not self._stopped.is_set():
+                # A full batch means there is likely more waiting; don't sleep.
+                if self.run_once() < self._batch_size:
+                    self._wakeup.wait(self._poll_interval)
+                    self._wakeup.clear()
+        finally:
+            with _relays_lock:
+                _relays.remove(self)
+            self._executor.shutdown(wait=True)
+
+    def run_once(self) -> int:
+        """Claim and deliver one batch; returns the number of messages claimed."""
+
+        messages = self._claim()
+        if not messages:
+            return 0
+
+        by_topic: dict[str, list[Envelope]] = defaultdict(list)
+        for message in messages:
+            by_topic[message.topic].append(message)
+        futures = {
+            topic: self._executor.submit(self._sinks[topic].deliver, batch)
+            for topic, batch in by_topic.items()
+        }
+
+        delivered: list[int] = []
+        failed: list[tuple[Envelope, str]] = []
+        for topic, future in futures.items():
+            try:
+                future.result()
+            except Exception as exc:
+                logger.warning(
+                    "Outbox sink %s failed for %d message(s)",
+                    topic,
+                    len(by_topic[topic]),
+                    exc_info=True,
+                )
+                failed.extend((message, repr(exc)) for message in by_topic[topic])
+            else:
+                delivered.extend(message.id for message in by_topic[topic])
+        self._settle(delivered, failed)
+        return len(messages)
+
+    def _claim(self) -> list[Envelope]:
+        now = self._clock()
+        with self._session_factory() as session:
+            rows = (
+                session.query(OutboxMessage)
+                .filter(
+                    OutboxMessage.available_at <= now,
+                    OutboxMessage.topic.in_(list(self._sinks)),
+                )
+                .order_by(OutboxMessage.available_at, OutboxMessage.id)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            claimed = []
+            for row in rows:
+                row.attempts += 1
+                row.available_at = now + self._lease
+                claimed.append(
+                    Envelope(row.id, row.topic, row.user_id, json.loads(row.payload), row.attempts)
+                )
+            session.commit()
+        return claimed
+
+    def _settle(self, delivered: list[int], failed: list[tuple[Envelope, str]]) -> None:
+        now = self._clock()
+        with self._session_factory() as session:
+            if delivered:
+                session.execute(
+                    delete(OutboxMessage)
+                    .where(OutboxMessage.id.in_(delivered))
+                    .execution_options(synchronize_session=False)
+                )
+            for message, error in failed:
+                if message.attempts >= self._retry.max_attempts:
+                    logger.error(
+                        "Outbox message %s (%s) gave up after %d attempts",
+                        message.id,
+                        message.topic,
+                        message.attempts,
+                    )
+                    available_at = None
+                else:
+                    available_at = now + timedelta(seconds=self._retry.delay(message.attempts))
+                session.query(OutboxMessage).filter(OutboxMessage.id == message.id).update(
+                    {"available_at": available_at, "last_error": error[:1000]},
+                    synchronize_session=False,
+                )
+            session.commit()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relays(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        with _relays_lock:
+            relays = list(_relays)
+        for relay in relays:
+            relay.wake()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
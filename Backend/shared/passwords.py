@@ -0,0 +1,23 @@
+"""bcrypt calls that run in auth-service's password worker processes.
+
+Worker processes import functions by module name, so these live in a module
+whose name is the same however the service was started, including inside
+the gateway in monolith mode, where ``app`` is the gateway's package.
+"""
+
+import bcrypt
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    except ValueError:
+        return False
+
+
+def warm_up() -> None:
+    """Runs once per worker so processes are spawned before the first login."""
@@ -0,0 +1,264 @@
+"""On-demand statistical CPU profiling of a running service.
+
+A sampler thread reads the stacks of all other threads with
+``sys._current_frames()`` every few milliseconds; nothing is instrumented,
+so the overhead is limited to the sampling itself and only while a profile
+is being taken. Profiles are returned as collapsed stacks (``flamegraph.pl``,
+speedscope, inferno) or as speedscope JSON.
+
+Everything is disabled unless ``PROFILER_TOKEN`` is set, and every call must
+send it in ``X-Profiler-Token``:
+
+* ``GET /debug/profile?seconds=10&format=speedscope`` samples the whole
+  process for ``seconds``; threads blocked in ``select``/``wait`` are
+  skipped unless ``idle=true``;
+* a request sent with ``X-Profile: 1`` is profiled on its own; the response
+  gets an ``X-Profile-Id`` header and the profile is kept for a while under
+  ``GET /debug/profile/{id}``. Other requests running at the same time
+  appear in it too.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any
+
+import orjson
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+
+from shared.cache import TTLCache
+
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")
+MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+# Leaf frames of threads that are blocked waiting rather than running; their
+# samples are dropped unless idle stacks are asked for.
+IDLE_LEAVES = {
+    ("select", "selectors.py"),
+    ("wait", "threading.py"),
+    ("_worker", "thread.py"),
+    ("run_forever", "base_events.py"),
+}
+
+_recent_profiles = TTLCache(maxsize=20, ttl=600)
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a process-wide profile is already running."""
+
+
+class Profile:
+    """Stack samples grouped by thread name."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: dict[str, Counter[tuple[str, ...]]] = {}
+
+    def add(self, thread: str, stack: tuple[str, ...]) -> None:
+        self.samples.setdefault(thread, Counter())[stack] += 1
+
+    def collapsed(self) -> str:
+        lines = [
+            f"{thread};{';'.join(stack)} {count}"
+            for thread, stacks in sorted(self.samples.items())
+            for stack, count in stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "profile") -> dict[str, Any]:
+        frames: list[dict[str, Any]] = []
+        frame_index: dict[str, int] = {}
+        profiles = []
+        for thread, stacks in sorted(self.samples.items()):
+            samples, weights = [], []
+            for stack, count in stacks.most_common():
+                indexes = []
+                for label in stack:
+                    if label not in frame_index:
+                        frame_index[label] = len(frames)
+                        frames.append(_speedscope_frame(label))
+                    indexes.append(frame_index[label])
+                samples.append(indexes)
+                weights.append(count * self.interval)
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "shared.profiling",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+def _speedscope_frame(label: str) -> dict[str, Any]:
+    name, _, location = label.partition(" (")
+    path, _, line = location.rstrip(")").rpartition(":")
+    return {"name": name, "file": path, "line": int(line) if line.isdigit() else None}
+
+
+class Sampler:
+    """Samples all threads except its own until stopped."""
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.profile = Profile(interval)
+        self._interval = interval
+        self._include_idle = include_idle
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._labels: dict[Any, str] = {}
+
+    def start(self) -> Sampler:
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        return self.profile
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (not self._include_idle and _is_idle(frame)):
+                    continue
+                self.profile.add(names.get(ident, str(ident)), self._stack(frame))
+            if self._stop.wait(self._interval):
+                break
+
+    def _stack(self, frame) -> tuple[str, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = (
+                    f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                )
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (code.co_name, os.path.basename(code.co_filename)) in IDLE_LEAVES
+
+
+_busy = threading.Lock()
+
+
+def sample_process(seconds: float, interval: float, include_idle: bool = False) -> Profile:
+    """Blocking: sample every thread for ``seconds``; one profile at a time."""
+
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already being taken")
+    try:
+        sampler = Sampler(interval, include_idle).start()
+        time.sleep(seconds)
+        return sampler.stop()
+    finally:
+        _busy.release()
+
+
+def is_authorized(token: str | None) -> bool:
+    return bool(PROFILER_TOKEN) and token is not None and hmac.compare_digest(token, PROFILER_TOKEN)
+
+
+def render(profile: Profile, fmt: str, name: str) -> Response:
+    if fmt == "speedscope":
+        return Response(orjson.dumps(profile.speedscope(name)), media_type="application/json")
+    return Response(profile.collapsed(), media_type="text/plain")
+
+
+router = APIRouter(prefix="/debug/profile", tags=["Debug"], include_in_schema=False)
+
+
+def require_debug_token(token: str | None) -> None:
+    # Unknown to anyone without the token, including whether profiling is enabled.
+    if not is_authorized(token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+@router.get("")
+async def profile_process(
+    seconds: float = Query(default=10.0, gt=0),
+    interval_ms: float = Query(default=5.0, ge=1.0, le=100.0),
+    fmt: str = Query(default="collapsed", alias="format", pattern="^(collapsed|speedscope)$"),
+    idle: bool = Query(default=False, description="keep samples of waiting threads"),
+    token: str | None = Header(default=None, alias="X-Profiler-Token"),
+) -> Response:
+    require_debug_token(token)
+    seconds = min(seconds, MAX_SECONDS)
+    try:
+        profile = await asyncio.to_thread(sample_process, seconds, interval_ms / 1000, idle)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return render(profile, fmt, f"{seconds:g}s")
+
+
+@router.get("/{profile_id}")
+def get_request_profile(
+    profile_id: str,
+    fmt: str = Query(default="speedscope", alias="format", pattern="^(collapsed|speedscope)$"),
+    token: str | None = Header(default=None, alias="X-Profiler-Token"),
+) -> Response:
+    require_debug_token(token)
+    stored = _recent_profiles.get(profile_id)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    name, profile = stored
+    return render(profile, fmt, name)
+
+
+class ProfilingMiddleware:
+    """Profiles single requests sent with ``X-Profile: 1`` and a valid token."""
+
+    def __init__(self, app, interval: float = 0.001):
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILER_TOKEN:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", ()))
+        token = headers.get(b"x-profiler-token", b"").decode("latin-1")
+        if headers.get(b"x-profile") != b"1" or not is_authorized(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        sampler = Sampler(self.interval).start()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", ()), (b"x-profile-id", profile_id.encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile = sampler.stop()
+            _recent_profiles.set(profile_id, (f"{scope['method']} {scope['path']}", profile))
@@ -0,0 +1,175 @@
+"""Revoked-token checks that stay off the database for almost every request.
+
+Revoked ``jti`` values live in the ``revoked_tokens`` table. Each process
+mirrors the unexpired ones into a Bloom filter, which answers "definitely
+not revoked" for nearly every token with a few hash computations; only
+filter hits are confirmed against the table, and so is every token while
+no filter has been built yet. The filter picks up new rows incrementally
+every ``refresh_interval`` seconds, paging by ``revoked_at`` as set by the
+database clock, and is rebuilt from scratch every ``rebuild_interval`` to
+shed expired entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from shared.models import RevokedToken
+
+# Rows committed out of order are re-read for this long before the newest ``revoked_at`` seen.
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing of one BLAKE2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key: str) -> None:
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        # Re-adding a known key (refresh overlap) does not count towards capacity.
+        if added:
+            self.count += 1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return ((first + index * second) % size for index in range(self.hashes))
+
+
+class RevocationList:
+    """Per-process view of ``revoked_tokens`` backed by a Bloom filter."""
+
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+        refresh_interval: float = 2.0,
+        rebuild_interval: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._refresh_interval = refresh_interval
+        self._rebuild_interval = rebuild_interval
+        self._clock = clock
+        self._filter: BloomFilter | None = None
+        self._cursor: datetime | None = None
+        self._next_refresh = 0.0
+        self._rebuild_at = 0.0
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.filter_hits = 0
+        self.revoked = 0
+
+    def is_revoked(self, jti: str | None, session: Session) -> bool:
+        if not jti:
+            return False
+        self.checks += 1
+        self._maybe_refresh(session)
+        current = self._filter
+        if current is not None and jti not in current:
+            return False
+        self.filter_hits += 1
+        revoked = session.execute(select(exists().where(RevokedToken.jti == jti))).scalar()
+        if revoked:
+            self.revoked += 1
+        return bool(revoked)
+
+    def add(self, jti: str) -> None:
+        """Make a revocation made by this process visible here without waiting for a refresh."""
+
+        if self._filter is not None:
+            self._filter.add(jti)
+
+    def stats(self) -> dict[str, float]:
+        current = self._filter
+        return {
+            "entries": current.count if current else 0,
+            "filter_bytes": current.nbytes if current else 0,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "revoked": self.revoked,
+        }
+
+    def _maybe_refresh(self, session: Session) -> None:
+        now = self._clock()
+        if now < self._next_refresh:
+            return
+        # Until the first build every caller waits; afterwards one thread
+        # refreshes while the others keep using the current filter.
+        if not self._lock.acquire(blocking=self._filter is None):
+            return
+        try:
+            if now < self._next_refresh:
+                return
+            if now >= self._rebuild_at or self._filter.count >= self._filter.capacity:
+                self._rebuild(session)
+                self._rebuild_at = now + self._rebuild_interval
+            else:
+                self._load_since(session, self._filter)
+            self._next_refresh = now + self._refresh_interval
+        finally:
+            self._lock.release()
+
+    def _rebuild(self, session: Session) -> None:
+        live = session.execute(_live_query()).all()
+        rebuilt = BloomFilter(max(self._capacity, 2 * len(live)), self._error_rate)
+        self._cursor = None
+        self._add_rows(rebuilt, live)
+        self._filter = rebuilt
+
+    def _load_since(self, session: Session, target: BloomFilter) -> None:
+        query = _live_query()
+        if self._cursor is not None:
+            query = query.where(RevokedToken.revoked_at >= self._cursor - _REFRESH_OVERLAP)
+        self._add_rows(target, session.execute(query))
+
+    def _add_rows(self, target: BloomFilter, rows) -> None:
+        # The cursor only moves by timestamps the database wrote, never by this
+        # process's clock, so a skewed clock cannot skip a revocation.
+        for jti, revoked_at in rows:
+            target.add(jti)
+            if self._cursor is None or revoked_at > self._cursor:
+                self._cursor = revoked_at
+
+
+def _live_query():
+    return select(RevokedToken.jti, RevokedToken.revoked_at).where(
+        RevokedToken.expires_at > datetime.utcnow()
+    )
+
+
+revocation_list = RevocationList(
+    capacity=int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000")),
+    refresh_interval=float(os.getenv("REVOCATION_REFRESH_INTERVAL", "2")),
+)
@@ -0,0 +1,113 @@
+"""Creation of missing tables, kept off the service startup path.
+
+Run once per deployment (from the Backend directory)::
+
+    python -m shared.schema
+
+Services only do this themselves when ``DB_CREATE_SCHEMA=true``. With
+``SHARD_URLS`` set, the global tables go to ``DATABASE_URL`` and the per-user
+ones to every shard (see ``shared.sharding``). Tables created by an older
+release get the columns and indexes added to their models since, and events
+and todos stored before delta sync existed get their change numbers here, so
+a full sync returns them. Every step is skipped when already done.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from shared import sharding
+from shared.database import get_engine
+from shared.models import Base, Event, Todo
+from shared.sync import backfill_sync_seq
+
+# Models numbered for delta sync, with the resource name their services use.
+SYNC_MODELS = ((Event, "events"), (Todo, "todos"))
+
+
+def create_schema(engine: Engine | None = None) -> None:
+    if engine is None and sharding.enabled():
+        names = sharding.global_tables()
+        _create_all(get_engine(), [t for t in Base.metadata.sorted_tables if t.name in names])
+        tables = sharding.shard_tables()
+        for index in range(sharding.shard_count()):
+            _create_all(sharding.get_shard_engine(index), tables)
+            _backfill(sharding.get_shard_engine(index))
+        return
+    _create_all(engine or get_engine(), Base.metadata.sorted_tables)
+    _backfill(engine or get_engine())
+
+
+def _create_all(engine: Engine, tables) -> None:
+    try:
+        # Shard tables are copies in their own MetaData when foreign keys are dropped.
+        tables[0].metadata.create_all(bind=engine, tables=tables)
+    except IntegrityError as exc:
+        # Several services creating the schema at once race on enum types.
+        if "pg_type_typname_nsp_index" not in str(exc):
+            raise
+    _upgrade(engine, tables)
+
+
+def _upgrade(engine: Engine, tables) -> None:
+    """Add model columns and indexes missing from tables that already existed.
+
+    ``create_all`` skips existing tables. New columns must be nullable or have
+    a server default, as the tables may hold rows.
+    """
+
+    for table in tables:
+        present = _column_names(engine, table)
+        for column in table.columns:
+            if column.name in present:
+                continue
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(_add_column_ddl(engine, column)))
+            except DBAPIError:
+                # Another service upgrading the same database may have won the race.
+                if column.name not in _column_names(engine, table):
+                    raise
+        present = _index_names(engine, table)
+        for index in table.indexes:
+            if index.name in present:
+                continue
+            try:
+                index.create(bind=engine)
+            except DBAPIError:
+                if index.name not in _index_names(engine, table):
+                    raise
+
+
+def _add_column_ddl(engine: Engine, column) -> str:
+    preparer = engine.dialect.identifier_preparer
+    ddl = str(CreateColumn(column).compile(dialect=engine.dialect))
+    for key in column.foreign_keys:
+        target = key.column
+        ddl += f" REFERENCES {preparer.format_table(target.table)} ({preparer.quote(target.name)})"
+        if key.ondelete:
+            ddl += f" ON DELETE {key.ondelete}"
+    return f"ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN {ddl}"
+
+
+def _column_names(engine: Engine, table) -> set[str]:
+    return {column["name"] for column in inspect(engine).get_columns(table.name)}
+
+
+def _index_names(engine: Engine, table) -> set[str]:
+    return {index["name"] for index in inspect(engine).get_indexes(table.name)}
+
+
+def _backfill(engine: Engine) -> None:
+    with Session(bind=engine) as session:
+        for model, resource in SYNC_MODELS:
+            backfill_sync_seq(session, model, resource)
+
+
+if __name__ == "__main__":
+    create_schema()
+    print("Schema is up to date")
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import logging
+import os
+import threading
+from collections.abc import Callable
 from dataclasses import dataclass
 
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
 from shared.auth_utils import JWTHandler
+from shared.cache import TTLCache
 from shared.models import User
+from shared.revocation import RevocationList, revocation_list
+from shared.sharding import bind_user
+from shared.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Redis channel carrying ids of users whose cached principal must be dropped.
+PRINCIPAL_CHANNEL = "principals:invalidate"
 
 
 class SecurityError(Exception):
@@ -24,30 +38,220 @@ class InactiveUserError(SecurityError):
     """Raised when the subject user is disabled."""
 
 
+@dataclass(slots=True, frozen=True)
+class Principal:
+    """The part of a user needed to authorize a request."""
+
+    id: int
+    is_active: bool
+    # ``updated_at`` in microseconds; changes whenever the user row does.
+    version: int
+    token_generation: int = 0
+
+
 @dataclass(slots=True)
 class AuthContext:
     """Resolved authentication context."""
 
-    user: User
+    user: Principal
 
 
-def resolve_user_from_token(token: str, session: Session) -> AuthContext:
-    """Decode JWT token and load the corresponding active user."""
+class PrincipalCache:
+    """Per-process TTL cache of principals keyed by user id.
 
-    try:
-        payload = JWTHandler.verify_token(token)
-        raw_user_id = payload.get("sub")
-        user_id = int(raw_user_id)
-    except Exception as exc:
-        raise InvalidTokenError("Невалидный токен") from exc
-
-    user = session.query(User).filter(User.id == user_id).first()
-    if not user:
+    Like ``SummaryCache`` each user has a generation that is part of the key.
+    A principal loaded while an invalidation was in flight is stored under
+    the old generation and never served, so invalidation cannot be undone by
+    a concurrent miss. The TTL bounds staleness when an invalidation is lost.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(
+        self, user_id: int, loader: Callable[[], Principal | None]
+    ) -> Principal | None:
+        key = (user_id, self._generations.get(user_id, 0))
+        principal = self._entries.get(key)
+        if principal is None:
+            principal = loader()
+            # Unknown users are not cached: they may be created any moment.
+            if principal is not None:
+                self._entries.set(key, principal)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations.clear()
+        self._entries.clear()
+
+    def stats(self) -> dict[str, float]:
+        return self._entries.stats()
+
+
+principal_cache = PrincipalCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "30")),
+)
+
+
+def resolve_user_from_token(
+    token: str,
+    session: Session,
+    cache: PrincipalCache = principal_cache,
+    revoked: RevocationList = revocation_list,
+) -> AuthContext:
+    """Decode JWT token and resolve the principal of the corresponding active user."""
+
+    with tracer.span("resolve_user_from_token"):
+        return _resolve(token, session, cache, revoked)
+
+
+def _resolve(
+    token: str, session: Session, cache: PrincipalCache, revoked: RevocationList
+) -> AuthContext:
+    with tracer.span("jwt.verify"):
+        try:
+            payload = JWTHandler.verify_token(token)
+            raw_user_id = payload.get("sub")
+            user_id = int(raw_user_id)
+        except Exception as exc:
+            raise InvalidTokenError("Невалидный токен") from exc
+
+    # The user's rows (and with SHARD_USERS=colocated the user) live on its shard.
+    bind_user(session, user_id)
+    if revoked.is_revoked(payload.get("jti"), session):
+        raise InvalidTokenError("Токен отозван")
+
+    with tracer.span("principal.lookup"):
+        principal = cache.get_or_load(user_id, lambda: _load_principal(session, user_id))
+    if principal is None:
         raise UserNotFoundError("Пользователь не найден")
 
-    if not user.is_active:
+    if not principal.is_active:
         raise InactiveUserError("Пользователь неактивен")
 
-    return AuthContext(user=user)
+    if payload.get("gen", 0) < principal.token_generation:
+        raise InvalidTokenError("Токен отозван")
+
+    return AuthContext(user=principal)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop the cached principal here and, when Redis is configured, in every process."""
+
+    principal_cache.invalidate(user_id)
+    redis_url = _redis_url()
+    if redis_url is None:
+        return
+    try:
+        _redis_client(redis_url).publish(PRINCIPAL_CHANNEL, str(user_id))
+    except Exception:
+        logger.warning("Failed to publish principal invalidation for %s", user_id, exc_info=True)
+
+
+def check_principal_broadcast() -> None:
+    """Warn at start-up when invalidations cannot reach other processes.
+
+    Without Redis, services in other processes keep accepting tokens of
+    disabled or logged-out-everywhere users until ``PRINCIPAL_CACHE_TTL``.
+    In monolith mode every service shares this process's cache.
+    """
+
+    if _redis_url() is None and os.getenv("GATEWAY_MODE") != "monolith":
+        logger.warning(
+            "REDIS_URL is not set (or CHANGE_BROKER is not redis): principal invalidations "
+            "stay in this process, other services see them after PRINCIPAL_CACHE_TTL"
+        )
+
+
+def start_principal_listener() -> Callable[[], None]:
+    """Apply invalidations published by other processes; returns a stop callback."""
+
+    redis_url = _redis_url()
+    if redis_url is None:
+        return lambda: None
+
+    def on_message(raw: dict) -> None:
+        try:
+            principal_cache.invalidate(int(raw["data"]))
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Ignoring malformed principal invalidation: %r", raw)
+
+    pubsub = _redis_client(redis_url).pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{PRINCIPAL_CHANNEL: on_message})
+    thread = pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+    return thread.stop
+
+
+def _load_principal(session: Session, user_id: int) -> Principal | None:
+    row = (
+        session.query(User.id, User.is_active, User.updated_at, User.token_generation)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    version = int(row.updated_at.timestamp() * 1_000_000) if row.updated_at else 0
+    return Principal(
+        id=row.id,
+        is_active=bool(row.is_active),
+        version=version,
+        token_generation=row.token_generation or 0,
+    )
+
+
+def _redis_url() -> str | None:
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url or os.getenv("CHANGE_BROKER", "redis") != "redis":
+        return None
+    return redis_url
+
+
+_redis_clients: dict[str, object] = {}
+
+
+def _redis_client(url: str):
+    client = _redis_clients.get(url)
+    if client is None:
+        import redis
+
+        client = _redis_clients[url] = redis.Redis.from_url(url, socket_timeout=1.0)
+    return client
+
+
+# Any ORM change to a user's active flag or token generation (or its
+# deletion) invalidates the principal once the transaction commits,
+# whichever service made it.
+_PENDING_KEY = "principal_invalidations"
+_PRINCIPAL_ATTRS = ("is_active", "token_generation")
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_user_changes(session: Session, flush_context, instances) -> None:
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        attrs = inspect(obj).attrs
+        if any(attrs[name].history.has_changes() for name in _PRINCIPAL_ATTRS):
+            session.info.setdefault(_PENDING_KEY, set()).add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            session.info.setdefault(_PENDING_KEY, set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_principal(user_id)
 
 
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,59 @@
+"""Direct JSON encoding of list responses.
+
+List endpoints select only the response columns and encode the rows
+straight to bytes, skipping ORM hydration and per-row Pydantic models.
+The output matches what FastAPI produces for the corresponding
+``response_model`` (see ``benchmarks/list_serialization.py``).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from operator import attrgetter
+from typing import Any
+
+import orjson
+from fastapi import Response
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when a ``fields=`` parameter names a column outside the whitelist."""
+
+
+def select_fields(
+    raw: str | None, allowed: Sequence[str], required: Sequence[str] = ("id",)
+) -> tuple[str, ...]:
+    """Parse ``fields=a,b,c`` into the allowed columns, in ``allowed`` order.
+
+    ``None`` or an empty value selects every allowed field; ``required``
+    fields are always included.
+    """
+
+    if not raw or not raw.strip():
+        return tuple(allowed)
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise InvalidFieldsError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}"
+        )
+    requested.update(required)
+    return tuple(name for name in allowed if name in requested)
+
+
+def encode_rows(rows: Iterable[Any], fields: Sequence[str]) -> bytes:
+    """JSON array of objects with ``fields`` taken from each row's attributes."""
+
+    values = _getter(fields)
+    return orjson.dumps([dict(zip(fields, values(row))) for row in rows])
+
+
+def rows_response(rows: Iterable[Any], fields: Sequence[str]) -> Response:
+    return Response(content=encode_rows(rows, fields), media_type="application/json")
+
+
+def _getter(fields: Sequence[str]) -> Callable[[Any], tuple]:
+    if len(fields) == 1:
+        single = attrgetter(fields[0])
+        return lambda row: (single(row),)
+    return attrgetter(*fields)
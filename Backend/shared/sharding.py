@@ -0,0 +1,369 @@
+"""Per-user data spread over several databases, chosen by ``user_id``.
+
+Off unless ``SHARD_URLS`` lists the shard databases (comma separated); then
+``DATABASE_URL`` is the global database. It keeps ``revoked_tokens``, the
+``shard_directory`` and, with ``SHARD_USERS=global`` (default), ``users``.
+Everything else, i.e. rows that belong to one user, lives on that user's
+shard; with ``SHARD_USERS=colocated`` so does the ``users`` row, and requests
+of events and todos never touch the global database except for revocations.
+
+A user's shard is a jump consistent hash of the id, so adding a shard moves
+only about ``1/N`` of the users, unless the ``shard_directory`` says
+otherwise: ``move_user`` copies a user's rows and records the new place
+there. With co-located users every user has a directory entry, which also
+allocates user ids and answers login lookups by e-mail and username.
+
+``SessionLocal`` sessions route each statement by table (``ShardedSession``).
+Statements on per-user tables go to the shard the session is bound to:
+``bind_user`` (done by ``resolve_user_from_token``) or ``shard_sessionmaker``
+for jobs that walk a whole shard.
+
+Rebalancing (from the Backend directory), best while the user is inactive;
+other processes keep routing to the old shard for up to
+``SHARD_DIRECTORY_TTL`` seconds:
+
+    python -m shared.sharding move --user-id 42 --to 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import threading
+from collections.abc import Callable
+
+from sqlalchemy import Table, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import visitors
+
+from shared.cache import TTLCache
+
+SHARD_URLS = [url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()]
+USERS_PLACEMENT = os.getenv("SHARD_USERS", "global")
+DIRECTORY_TTL = float(os.getenv("SHARD_DIRECTORY_TTL", "60"))
+
+if USERS_PLACEMENT not in ("global", "colocated"):
+    raise ValueError(f"Unknown SHARD_USERS: {USERS_PLACEMENT!r}, expected global or colocated")
+
+# ``session.info`` key of the shard a session works with.
+SHARD_KEY = "shard"
+
+
+class ShardNotSelectedError(RuntimeError):
+    """A per-user table was used before the session was bound to a user or shard."""
+
+
+def enabled() -> bool:
+    return bool(SHARD_URLS)
+
+
+def shard_count() -> int:
+    return len(SHARD_URLS)
+
+
+def users_colocated() -> bool:
+    return enabled() and USERS_PLACEMENT == "colocated"
+
+
+_GLOBAL_TABLES = frozenset(
+    {"revoked_tokens", "shard_directory"} | (set() if users_colocated() else {"users"})
+)
+
+
+def global_tables() -> frozenset[str]:
+    return _GLOBAL_TABLES
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Lamping and Veach's jump consistent hash of a 64-bit ``key``."""
+
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def hashed_shard(user_id: int, buckets: int | None = None) -> int:
+    # Sequential ids are mixed first; jump_hash expects well spread keys.
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, "big"), buckets or shard_count())
+
+
+class ShardRouter:
+    """``user_id`` -> shard: the directory entry if there is one, else the hash.
+
+    Both answers are cached for ``ttl`` seconds, so a lookup costs one query
+    on the global database per user and ``ttl``.
+    """
+
+    def __init__(self, ttl: float = DIRECTORY_TTL, maxsize: int = 100_000):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def shard_for(self, user_id: int, session: Session) -> int:
+        shard = self._cache.get(user_id)
+        if shard is None:
+            from shared.models import UserShard
+
+            shard = session.execute(
+                select(UserShard.shard).where(UserShard.user_id == user_id)
+            ).scalar()
+            if shard is None:
+                shard = hashed_shard(user_id)
+            self._cache.set(user_id, shard)
+        return shard
+
+    def remember(self, user_id: int, shard: int) -> None:
+        self._cache.set(user_id, shard)
+
+    def forget(self, user_id: int) -> None:
+        self._cache.pop(user_id)
+
+    def stats(self) -> dict[str, float]:
+        return self._cache.stats()
+
+
+router = ShardRouter()
+
+_engines: dict[int, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_shard_engine(index: int) -> Engine:
+    """Engine (and connection pool) of one shard, created on first use."""
+
+    engine = _engines.get(index)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(index)
+            if engine is None:
+                from shared.database import create_database_engine
+
+                engine = _engines[index] = create_database_engine(SHARD_URLS[index])
+    return engine
+
+
+def dispose_shard_engines() -> None:
+    for engine in _engines.values():
+        engine.dispose()
+
+
+def _table_names(mapper, clause) -> set[str]:
+    names = {mapper.local_table.name} if mapper is not None else set()
+    if clause is None or names - _GLOBAL_TABLES:
+        return names
+    # Every table the statement touches, including those only referenced in
+    # subqueries or EXISTS, which have no FROM of their own.
+    for element in visitors.iterate(clause):
+        table = element if isinstance(element, Table) else getattr(element, "table", None)
+        if isinstance(table, Table):
+            names.add(table.name)
+    return names
+
+
+class ShardedSession(Session):
+    """Sends statements on global tables to the global database, the rest to the bound shard."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        names = _table_names(mapper, clause)
+        shard = self.info.get(SHARD_KEY)
+        per_user = names - _GLOBAL_TABLES
+        if (names and not per_user) or (not names and shard is None):
+            from shared.database import get_engine
+
+            return get_engine()
+        if shard is None:
+            raise ShardNotSelectedError(f"No shard selected for a statement on {sorted(per_user)}")
+        return get_shard_engine(shard)
+
+
+def bind_user(session: Session, user_id: int) -> None:
+    """Route the session's per-user statements to the shard of ``user_id``."""
+
+    if enabled():
+        session.info[SHARD_KEY] = router.shard_for(user_id, session)
+
+
+def shard_sessionmaker(index: int) -> Callable[[], Session]:
+    """Session factory pinned to one shard, for workers that scan all of its users."""
+
+    from shared.database import SessionLocal
+
+    if not 0 <= index < max(shard_count(), 1):
+        raise ValueError(f"No shard {index}; SHARD_URLS lists {shard_count()}")
+
+    def open_session() -> Session:
+        return SessionLocal(info={SHARD_KEY: index})
+
+    return open_session
+
+
+def register_user(session: Session, email: str, username: str) -> int:
+    """Allocate the id of a new co-located user and bind the session to its shard.
+
+    The directory entry takes the id and makes e-mail and username unique
+    across shards; the caller inserts the ``users`` row and commits.
+    """
+
+    from shared.models import UserShard
+
+    entry = UserShard(email=email, username=username, shard=0)
+    session.add(entry)
+    session.flush()
+    entry.shard = hashed_shard(entry.user_id)
+    session.flush()
+    router.remember(entry.user_id, entry.shard)
+    session.info[SHARD_KEY] = entry.shard
+    return entry.user_id
+
+
+def find_user(
+    session: Session, *, email: str | None = None, username: str | None = None
+) -> int | None:
+    """Id of a co-located user by e-mail or username (bound to its shard), or ``None``."""
+
+    from shared.models import UserShard
+
+    if email is not None:
+        condition = UserShard.email == email
+    else:
+        condition = UserShard.username == username
+    row = session.execute(select(UserShard.user_id, UserShard.shard).where(condition)).first()
+    if row is None:
+        return None
+    router.remember(row.user_id, row.shard)
+    session.info[SHARD_KEY] = row.shard
+    return row.user_id
+
+
+def shard_tables(colocated: bool | None = None):
+    """Tables created on every shard; without foreign keys to a global ``users``."""
+
+    from sqlalchemy import MetaData
+
+    from shared.models import Base
+
+    colocated = users_colocated() if colocated is None else colocated
+    excluded = {"revoked_tokens", "shard_directory"} | (set() if colocated else {"users"})
+    tables = [table for table in Base.metadata.sorted_tables if table.name not in excluded]
+    if colocated:
+        return tables
+    metadata = MetaData()
+    copies = []
+    for table in tables:
+        copy = table.to_metadata(metadata)
+        for constraint in list(copy.foreign_key_constraints):
+            if any(key.target_fullname.startswith("users.") for key in constraint.elements):
+                copy.constraints.discard(constraint)
+                for key in constraint.elements:
+                    key.parent.foreign_keys.discard(key)
+                    copy.foreign_keys.discard(key)
+        copies.append(copy)
+    return copies
+
+
+def move_user(user_id: int, target: int) -> dict[str, int]:
+    """Copy a user's rows to shard ``target``, point the directory there, delete the old rows.
+
+    Row ids are per shard, so copied rows get new ones (references between
+    events follow). Tombstones are dropped and sync cursors marked purged up
+    to their last number: the user's clients do a full resync instead of
+    applying changes to ids that no longer exist.
+    """
+
+    from sqlalchemy import delete, insert
+    from sqlalchemy.orm import sessionmaker
+
+    from shared.database import SessionLocal, get_engine
+    from shared.models import UserShard
+
+    if not 0 <= target < shard_count():
+        raise ValueError(f"No shard {target}; SHARD_URLS lists {shard_count()}")
+    with SessionLocal() as session:
+        source = router.shard_for(user_id, session)
+    if source == target:
+        return {}
+
+    tables = [table for table in shard_tables() if "user_id" in table.c or table.name == "users"]
+    copied: dict[str, int] = {}
+    with (
+        get_shard_engine(source).connect() as source_conn,
+        get_shard_engine(target).begin() as target_conn,
+    ):
+        for table in tables:
+            if table.name == "sync_tombstones":
+                continue
+            rows = [
+                dict(row._mapping)
+                for row in source_conn.execute(select(table).where(_owned_by(table, user_id)))
+            ]
+            copied[table.name] = len(rows)
+            if not rows:
+                continue
+            if table.name == "events":
+                _insert_events(target_conn, table, rows)
+                continue
+            if table.name == "sync_cursors":
+                for row in rows:
+                    row["purged_seq"] = row["seq"]
+            if table.name != "users" and list(table.primary_key.columns.keys()) == ["id"]:
+                for row in rows:
+                    del row["id"]
+            target_conn.execute(insert(table), rows)
+
+    with sessionmaker(bind=get_engine())() as session:
+        entry = session.get(UserShard, user_id)
+        if entry is None:
+            session.add(UserShard(user_id=user_id, shard=target))
+        else:
+            entry.shard = target
+        session.commit()
+    router.remember(user_id, target)
+
+    with get_shard_engine(source).begin() as source_conn:
+        for table in reversed(tables):
+            source_conn.execute(delete(table).where(_owned_by(table, user_id)))
+    return copied
+
+
+def _owned_by(table, user_id: int):
+    return (table.c.id if table.name == "users" else table.c.user_id) == user_id
+
+
+def _insert_events(conn, table, rows: list[dict]) -> None:
+    # Series before their overrides, so parent ids are known when children go in.
+    new_ids: dict[int, int] = {}
+    for row in sorted(rows, key=lambda item: item["recurrence_parent_id"] is not None):
+        old_id = row.pop("id")
+        if row["recurrence_parent_id"] is not None:
+            row["recurrence_parent_id"] = new_ids[row["recurrence_parent_id"]]
+        new_ids[old_id] = conn.execute(table.insert().values(**row)).inserted_primary_key[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shard maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    locate = commands.add_parser("locate", help="print the shard of a user")
+    locate.add_argument("--user-id", type=int, required=True)
+    move = commands.add_parser("move", help="move a user's rows to another shard")
+    move.add_argument("--user-id", type=int, required=True)
+    move.add_argument("--to", type=int, required=True)
+    args = parser.parse_args()
+    if not enabled():
+        parser.error("SHARD_URLS is not set")
+
+    if args.command == "locate":
+        from shared.database import SessionLocal
+
+        with SessionLocal() as session:
+            print(router.shard_for(args.user_id, session))
+    else:
+        copied = move_user(args.user_id, args.to)
+        print(", ".join(f"{name}: {count}" for name, count in copied.items()) or "Already there")
+
+
+if __name__ == "__main__":
+    main()
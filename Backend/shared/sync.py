@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from shared.database import insert_on_conflict
+from shared.models import SyncCursor, SyncTombstone
+
+TOMBSTONE_RETENTION = timedelta(days=int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", 30)))
+MAX_CHANGES_PAGE = 1000
+
+
+class SyncError(Exception):
+    """Base error for delta sync helpers."""
+
+
+class InvalidSyncTokenError(SyncError):
+    """Raised when a sync token cannot be parsed."""
+
+
+class SyncTokenExpiredError(SyncError):
+    """Raised when tombstones newer than the token were already purged."""
+
+
+@dataclass(slots=True)
+class ChangeSet:
+    """Page of changes after a sync token."""
+
+    upserts: list[Any] = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+    next_token: str = "0"
+    has_more: bool = False
+
+
+def next_sync_seq(session: Session, user_id: int, resource: str, count: int = 1) -> int:
+    """Allocate the next change number for ``user_id`` inside the current transaction.
+
+    The cursor row stays locked until commit, so a user's changes become
+    visible in sequence order and readers never skip an uncommitted number.
+    With ``count`` > 1 a block is reserved and its last number returned.
+    """
+
+    statement = (
+        update(SyncCursor)
+        .where(SyncCursor.user_id == user_id, SyncCursor.resource == resource)
+        .values(seq=SyncCursor.seq + count)
+        .returning(SyncCursor.seq)
+    )
+    seq = session.execute(statement).scalar()
+    if seq is None:
+        # First change of this user; a concurrent first change may create the cursor first.
+        cursor = {"user_id": user_id, "resource": resource, "seq": count, "purged_seq": 0}
+        if insert_on_conflict(session, SyncCursor, cursor):
+            return count
+        seq = session.execute(statement).scalar()
+    return seq
+
+
+def backfill_sync_seq(session: Session, model: Any, resource: str) -> int:
+    """Number rows written before change tracking existed, so a full sync returns them.
+
+    Each user's rows get a block of fresh numbers, oldest id first, and are
+    committed per user. Returns how many rows were numbered.
+    """
+
+    untracked = model.sync_seq.is_(None)
+    user_ids = [user_id for (user_id,) in session.query(model.user_id).filter(untracked).distinct()]
+    numbered = 0
+    for user_id in user_ids:
+        ids = [
+            row_id
+            for (row_id,) in session.query(model.id)
+            .filter(model.user_id == user_id, untracked)
+            .order_by(model.id)
+        ]
+        last_seq = next_sync_seq(session, user_id, resource, count=len(ids))
+        first_seq = last_seq - len(ids) + 1
+        session.execute(
+            update(model),
+            [{"id": row_id, "sync_seq": first_seq + offset} for offset, row_id in enumerate(ids)],
+        )
+        session.commit()
+        numbered += len(ids)
+    return numbered
+
+
+def record_tombstones(session: Session, user_id: int, resource: str, object_ids: list[int]) -> None:
+    """Remember deleted rows and drop the user's tombstones past retention."""
+
+    for object_id in object_ids:
+        session.add(
+            SyncTombstone(
+                user_id=user_id,
+                resource=resource,
+                object_id=object_id,
+                sync_seq=next_sync_seq(session, user_id, resource),
+            )
+        )
+    purge_tombstones(session, user_id, resource, datetime.utcnow() - TOMBSTONE_RETENTION)
+
+
+def purge_tombstones(session: Session, user_id: int, resource: str, older_than: datetime) -> int:
+    expired = (
+        SyncTombstone.user_id == user_id,
+        SyncTombstone.resource == resource,
+        SyncTombstone.deleted_at < older_than,
+    )
+    # Tombstones are purged oldest first, so the highest purged number only grows.
+    purged_seq = session.query(func.max(SyncTombstone.sync_seq)).filter(*expired).scalar()
+    if purged_seq is None:
+        return 0
+    deleted = session.query(SyncTombstone).filter(*expired).delete(synchronize_session=False)
+    session.execute(
+        update(SyncCursor)
+        .where(SyncCursor.user_id == user_id, SyncCursor.resource == resource)
+        .values(purged_seq=purged_seq)
+    )
+    return deleted
+
+
+def parse_sync_token(token: str | None) -> int:
+    if not token:
+        return 0
+    try:
+        since = int(token)
+    except ValueError:
+        raise InvalidSyncTokenError("Невалидный sync token") from None
+    if since < 0:
+        raise InvalidSyncTokenError("Невалидный sync token")
+    return since
+
+
+def read_changes(
+    session: Session,
+    model: Any,
+    user_id: int,
+    resource: str,
+    token: str | None,
+    limit: int = MAX_CHANGES_PAGE,
+) -> ChangeSet:
+    """Return rows changed and ids deleted after ``token`` in sequence order."""
+
+    since = parse_sync_token(token)
+    cursor = session.get(SyncCursor, (user_id, resource))
+    if cursor is None:
+        return ChangeSet(next_token=str(since))
+    if since and since < cursor.purged_seq:
+        raise SyncTokenExpiredError("Sync token expired, full resync required")
+
+    # Only numbers up to the committed cursor are read, so the token never
+    # moves past a change that is still being written.
+    upper = cursor.seq
+    upserts = (
+        session.query(model)
+        .filter(model.user_id == user_id, model.sync_seq > since, model.sync_seq <= upper)
+        .order_by(model.sync_seq)
+        .limit(limit + 1)
+        .all()
+    )
+    tombstones = []
+    if since:
+        tombstones = (
+            session.query(SyncTombstone.sync_seq, SyncTombstone.object_id)
+            .filter(
+                SyncTombstone.user_id == user_id,
+                SyncTombstone.resource == resource,
+                SyncTombstone.sync_seq > since,
+                SyncTombstone.sync_seq <= upper,
+            )
+            .order_by(SyncTombstone.sync_seq)
+            .limit(limit + 1)
+            .all()
+        )
+
+    changes = sorted(
+        [(row.sync_seq, row, None) for row in upserts]
+        + [(seq, None, object_id) for seq, object_id in tombstones],
+        key=lambda change: change[0],
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    result = ChangeSet(has_more=has_more)
+    for _, row, object_id in changes:
+        if row is not None:
+            result.upserts.append(row)
+        else:
+            result.deleted.append(object_id)
+    result.next_token = str(changes[-1][0] if has_more else max(upper, since))
+    return result
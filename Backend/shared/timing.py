@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from shared.database import track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Reports the database cost of every request in a ``Server-Timing`` header.
+
+    ``db`` carries the total statement time and count, ``app`` the time until
+    the response headers were sent. Statements repeated within one request
+    are logged as N+1 suspects with the endpoint that ran them. Queries made
+    after the headers (streamed bodies) are only counted in that log line.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        with track_queries() as stats:
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    app_ms = (time.perf_counter() - started) * 1000
+                    value = (
+                        f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", '
+                        f"app;dur={app_ms:.1f}"
+                    )
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                for statement, count in stats.repeated():
+                    logger.warning(
+                        "Possible N+1 in %s %s: %d x %s",
+                        scope["method"],
+                        scope["path"],
+                        count,
+                        " ".join(statement.split()),
+                    )
@@ -0,0 +1,410 @@
+"""Lightweight distributed tracing with W3C ``traceparent`` propagation.
+
+The sampling decision is made once per trace, where it starts (normally the
+gateway), and travels with the ``traceparent`` flags. The gateway ignores
+a ``traceparent`` sent by clients, so they cannot force sampling; only the
+hops between our own services continue a caller's trace. Every span of an
+unsampled request is a no-op that costs one context-variable lookup.
+
+Spans are handed to an exporter chosen by ``TRACE_EXPORTER``:
+
+* ``none`` (default): tracing disabled;
+* ``otlp``: batched OTLP/HTTP JSON to ``OTEL_EXPORTER_OTLP_ENDPOINT``
+  (Jaeger, Tempo, the OpenTelemetry Collector, ...);
+* ``file``: one JSON object per span appended to ``TRACE_FILE``;
+* ``memory``: kept in ``tracer.exporter.spans``, for tests and scripts.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_ROOT_SPAN_ID = "0" * 16
+
+# OTLP span kinds.
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+
+
+@dataclass(slots=True, frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: str | None) -> SpanContext | None:
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, sampled=bool(int(flags, 16) & 1))
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: str | None
+    kind: int = KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: bool = False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def as_dict(self, service: str) -> dict[str, Any]:
+        return {
+            "service": service,
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[SpanContext | None] = ContextVar("trace_context", default=None)
+
+
+def current_context() -> SpanContext | None:
+    return _current.get()
+
+
+class InMemoryExporter:
+    def __init__(self) -> None:
+        self.spans: list[dict[str, Any]] = []
+
+    def export(self, span: Span, service: str) -> None:
+        self.spans.append(span.as_dict(service))
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileExporter:
+    """Appends spans as JSON lines; ``benchmarks/trace_breakdown.py`` reads them."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span, service: str) -> None:
+        line = json.dumps(span.as_dict(service), ensure_ascii=False, default=str)
+        with self._lock, open(self._path, "a", encoding="utf-8") as trace_file:
+            trace_file.write(line + "\n")
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OTLPHttpExporter:
+    """Sends spans in batches to an OTLP/HTTP endpoint from a background thread.
+
+    Spans are dropped (and counted) when the queue is full rather than
+    slowing requests down.
+    """
+
+    def __init__(self, endpoint: str, batch_size: int = 512, interval: float = 2.0) -> None:
+        self._url = endpoint.rstrip("/") + "/v1/traces"
+        self._batch_size = batch_size
+        self._interval = interval
+        self._queue: queue.Queue[tuple[Span, str]] = queue.Queue(maxsize=batch_size * 8)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, span: Span, service: str) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((span, service))
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        import httpx
+
+        with httpx.Client(timeout=5.0) as client:
+            stopping = False
+            while not stopping:
+                batch = []
+                deadline = time.monotonic() + self._interval
+                while len(batch) < self._batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                if batch:
+                    self._send(client, batch)
+
+    def _send(self, client, batch: list[tuple[Span, str]]) -> None:
+        by_service: dict[str, list[dict]] = {}
+        for span, service in batch:
+            by_service.setdefault(service, []).append(_otlp_span(span))
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": service})},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+                }
+                for service, spans in by_service.items()
+            ]
+        }
+        try:
+            client.post(self._url, json=payload).raise_for_status()
+        except Exception:
+            logger.warning("Failed to export %d spans to %s", len(batch), self._url, exc_info=True)
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    converted = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            converted.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            converted.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            converted.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            converted.append({"key": key, "value": {"stringValue": str(value)}})
+    return converted
+
+
+def _otlp_span(span: Span) -> dict:
+    return {
+        "traceId": span.context.trace_id,
+        "spanId": span.context.span_id,
+        "parentSpanId": span.parent_id or "",
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "status": {"code": 2 if span.error else 1},
+    }
+
+
+def create_exporter(name: str):
+    if name == "none":
+        return None
+    if name == "memory":
+        return InMemoryExporter()
+    if name == "file":
+        return FileExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+    if name == "otlp":
+        return OTLPHttpExporter(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318"))
+    raise ValueError(f"Unknown TRACE_EXPORTER: {name!r}, expected none, memory, file or otlp")
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_rate: float = 1.0, service: str = "unknown"):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.service = service
+
+    def start_trace(self, traceparent: str | None, trusted: bool = True) -> SpanContext | None:
+        """Context of the incoming request: continue the caller's trace or sample a new one.
+
+        An untrusted ``traceparent`` (from outside the system) is ignored.
+        """
+
+        if self.exporter is None:
+            return None
+        parent = parse_traceparent(traceparent) if trusted else None
+        if parent is not None:
+            return parent
+        trace_id = f"{random.getrandbits(128):032x}"
+        if random.random() < self.sample_rate:
+            # A sampled root: the server span opened under it has no parent.
+            return SpanContext(trace_id, _ROOT_SPAN_ID, True)
+        # Unsampled traces still carry an id so the decision propagates downstream.
+        return SpanContext(trace_id, f"{random.getrandbits(64):016x}", False)
+
+    def start_span(
+        self, name: str, kind: int = KIND_INTERNAL, parent: SpanContext | None = None
+    ) -> Span | None:
+        """Open a span under ``parent`` (default: the current one); ``None`` when unsampled."""
+
+        parent = parent or _current.get()
+        if parent is None or not parent.sampled or self.exporter is None:
+            return None
+        context = SpanContext(parent.trace_id, f"{random.getrandbits(64):016x}", True)
+        parent_id = None if parent.span_id == _ROOT_SPAN_ID else parent.span_id
+        return Span(name, context, parent_id, kind)
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        try:
+            self.exporter.export(span, self.service)
+        except Exception:
+            logger.warning("Failed to export span %s", span.name, exc_info=True)
+
+    @contextmanager
+    def span(
+        self, name: str, kind: int = KIND_INTERNAL, parent: SpanContext | None = None
+    ) -> Iterator[Span | None]:
+        span = self.start_span(name, kind, parent)
+        if span is None:
+            yield None
+            return
+        token = _current.set(span.context)
+        try:
+            yield span
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            _current.reset(token)
+            self.end_span(span)
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+tracer = Tracer(
+    exporter=create_exporter(os.getenv("TRACE_EXPORTER", "none")),
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.01")),
+    service=os.getenv("TRACE_SERVICE_NAME", "unknown"),
+)
+
+
+def configure_tracing(service: str) -> None:
+    """Name this process's spans after ``service`` unless TRACE_SERVICE_NAME is set."""
+    tracer.service = os.getenv("TRACE_SERVICE_NAME", service)
+
+
+def traced_methods(prefix: str) -> Callable[[type], type]:
+    """Class decorator: a span named ``prefix.method`` around each public method.
+
+    Generator methods are left alone; their work happens after they return.
+    """
+
+    def decorate(cls: type) -> type:
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(method):
+                continue
+            if inspect.isgeneratorfunction(method):
+                continue
+            setattr(cls, name, _traced(f"{prefix}.{name}", method))
+        return cls
+
+    return decorate
+
+
+def _traced(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return func(*args, **kwargs)
+        with tracer.span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class TracingMiddleware:
+    """Server span around every HTTP request, named after the matched route.
+
+    With ``trust_incoming=False`` (at the edge) the caller's ``traceparent``
+    is ignored and every request gets its own sampling decision.
+    """
+
+    def __init__(self, app, trust_incoming: bool = True):
+        self.app = app
+        self.trust_incoming = trust_incoming
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", ()))
+        incoming = headers.get(TRACEPARENT_HEADER.encode())
+        parent = tracer.start_trace(
+            incoming.decode("latin-1") if incoming else None, self.trust_incoming
+        )
+        if parent is None:
+            await self.app(scope, receive, send)
+            return
+        if not parent.sampled:
+            # Nothing is recorded, but outgoing calls pass the decision on.
+            token = _current.set(parent)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current.reset(token)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with tracer.span(f"{scope['method']} {scope['path']}", KIND_SERVER, parent) as span:
+            span.set("http.method", scope["method"])
+            span.set("http.target", scope["path"])
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.name = f"{scope['method']} {route.path}"
+                    span.set("http.route", route.path)
+                span.set("http.status_code", status)
+                span.error = span.error or status >= 500
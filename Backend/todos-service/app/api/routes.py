@@ -1,22 +1,76 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from app.api.dependencies import get_current_user, get_todo_service
-from app.domain.schemas import TodoCreateRequest, TodoResponse, TodoUpdateRequest
-from app.services.todo_service import TodoService
+from app.domain.schemas import (
+    TodoChangesResponse,
+    TodoCreateRequest,
+    TodoResponse,
+    TodoStatsResponse,
+    TodoUpdateRequest,
+)
+from app.services.todo_service import RESPONSE_FIELDS, TodoService
 from app.services.errors import TodoNotFoundError
+from shared.export import MEDIA_TYPES, content_disposition
 from shared.security import AuthContext
+from shared.serialization import InvalidFieldsError, rows_response, select_fields
+from shared.sync import MAX_CHANGES_PAGE, InvalidSyncTokenError, SyncTokenExpiredError
 
 router = APIRouter(prefix="/todos", tags=["Todos"])
 
 
 @router.get("", response_model=list[TodoResponse])
 def list_todos(
+    fields: str | None = Query(default=None, description="Comma-separated subset of fields"),
+    auth: AuthContext = Depends(get_current_user),
+    service: TodoService = Depends(get_todo_service),
+):
+    try:
+        selected = select_fields(fields, RESPONSE_FIELDS)
+    except InvalidFieldsError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # Encoded directly from the rows; response_model only documents the full shape.
+    return rows_response(service.list_todos(auth.user.id, selected), selected)
+
+
+@router.get("/changes", response_model=TodoChangesResponse)
+def list_todo_changes(
+    since: str | None = Query(default=None),
+    limit: int = Query(default=MAX_CHANGES_PAGE, ge=1, le=MAX_CHANGES_PAGE),
+    auth: AuthContext = Depends(get_current_user),
+    service: TodoService = Depends(get_todo_service),
+):
+    try:
+        return service.list_changes(auth.user.id, since, limit)
+    except InvalidSyncTokenError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except SyncTokenExpiredError as exc:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(exc)) from exc
+
+
+@router.get("/stats", response_model=TodoStatsResponse)
+def get_todo_stats(
+    auth: AuthContext = Depends(get_current_user),
+    service: TodoService = Depends(get_todo_service),
+):
+    return service.get_stats(auth.user.id)
+
+
+@router.get("/export")
+def export_todos(
+    fmt: Literal["ics", "csv", "ndjson"] = Query(default="ics", alias="format"),
     auth: AuthContext = Depends(get_current_user),
     service: TodoService = Depends(get_todo_service),
 ):
-    return service.list_todos(auth.user.id)
+    return StreamingResponse(
+        service.export_todos(auth.user.id, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": content_disposition("todos", fmt)},
+    )
 
 
 @router.post("", response_model=TodoResponse, status_code=status.HTTP_201_CREATED)
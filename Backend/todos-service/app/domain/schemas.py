@@ -40,3 +40,17 @@ class TodoResponse(BaseModel):
     updated_at: datetime
 
 
+class TodoStatsResponse(BaseModel):
+    total: int
+    completed: int
+    open: int
+    overdue: int
+    by_priority: dict[str, int]
+    by_category: dict[str, int]
+
+
+class TodoChangesResponse(BaseModel):
+    upserts: list[TodoResponse]
+    deleted: list[int]
+    next_token: str
+    has_more: bool
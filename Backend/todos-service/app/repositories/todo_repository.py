@@ -1,21 +1,63 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections import Counter
+from collections.abc import Iterator, Sequence
 from datetime import datetime
 
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
-from shared.models import Todo
+from shared.database import insert_on_conflict
+from shared.export import YIELD_PER
+from shared.models import Todo, TodoCounter
+from shared.notifications import enqueue_change
+from shared.sync import ChangeSet, next_sync_seq, read_changes, record_tombstones
+from shared.tracing import traced_methods
 
+SYNC_RESOURCE = "todos"
 
+COUNTER_COLUMNS = (
+    "total",
+    "completed",
+    "open_low",
+    "open_medium",
+    "open_high",
+    "open_day",
+    "open_week",
+    "open_general",
+)
+
+# (completed, priority, category) of a todo as seen by the counters.
+CounterState = tuple[bool, str, str]
+
+
+@traced_methods("TodoRepository")
 class TodoRepository:
     """Data access abstraction for todos."""
 
     def __init__(self, session: Session):
         self._session = session
 
-    def list_for_user(self, user_id: int) -> Sequence[Todo]:
-        return self._session.query(Todo).filter(Todo.user_id == user_id).all()
+    def list_for_user(self, user_id: int, fields: Sequence[str]) -> Sequence[Row]:
+        """Rows holding only ``fields``, without building ``Todo`` objects."""
+
+        columns = [Todo.__table__.c[name] for name in fields]
+        return self._session.execute(select(*columns).where(Todo.user_id == user_id)).all()
+
+    def iter_export(self, user_id: int) -> Iterator[Row]:
+        """Stream a user's todos as rows through a server-side cursor."""
+
+        statement = (
+            select(*Todo.__table__.columns)
+            .where(Todo.user_id == user_id)
+            .order_by(Todo.id)
+            .execution_options(yield_per=YIELD_PER)
+        )
+        yield from self._session.execute(statement)
+
+    def list_changes(self, user_id: int, token: str | None, limit: int) -> ChangeSet:
+        return read_changes(self._session, Todo, user_id, SYNC_RESOURCE, token, limit)
 
     def get_for_user(self, user_id: int, todo_id: int) -> Todo | None:
         return (
@@ -45,20 +87,115 @@ class TodoRepository:
             category=category,
             due_date=due_date,
             tags=tags,
+            sync_seq=next_sync_seq(self._session, user_id, SYNC_RESOURCE),
         )
         self._session.add(todo)
+        self._session.flush()
+        self._adjust_counters(user_id, _counter_deltas(counter_state(todo), 1))
+        enqueue_change(self._session, user_id, SYNC_RESOURCE, "created", todo.id)
         self._session.commit()
         self._session.refresh(todo)
         return todo
 
-    def save(self, todo: Todo) -> Todo:
+    def save(self, todo: Todo, previous: CounterState | None = None) -> Todo:
+        todo.sync_seq = next_sync_seq(self._session, todo.user_id, SYNC_RESOURCE)
         self._session.add(todo)
+        if previous is not None and previous != counter_state(todo):
+            self._session.flush()
+            deltas = _counter_deltas(previous, -1)
+            deltas.update(_counter_deltas(counter_state(todo), 1))
+            self._adjust_counters(todo.user_id, deltas)
+        enqueue_change(self._session, todo.user_id, SYNC_RESOURCE, "updated", todo.id)
         self._session.commit()
         self._session.refresh(todo)
         return todo
 
     def delete(self, todo: Todo) -> None:
         self._session.delete(todo)
+        self._session.flush()
+        self._adjust_counters(todo.user_id, _counter_deltas(counter_state(todo), -1))
+        record_tombstones(self._session, todo.user_id, SYNC_RESOURCE, [todo.id])
+        enqueue_change(self._session, todo.user_id, SYNC_RESOURCE, "deleted", todo.id)
+        self._session.commit()
+
+    def get_counters(self, user_id: int) -> TodoCounter:
+        counters = self._session.get(TodoCounter, user_id)
+        if counters is None:
+            # Counted but not stored: reads never write, the next todo write stores the row.
+            counters = TodoCounter(user_id=user_id, **self._count_todos(user_id))
+        return counters
+
+    def count_overdue(self, user_id: int, now: datetime) -> int:
+        return (
+            self._session.query(func.count(Todo.id))
+            .filter(
+                Todo.user_id == user_id,
+                Todo.completed.is_(False),
+                Todo.due_date < now,
+            )
+            .scalar()
+        )
+
+    def rebuild_counters(self, user_id: int) -> None:
+        """Recompute a user's counters from the todos table and store them."""
+
+        values = {**self._count_todos(user_id), "updated_at": datetime.utcnow()}
+        insert_on_conflict(self._session, TodoCounter, {"user_id": user_id, **values}, values)
+
+    def _count_todos(self, user_id: int) -> dict[str, int]:
+        """Counter values of a user from the todos table, with one grouped query."""
+
+        rows = (
+            self._session.query(Todo.completed, Todo.priority, Todo.category, func.count(Todo.id))
+            .filter(Todo.user_id == user_id)
+            .group_by(Todo.completed, Todo.priority, Todo.category)
+            .all()
+        )
+        totals: Counter[str] = Counter()
+        for completed, priority, category, count in rows:
+            state = (bool(completed), priority, category)
+            for column, delta in _counter_deltas(state, count).items():
+                totals[column] += delta
+
+        return {column: totals[column] for column in COUNTER_COLUMNS}
+
+    def users_with_todos(self) -> list[int]:
+        todo_users = self._session.query(Todo.user_id).distinct()
+        counter_users = self._session.query(TodoCounter.user_id)
+        return sorted({user_id for (user_id,) in todo_users.union(counter_users).all()})
+
+    def commit(self) -> None:
         self._session.commit()
 
+    def _adjust_counters(self, user_id: int, deltas: Counter[str]) -> None:
+        changes = {
+            column: getattr(TodoCounter, column) + delta
+            for column, delta in deltas.items()
+            if delta
+        }
+        if not changes:
+            return
+        statement = update(TodoCounter).where(TodoCounter.user_id == user_id).values(**changes)
+        if self._session.execute(statement).rowcount:
+            return
+        # First write for this user: the flushed todo is already in the count. When
+        # a concurrent first write stores the row before us, the deltas go onto it.
+        values = {"user_id": user_id, **self._count_todos(user_id)}
+        if not insert_on_conflict(self._session, TodoCounter, values):
+            self._session.execute(statement)
+
+
+def counter_state(todo: Todo) -> CounterState:
+    return bool(todo.completed), todo.priority, todo.category
+
 
+def _counter_deltas(state: CounterState, sign: int) -> Counter[str]:
+    completed, priority, category = state
+    deltas: Counter[str] = Counter(total=sign)
+    if completed:
+        deltas["completed"] += sign
+    else:
+        for column in (f"open_{priority}", f"open_{category}"):
+            if column in COUNTER_COLUMNS:
+                deltas[column] += sign
+    return deltas
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any
+
+from shared.export import ical_datetime, ical_text
+
+_PRIORITIES = {"high": 1, "medium": 5, "low": 9}
+
+
+def todo_component(row: Any) -> list[str]:
+    """Content lines of the VTODO for an export row."""
+
+    lines = [
+        "BEGIN:VTODO",
+        f"UID:todo-{row.id}@calendar",
+        f"DTSTAMP:{ical_datetime(row.updated_at or row.created_at)}",
+        f"CREATED:{ical_datetime(row.created_at)}",
+        f"SUMMARY:{ical_text(row.title)}",
+        f"STATUS:{'COMPLETED' if row.completed else 'NEEDS-ACTION'}",
+        f"PRIORITY:{_PRIORITIES.get(row.priority, 0)}",
+    ]
+    if row.description:
+        lines.append(f"DESCRIPTION:{ical_text(row.description)}")
+    if row.due_date:
+        lines.append(f"DUE:{ical_datetime(row.due_date)}")
+    if row.tags:
+        categories = ",".join(ical_text(tag.strip()) for tag in row.tags.split(",") if tag.strip())
+        lines.append(f"CATEGORIES:{categories}")
+    lines.append("END:VTODO")
+    return lines
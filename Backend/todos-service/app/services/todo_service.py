@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from datetime import datetime
 
+from sqlalchemy.engine import Row
+
+from shared.export import csv_chunks, ical_chunks, ndjson_chunks
 from shared.models import Todo
+from shared.sync import ChangeSet
 
-from app.domain.schemas import TodoCreateRequest, TodoUpdateRequest
-from app.repositories.todo_repository import TodoRepository
+from app.domain.schemas import (
+    TodoCreateRequest,
+    TodoResponse,
+    TodoStatsResponse,
+    TodoUpdateRequest,
+)
+from app.repositories.todo_repository import TodoRepository, counter_state
 from app.services.errors import TodoNotFoundError
+from app.services.ical_export import todo_component
+
+# Columns of ``TodoResponse``, in order; list and export rows carry exactly these.
+RESPONSE_FIELDS = tuple(TodoResponse.model_fields)
+EXPORT_FIELDS = RESPONSE_FIELDS
 
 
 class TodoService:
@@ -15,8 +30,40 @@ class TodoService:
     def __init__(self, repository: TodoRepository):
         self._repository = repository
 
-    def list_todos(self, user_id: int) -> list[Todo]:
-        return list(self._repository.list_for_user(user_id))
+    def list_todos(self, user_id: int, fields: tuple[str, ...] = RESPONSE_FIELDS) -> list[Row]:
+        return list(self._repository.list_for_user(user_id, fields))
+
+    def list_changes(self, user_id: int, token: str | None, limit: int) -> ChangeSet:
+        return self._repository.list_changes(user_id, token, limit)
+
+    def get_stats(self, user_id: int) -> TodoStatsResponse:
+        counters = self._repository.get_counters(user_id)
+        return TodoStatsResponse(
+            total=counters.total,
+            completed=counters.completed,
+            open=counters.total - counters.completed,
+            overdue=self._repository.count_overdue(user_id, datetime.utcnow()),
+            by_priority={
+                "low": counters.open_low,
+                "medium": counters.open_medium,
+                "high": counters.open_high,
+            },
+            by_category={
+                "day": counters.open_day,
+                "week": counters.open_week,
+                "general": counters.open_general,
+            },
+        )
+
+    def export_todos(self, user_id: int, fmt: str) -> Iterator[bytes]:
+        """Encode all of a user's todos lazily; rows are streamed from the database."""
+
+        rows = self._repository.iter_export(user_id)
+        if fmt == "ics":
+            return ical_chunks(rows, todo_component, "Задачи")
+        if fmt == "csv":
+            return csv_chunks(rows, EXPORT_FIELDS)
+        return ndjson_chunks(rows, EXPORT_FIELDS)
 
     def create_todo(self, user_id: int, payload: TodoCreateRequest) -> Todo:
         data = payload.model_dump()
@@ -31,11 +78,12 @@ class TodoService:
     def update_todo(self, user_id: int, todo_id: int, payload: TodoUpdateRequest) -> Todo:
         todo = self.get_todo(user_id, todo_id)
         update_data = payload.model_dump(exclude_unset=True)
+        previous = counter_state(todo)
 
         for field, value in update_data.items():
             setattr(todo, field, value)
         todo.updated_at = datetime.utcnow()
-        return self._repository.save(todo)
+        return self._repository.save(todo, previous)
 
     def delete_todo(self, user_id: int, todo_id: int) -> None:
         todo = self.get_todo(user_id, todo_id)
@@ -10,4 +10,9 @@ from app.main import app  # noqa: E402,F401
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8003)
+    # SERVICE_SOCKET=/run/calendar/todos.sock: listen on a unix socket instead of TCP.
+    socket_path = os.getenv("SERVICE_SOCKET")
+    if socket_path:
+        uvicorn.run(app, uds=socket_path)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8003)
@@ -0,0 +1,50 @@
+"""Recompute per-user todo counters from the todos table to repair drift.
+
+Usage: python rebuild_stats.py [--user-id ID ...]
+"""
+
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(BASE_DIR, ".."))
+
+from shared import sharding  # noqa: E402
+from shared.database import SessionLocal  # noqa: E402
+
+from app.repositories.todo_repository import TodoRepository  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids")
+    args = parser.parse_args()
+
+    rebuilt = 0
+    if args.user_ids:
+        for user_id in args.user_ids:
+            with SessionLocal() as session:
+                sharding.bind_user(session, user_id)
+                rebuilt += rebuild(session, [user_id])
+    elif sharding.enabled():
+        for index in range(sharding.shard_count()):
+            with sharding.shard_sessionmaker(index)() as session:
+                rebuilt += rebuild(session)
+    else:
+        with SessionLocal() as session:
+            rebuilt += rebuild(session)
+    print(f"Rebuilt todo counters for {rebuilt} user(s)")
+
+
+def rebuild(session, user_ids: list[int] | None = None) -> int:
+    repository = TodoRepository(session)
+    user_ids = user_ids or repository.users_with_todos()
+    for user_id in user_ids:
+        repository.rebuild_counters(user_id)
+        repository.commit()
+    return len(user_ids)
+
+
+if __name__ == "__main__":
+    main()